@@ -3,6 +3,7 @@ import sys
 import os
 import time
 import traceback
+import multiprocessing
 
 # --- PyQt5 Imports ---
 from PyQt5.QtWidgets import QApplication, QDialog
@@ -12,6 +13,7 @@ from PyQt5.QtCore import QCoreApplication
 from src.ui.main_window import DownloaderApp
 from src.ui.dialogs.TourDialog import TourDialog
 from src.config.constants import CONFIG_ORGANIZATION_NAME, CONFIG_APP_NAME_MAIN
+from src.services.image_compressor import shutdown_image_compression_pool
 
 # --- Define APP_BASE_DIR globally and make available early ---
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
@@ -94,6 +96,7 @@ def main():
 
         # --- Start Application ---
         exit_code = qt_app.exec_()
+        shutdown_image_compression_pool()
         print(f"Application finished with exit code: {exit_code}")
         sys.exit(exit_code)
 
@@ -107,4 +110,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Image compression runs in worker processes; frozen builds need this to start them.
+    multiprocessing.freeze_support()
     main()
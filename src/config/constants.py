@@ -41,9 +41,62 @@ POST_WORKER_NUM_BATCHES = 4
 POST_WORKER_BATCH_DELAY_SECONDS = 2.5
 MAX_POST_WORKERS_WHEN_COMMENT_FILTERING = 3
 
+# --- Post List Fetching ---
+PAGE_PREFETCH_WINDOW = 4  # Pages kept in flight ahead of the consumer (1 = serial fetching)
+PAGE_PREFETCH_REQUESTS_PER_SECOND = 3.0  # Request budget shared by the prefetch window
+
+# --- Oldest-First (Manga) Ordering ---
+OLDEST_FIRST_MERGE = "merge"  # Fetch every page, then k-way merge sorted runs spilled to disk
+OLDEST_FIRST_REVERSE_PAGES = "reverse_pages"  # Walk pages from the last one back, yielding as it goes
+MANGA_SORT_RUN_SIZE = 2000  # Posts per sorted run written to disk
+
+# --- Per-Host Rate Limiting ---
+RATE_LIMIT_DEFAULT_RPS = 4.0  # Starting request rate for a host not seen before
+RATE_LIMIT_MIN_RPS = 0.25  # Floor the rate drops to under repeated throttling
+RATE_LIMIT_MAX_RPS = 12.0  # Ceiling the rate ramps back up to
+RATE_LIMIT_BURST = 4  # Tokens a host bucket can hold
+RATE_LIMIT_BASE_BACKOFF_SECONDS = 5.0  # Pause after a 429/403 without Retry-After
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 120.0
+RATE_LIMIT_RAMP_UP_AFTER = 20  # Successful responses before the rate is raised again
+RATE_LIMIT_RAMP_UP_STEP = 0.5  # Requests/second added on each ramp-up
+# File and CDN downloads get their own, much looser bucket per host; only 429 slows it down.
+RATE_LIMIT_FILE_DEFAULT_RPS = 50.0
+RATE_LIMIT_FILE_MAX_RPS = 100.0
+RATE_LIMIT_FILE_BURST = 50
+
+# --- Image Compression ---
+IMAGE_COMPRESSION_MIN_BYTES = int(1.5 * 1024 * 1024)  # Smaller images are saved as downloaded
+IMAGE_COMPRESSION_WEBP_QUALITY = 85
+IMAGE_COMPRESSION_MAX_PIXELS = 100_000_000  # Larger images are scaled down while decoding, to bound memory
+IMAGE_COMPRESSION_MAX_PROCESSES = 0  # Worker processes; 0 = one less than the number of CPU cores
+IMAGE_COMPRESSION_QUEUE_PER_PROCESS = 2  # Images queued per process before downloaders wait
+
 # --- Multipart Download Settings ---
 MIN_SIZE_FOR_MULTIPART_DOWNLOAD = 10 * 1024 * 1024  # 10 MB
 MAX_PARTS_FOR_MULTIPART_DOWNLOAD = 15
+MULTIPART_MIN_SEGMENT_MB = 4  # Smallest range a slow connection's work is split into
+
+# --- Global Download Scheduler ---
+DOWNLOAD_MAX_CONNECTIONS_DEFAULT = 64  # File-download connections open at once, across all workers
+DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT = 0  # Bytes/second for all downloads together; 0 = unlimited
+DOWNLOAD_SIZE_HINT_IMAGE = 2 * 1024 * 1024  # Queue priority guesses before a file's size is known
+DOWNLOAD_SIZE_HINT_LARGE = 512 * 1024 * 1024  # Videos and archives
+DOWNLOAD_SIZE_HINT_OTHER = 16 * 1024 * 1024
+
+# --- File Metadata (HEAD) Cache ---
+HEAD_CACHE_TTL_SECONDS = 30 * 60  # Size/ETag/working subdomain of a file is trusted this long
+HEAD_CACHE_MAX_ENTRIES = 20000
+
+# --- Download Folder Index ---
+FOLDER_INDEX_MAX_FOLDERS = 512  # Folders whose file names are kept in memory at once
+
+# --- CDN File Nodes ---
+CDN_NODE_DOMAINS = ('kemono.cr', 'coomer.st')  # Sites whose files are spread over 'nN.' nodes
+CDN_NODE_COUNT = 4  # n1 .. nN are tried when a file host answers 403
+CDN_NODE_FAILURE_THRESHOLD = 3  # Consecutive failures before a host is routed around
+CDN_NODE_COOLDOWN_SECONDS = 120  # How long an unhealthy host is avoided before it is tried again
+CDN_NODE_REPROBE_INTERVAL_SECONDS = 60  # Background re-check of failing hosts
+CDN_NODE_PREFIX_MAX_ENTRIES = 5000  # Path prefixes whose serving node is remembered
 
 # --- UI and Settings Keys (for QSettings) ---
 TOUR_SHOWN_KEY = "neverShowTourAgainV19"
@@ -61,6 +114,22 @@ RESOLUTION_KEY = "window_resolution"
 UI_SCALE_KEY = "ui_scale_factor"
 SAVE_CREATOR_JSON_KEY = "saveCreatorJsonProfile"
 FETCH_FIRST_KEY = "fetchAllPostsFirst" 
+INCREMENTAL_SYNC_KEY = "incrementalCreatorSyncV1"
+OLDEST_FIRST_STRATEGY_KEY = "mangaOldestFirstStrategyV1"
+DOWNLOAD_MAX_CONNECTIONS_KEY = "downloadMaxConnectionsV1"
+DOWNLOAD_BANDWIDTH_LIMIT_KEY = "downloadBandwidthLimitV1"
+
+# --- Local Catalog ---
+CATALOG_DB_FILENAME = "catalog.sqlite3"  # Stored next to session.json in appdata
+CATALOG_BLOOM_MIN_CAPACITY = 100_000  # Path hashes the in-memory pre-check is sized for at least
+CATALOG_BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+# --- Session Journal ---
+SESSION_JOURNAL_COMPACT_EVERY = 500  # Journal records folded into session.json per compaction
+
+# --- Creator Profile Persistence ---
+PROFILE_FLUSH_EVERY_POSTS = 25  # Processed posts buffered before the profile is rewritten
+PROFILE_FLUSH_INTERVAL_SECONDS = 10.0  # Longest a processed post stays unsaved
 
 # --- UI Constants and Identifiers ---
 HTML_PREFIX = "<!HTML!>"
@@ -1,12 +1,17 @@
 import time
 import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 import json
 import requests
-import cloudscraper 
 from ..utils.network_utils import extract_post_info, prepare_cookies_for_request
+from ..utils.http_session import get_session, RateLimitWaitCancelled
+from ..utils.rate_limiter import THROTTLE_STATUS_CODES, HostRateLimiter
+from .post_store import ExternalPostSorter, post_sort_values
 from ..config.constants import (
-    STYLE_DATE_POST_TITLE
+    STYLE_DATE_POST_TITLE, PAGE_PREFETCH_WINDOW, PAGE_PREFETCH_REQUESTS_PER_SECOND,
+    OLDEST_FIRST_MERGE, OLDEST_FIRST_REVERSE_PAGES
 )
 
 
@@ -39,18 +44,25 @@ def fetch_posts_paginated(api_url_base, headers, offset, logger, cancellation_ev
         logger(log_message)
 
         try:
-            response = requests.get(paginated_url, headers=headers, timeout=(15, 60), cookies=cookies_dict)
+            response = get_session(paginated_url, cookies=cookies_dict).get(paginated_url, headers=headers, timeout=(15, 60), cancellation_event=cancellation_event)
             response.raise_for_status()
             response.encoding = 'utf-8'  
             return response.json()
 
+        except RateLimitWaitCancelled:
+            raise RuntimeError("Fetch operation cancelled by user while rate limited.")
         except requests.exceptions.RequestException as e:
-            # Handle 403 error on the FIRST page as a rate limit/block
-            if e.response is not None and e.response.status_code == 403 and offset == 0:
-                logger("   ❌ Access Denied (403 Forbidden) on the first page.")
-                logger("      This is likely a rate limit or a Cloudflare block.")
-                logger("      💡 SOLUTION: Wait a while, use a VPN, or provide a valid session cookie.")
-                return [] # Stop the process gracefully
+            # 429/403 are throttling: the host's shared rate limiter has already
+            # scheduled the backoff, so retry without an extra delay of our own.
+            if e.response is not None and e.response.status_code in THROTTLE_STATUS_CODES:
+                if attempt < max_retries - 1:
+                    logger(f"   ⚠️ Server is throttling requests (HTTP {e.response.status_code}). Backing off before retrying...")
+                    continue
+                if offset == 0:
+                    logger(f"   ❌ Access Denied (HTTP {e.response.status_code}) on the first page.")
+                    logger("      This is likely a rate limit or a Cloudflare block.")
+                    logger("      💡 SOLUTION: Wait a while, use a VPN, or provide a valid session cookie.")
+                    return [] # Stop the process gracefully
 
             # Handle 400 error as the end of pages
             if e.response is not None and e.response.status_code == 400:
@@ -79,6 +91,250 @@ def fetch_posts_paginated(api_url_base, headers, offset, logger, cancellation_ev
 
     raise RuntimeError(f"Failed to fetch page {paginated_url} after all attempts.")
 
+
+def _iter_post_pages(api_url_base, headers, start_offset, logger, cancellation_event=None, pause_event=None,
+                     cookies_dict=None, end_offset=None, page_size=50,
+                     prefetch_window=PAGE_PREFETCH_WINDOW, requests_per_second=PAGE_PREFETCH_REQUESTS_PER_SECOND):
+    """
+    Yields (offset, posts_batch) for consecutive pages of a creator feed, in offset order.
+
+    With a prefetch window above 1, up to that many upcoming offsets are fetched
+    concurrently while the caller consumes the current batch. All fetches go
+    through the API host's shared rate limiter, and page fetches are also held
+    to requests_per_second by a bucket of their own, so other API calls keep the
+    host's full rate. Iteration stops after the first empty or invalid page, or
+    after end_offset. Errors from fetch_posts_paginated propagate in order.
+    """
+    page_budget = None
+    if requests_per_second and requests_per_second > 0:
+        page_budget = HostRateLimiter(urlparse(api_url_base).netloc, rate=requests_per_second,
+                                      max_rate=requests_per_second, burst=max(1, prefetch_window or 1))
+
+    def _fetch_page(offset):
+        if page_budget:
+            # A cancelled wait falls through; fetch_posts_paginated reports the cancellation.
+            page_budget.acquire(cancellation_event)
+        return fetch_posts_paginated(api_url_base, headers, offset, logger, cancellation_event, pause_event, cookies_dict=cookies_dict)
+
+    if not prefetch_window or prefetch_window <= 1:
+        offset = start_offset
+        while end_offset is None or offset <= end_offset:
+            posts_batch = _fetch_page(offset)
+            yield offset, posts_batch
+            if not isinstance(posts_batch, list) or not posts_batch:
+                return
+            offset += page_size
+        return
+
+    executor = ThreadPoolExecutor(max_workers=prefetch_window, thread_name_prefix='PagePrefetch_')
+    in_flight = deque()
+    next_offset = start_offset
+    try:
+        while True:
+            while len(in_flight) < prefetch_window and (end_offset is None or next_offset <= end_offset):
+                if cancellation_event and cancellation_event.is_set():
+                    break
+                in_flight.append((next_offset, executor.submit(_fetch_page, next_offset)))
+                next_offset += page_size
+            if not in_flight:
+                return
+            offset, future = in_flight.popleft()
+            posts_batch = future.result()
+            yield offset, posts_batch
+            if not isinstance(posts_batch, list) or not posts_batch:
+                return
+    finally:
+        # Pages queued past the end (or after cancellation) are simply dropped.
+        for _, pending_future in in_flight:
+            pending_future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _post_id_as_int(post):
+    try:
+        return int(post.get('id') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def update_high_water_mark(high_water_mark, posts):
+    """
+    Returns the newest ('published', 'id') position among the given posts and
+    the current high-water mark, as a dict that can be stored in a creator profile.
+    """
+    newest = dict(high_water_mark) if high_water_mark else None
+    for post in posts:
+        published = post.get('published') or post.get('added') or ''
+        candidate = (published, _post_id_as_int(post))
+        if newest is None or candidate > (newest.get('published') or '', newest.get('id') or 0):
+            newest = {'published': published, 'id': candidate[1]}
+    return newest
+
+
+def _is_known_post(post, processed_post_ids, high_water_mark):
+    """A post is known if it was processed before or predates the recorded high-water mark."""
+    if post.get('id') in processed_post_ids:
+        return True
+    if not high_water_mark:
+        return False
+    published = post.get('published') or post.get('added') or ''
+    return bool(published) and published < (high_water_mark.get('published') or '')
+
+
+def _note_sort_fallbacks(post, sort_fallbacks):
+    """Records posts whose oldest-first sort key needed a fallback value."""
+    _, _, date_fallback, id_invalid = post_sort_values(post)
+    if date_fallback:
+        sort_fallbacks[date_fallback].append(post.get('id', '0'))
+    if id_invalid:
+        sort_fallbacks['invalid_id'].append(post.get('id', '0'))
+
+
+def _log_sort_fallbacks(sort_fallbacks, logger, max_examples=5):
+    """Logs one summary line per kind of sort fallback instead of one line per post."""
+    messages = {
+        'added': "missing 'published' date; their 'added' date was used for sorting",
+        'none': "missing both 'published' and 'added' dates; placed at the start of the sort",
+        'invalid_id': "have a non-integer ID; 0 was used for secondary sorting",
+    }
+    for kind, post_ids in sort_fallbacks.items():
+        if post_ids:
+            examples = ", ".join(str(post_id) for post_id in post_ids[:max_examples])
+            more = f" and {len(post_ids) - max_examples} more" if len(post_ids) > max_examples else ""
+            logger(f"    ⚠️ {len(post_ids)} post(s) {messages[kind]} (IDs: {examples}{more}).")
+
+
+def _find_last_page_offset(fetch_page, start_offset, end_offset, page_size):
+    """
+    Finds the offset of the last non-empty page at or after start_offset with
+    O(log n) requests: offsets are probed with a doubling step until an empty
+    page is hit, then the gap is bisected.
+
+    Returns:
+        tuple: (last_offset or None, {offset: batch} for every page fetched on the way)
+    """
+    fetched = {start_offset: fetch_page(start_offset)}
+    if not fetched[start_offset]:
+        return None, fetched
+    known_full, step = start_offset, page_size
+    first_empty = None
+    while first_empty is None:
+        probe = known_full + step
+        if end_offset is not None and probe >= end_offset:
+            probe = end_offset
+            if probe <= known_full:
+                return known_full, fetched
+        fetched[probe] = fetch_page(probe)
+        if fetched[probe]:
+            known_full = probe
+            if probe == end_offset:
+                return known_full, fetched
+            step *= 2
+        else:
+            first_empty = probe
+    while first_empty - known_full > page_size:
+        middle = known_full + ((first_empty - known_full) // page_size // 2) * page_size
+        fetched[middle] = fetch_page(middle)
+        if fetched[middle]:
+            known_full = middle
+        else:
+            first_empty = middle
+    return known_full, fetched
+
+
+def _iter_posts_oldest_first_by_reverse_pages(api_base_url, headers, start_offset, end_offset, page_size, logger,
+                                              cancellation_event, pause_event, cookies_dict, processed_post_ids):
+    """
+    Yields posts oldest-first without fetching the whole feed up front.
+
+    The API lists posts newest-first, so the last page is located first and
+    pages are then walked back towards start_offset, each page sorted
+    oldest-first. Downloads can begin after O(log n) probe requests.
+
+    The walk can take hours, and the feed may change meanwhile:
+    - A deleted post shifts newer posts one place older, onto pages already
+      walked. IDs already seen are skipped, so they are not repeated.
+    - A newly published post shifts every post one place older, so the
+      oldest posts of the next page to walk land on a page already walked.
+      Before each page, the page after it is fetched again, and any posts
+      on it not seen yet are yielded with this page. Further older pages
+      are followed the same way until one holds nothing new.
+    """
+    def fetch_page(offset):
+        logger(f"   Manga Mode: Probing page {offset // page_size + 1} (offset {offset}).")
+        batch = fetch_posts_paginated(api_base_url, headers, offset, logger, cancellation_event, pause_event, cookies_dict=cookies_dict)
+        return batch if isinstance(batch, list) else []
+
+    try:
+        last_offset, fetched_pages = _find_last_page_offset(fetch_page, start_offset, end_offset, page_size)
+    except RuntimeError as e:
+        logger(f"❌ {e}\n   Aborting manga mode pagination.")
+        return
+    if last_offset is None:
+        logger("😕 Manga Mode: No posts found on the first page checked.")
+        return
+    logger(f"   Manga Mode: Last page is page {last_offset // page_size + 1}. Processing pages oldest first...")
+
+    sort_fallbacks = {'added': [], 'none': [], 'invalid_id': []}
+    seen_ids = set()
+
+    def take_unseen(posts):
+        new_posts = []
+        for post in posts:
+            post_id = post.get('id')
+            if post_id in seen_ids:
+                continue
+            seen_ids.add(post_id)
+            if processed_post_ids and post_id in processed_post_ids:
+                continue
+            _note_sort_fallbacks(post, sort_fallbacks)
+            new_posts.append(post)
+        return new_posts
+
+    offset = last_offset
+    try:
+        while offset >= start_offset:
+            if pause_event and pause_event.is_set():
+                logger("   Manga mode post fetching paused...")
+                while pause_event.is_set():
+                    if cancellation_event and cancellation_event.is_set():
+                        break
+                    time.sleep(0.5)
+            if cancellation_event and cancellation_event.is_set():
+                logger("   Manga mode post fetching cancelled.")
+                return
+            # The first page is always fetched fresh; nothing newer will re-check it.
+            posts_batch = fetched_pages.pop(offset, None) if offset != start_offset else None
+            if posts_batch is None:
+                posts_batch = fetch_page(offset)
+            # Posts published since the older page was walked (or, for the last page,
+            # since it was probed) push this page's oldest posts onto that older page;
+            # pick them up before they are lost.
+            new_posts = []
+            check_offset = offset + page_size
+            while end_offset is None or check_offset <= end_offset:
+                check_batch = fetch_page(check_offset)
+                if all(post.get('id') in seen_ids for post in check_batch):
+                    break
+                shifted_posts = take_unseen(check_batch)
+                if shifted_posts:
+                    logger(f"   Manga Mode: {len(shifted_posts)} post(s) shifted onto page {check_offset // page_size + 1} by new posts; picking them up.")
+                new_posts.extend(shifted_posts)
+                check_offset += page_size
+            new_posts.extend(take_unseen(posts_batch))
+            new_posts.sort(key=lambda p: post_sort_values(p)[:2])
+            if new_posts:
+                yield new_posts
+            offset -= page_size
+    except RuntimeError as e:
+        if "cancelled by user" in str(e).lower():
+            logger(f"ℹ️ Manga mode pagination stopped due to cancellation: {e}")
+        else:
+            logger(f"❌ {e}\n   Aborting manga mode pagination at offset {offset}.")
+    finally:
+        _log_sort_fallbacks(sort_fallbacks, logger)
+
+
 def fetch_single_post_data(api_domain, service, user_id, post_id, headers, logger, cookies_dict=None):
     """
     --- MODIFIED FUNCTION ---
@@ -87,10 +343,10 @@ def fetch_single_post_data(api_domain, service, user_id, post_id, headers, logge
     post_api_url = f"https://{api_domain}/api/v1/{service}/user/{user_id}/post/{post_id}"
     logger(f"      Fetching full content for post ID {post_id}...")
 
-    scraper = cloudscraper.create_scraper()
+    scraper = get_session(post_api_url, cookies=cookies_dict, use_cloudscraper=True)
 
     try:
-        response = scraper.get(post_api_url, headers=headers, timeout=(15, 300), cookies=cookies_dict)
+        response = scraper.get(post_api_url, headers=headers, timeout=(15, 300))
         response.raise_for_status()
 
         full_post_data = response.json()
@@ -115,7 +371,7 @@ def fetch_post_comments(api_domain, service, user_id, post_id, headers, logger,
     logger(f"   Fetching comments: {comments_api_url}")
     
     try:
-        response = requests.get(comments_api_url, headers=headers, timeout=(10, 30), cookies=cookies_dict)
+        response = get_session(comments_api_url, cookies=cookies_dict).get(comments_api_url, headers=headers, timeout=(10, 30))
         response.raise_for_status()
         response.encoding = 'utf-8'          
         return response.json()
@@ -138,8 +394,26 @@ def download_from_api(
     app_base_dir=None,
     manga_filename_style_for_sort_check=None,
     processed_post_ids=None,
-    fetch_all_first=False  
+    fetch_all_first=False,
+    prefetch_window=PAGE_PREFETCH_WINDOW,
+    requests_per_second=PAGE_PREFETCH_REQUESTS_PER_SECOND,
+    incremental_sync=False,
+    high_water_mark=None,
+    oldest_first_strategy=OLDEST_FIRST_MERGE
     ):
+    """
+    Yields batches of posts for a creator feed or a single post URL.
+
+    With incremental_sync, paging stops at the first page made up entirely of
+    known posts (already processed, or older than high_water_mark, the newest
+    post recorded by the last complete sync). Without it, pages whose posts
+    were all processed are skipped and paging continues to the end of the feed.
+
+    For oldest-first manga styles, oldest_first_strategy picks between fetching
+    every page and merging sorted runs spilled to disk (OLDEST_FIRST_MERGE), or
+    walking pages backwards from the last one so posts are yielded as soon as
+    the oldest pages arrive (OLDEST_FIRST_REVERSE_PAGES).
+    """
     parsed_input_url_for_domain = urlparse(api_url_input)
     api_domain = parsed_input_url_for_domain.netloc
 
@@ -176,7 +450,7 @@ def download_from_api(
         direct_post_api_url = f"https://{api_domain}/api/v1/{service}/user/{user_id}/post/{target_post_id}"
         logger(f"   Attempting direct fetch for target post: {direct_post_api_url}")
         try:
-            direct_response = requests.get(direct_post_api_url, headers=headers, timeout=(10, 30), cookies=cookies_for_api)
+            direct_response = get_session(direct_post_api_url, cookies=cookies_for_api).get(direct_post_api_url, headers=headers, timeout=(10, 30))
             direct_response.raise_for_status()
             direct_response.encoding = 'utf-8' 
             direct_post_data = direct_response.json()
@@ -206,9 +480,23 @@ def download_from_api(
     should_fetch_all = fetch_all_first or is_manga_mode_fetch_all_and_sort_oldest_first  
     api_base_url = f"https://{api_domain}/api/v1/{service}/user/{user_id}/posts"
     page_size = 50
+    if is_manga_mode_fetch_all_and_sort_oldest_first and oldest_first_strategy == OLDEST_FIRST_REVERSE_PAGES:
+        logger(f"   Manga Mode (Style: {manga_filename_style_for_sort_check if manga_filename_style_for_sort_check else 'Default'} - Oldest First Sort Active): Walking pages from the oldest end...")
+        start_offset_manga = (start_page - 1) * page_size if start_page and start_page > 1 else 0
+        end_offset_manga = (end_page - 1) * page_size if end_page else None
+        yield from _iter_posts_oldest_first_by_reverse_pages(
+            api_base_url, headers, start_offset_manga, end_offset_manga, page_size, logger,
+            cancellation_event, pause_event, cookies_for_api, processed_post_ids
+        )
+        return
+
     if is_manga_mode_fetch_all_and_sort_oldest_first:
         logger(f"   Manga Mode (Style: {manga_filename_style_for_sort_check if manga_filename_style_for_sort_check else 'Default'} - Oldest First Sort Active): Fetching all posts to sort by date...")
-        all_posts_for_manga_mode = []
+        # Posts are sorted in bounded runs spilled to disk, then merged on the way out.
+        manga_sorter = ExternalPostSorter()
+        sort_fallbacks = {'added': [], 'none': [], 'invalid_id': []}
+        fetched_count_manga = 0
+        skipped_processed_manga = 0
         current_offset_manga = 0
         if start_page and start_page > 1:
             current_offset_manga = (start_page - 1) * page_size
@@ -217,24 +505,26 @@ def download_from_api(
             logger(f"   Manga Mode: Starting fetch from page 1 (offset 0).")
         if end_page:
             logger(f"   Manga Mode: Will fetch up to page {end_page}.")
-        while True:
-            if pause_event and pause_event.is_set():
-                logger("   Manga mode post fetching paused...")
-                while pause_event.is_set():
-                    if cancellation_event and cancellation_event.is_set():
-                        logger("   Manga mode post fetching cancelled while paused.")
-                        break
-                    time.sleep(0.5)
-                if not (cancellation_event and cancellation_event.is_set()): logger("   Manga mode post fetching resumed.")
-            if cancellation_event and cancellation_event.is_set():
-                logger("   Manga mode post fetching cancelled.")
-                break
-            current_page_num_manga = (current_offset_manga // page_size) + 1
-            if end_page and current_page_num_manga > end_page:
-                logger(f"   Manga Mode: Reached specified end page ({end_page}). Stopping post fetch.")
-                break
-            try:
-                posts_batch_manga = fetch_posts_paginated(api_base_url, headers, current_offset_manga, logger, cancellation_event, pause_event, cookies_dict=cookies_for_api)
+        end_offset_manga = (end_page - 1) * page_size if end_page else None
+        manga_page_iter = _iter_post_pages(
+            api_base_url, headers, current_offset_manga, logger, cancellation_event, pause_event,
+            cookies_dict=cookies_for_api, end_offset=end_offset_manga, page_size=page_size,
+            prefetch_window=prefetch_window, requests_per_second=requests_per_second
+        )
+        try:
+            for current_offset_manga, posts_batch_manga in manga_page_iter:
+                if pause_event and pause_event.is_set():
+                    logger("   Manga mode post fetching paused...")
+                    while pause_event.is_set():
+                        if cancellation_event and cancellation_event.is_set():
+                            logger("   Manga mode post fetching cancelled while paused.")
+                            break
+                        time.sleep(0.5)
+                    if not (cancellation_event and cancellation_event.is_set()): logger("   Manga mode post fetching resumed.")
+                if cancellation_event and cancellation_event.is_set():
+                    logger("   Manga mode post fetching cancelled.")
+                    break
+                current_page_num_manga = (current_offset_manga // page_size) + 1
                 if not isinstance(posts_batch_manga, list):
                     logger(f"❌ API Error (Manga Mode): Expected list of posts, got {type(posts_batch_manga)}.")
                     break
@@ -242,64 +532,57 @@ def download_from_api(
                     logger("✅ Reached end of posts (Manga Mode fetch all).")
                     if start_page and not end_page and current_page_num_manga < start_page:
                         logger(f"   Manga Mode: No posts found on or after specified start page {start_page}.")
-                    elif end_page and current_page_num_manga <= end_page and not all_posts_for_manga_mode:
+                    elif end_page and current_page_num_manga <= end_page and not fetched_count_manga:
                         logger(f"   Manga Mode: No posts found within the specified page range ({start_page or 1}-{end_page}).")
                     break
-                all_posts_for_manga_mode.extend(posts_batch_manga)
+                # Processed posts are dropped per page so they never accumulate in memory.
+                for post in posts_batch_manga:
+                    if processed_post_ids and post.get('id') in processed_post_ids:
+                        skipped_processed_manga += 1
+                        continue
+                    _note_sort_fallbacks(post, sort_fallbacks)
+                    manga_sorter.add(post)
+                fetched_count_manga += len(posts_batch_manga)
                 
-                logger(f"MANGA_FETCH_PROGRESS:{len(all_posts_for_manga_mode)}:{current_page_num_manga}")
-
-                current_offset_manga += page_size
-                time.sleep(0.6)
-            except RuntimeError as e:
-                if "cancelled by user" in str(e).lower():
-                    logger(f"ℹ️ Manga mode pagination stopped due to cancellation: {e}")
-                else:
-                    logger(f"❌ {e}\n   Aborting manga mode pagination.")
-                break
-            except Exception as e:
-                logger(f"❌ Unexpected error during manga mode fetch: {e}")
-                traceback.print_exc()
-                break
+                logger(f"MANGA_FETCH_PROGRESS:{fetched_count_manga}:{current_page_num_manga}")
+                if incremental_sync and all(_is_known_post(p, processed_post_ids, high_water_mark) for p in posts_batch_manga):
+                    logger(f"   🔁 Incremental sync: page {current_page_num_manga} holds only known posts. Stopping fetch.")
+                    break
+            else:
+                if end_page:
+                    logger(f"   Manga Mode: Reached specified end page ({end_page}). Stopping post fetch.")
+        except RuntimeError as e:
+            if "cancelled by user" in str(e).lower():
+                logger(f"ℹ️ Manga mode pagination stopped due to cancellation: {e}")
+            else:
+                logger(f"❌ {e}\n   Aborting manga mode pagination.")
+        except Exception as e:
+            logger(f"❌ Unexpected error during manga mode fetch: {e}")
+            traceback.print_exc()
+        finally:
+            manga_page_iter.close()
         
-        if cancellation_event and cancellation_event.is_set(): return
+        if cancellation_event and cancellation_event.is_set():
+            manga_sorter.close()
+            return
         
-        if all_posts_for_manga_mode:
-            logger(f"MANGA_FETCH_COMPLETE:{len(all_posts_for_manga_mode)}")
+        if fetched_count_manga:
+            logger(f"MANGA_FETCH_COMPLETE:{fetched_count_manga}")
 
-        if all_posts_for_manga_mode:
-            if processed_post_ids:
-                original_count = len(all_posts_for_manga_mode)
-                all_posts_for_manga_mode = [post for post in all_posts_for_manga_mode if post.get('id') not in processed_post_ids]
-                skipped_count = original_count - len(all_posts_for_manga_mode)
-                if skipped_count > 0:
-                    logger(f"   Manga Mode: Skipped {skipped_count} already processed post(s) before sorting.")
-
-            logger(f"   Manga Mode: Fetched {len(all_posts_for_manga_mode)} total posts. Sorting by publication date (oldest first)...")
-            def sort_key_tuple(post):
-                published_date_str = post.get('published')
-                added_date_str = post.get('added')
-                post_id_str = post.get('id', "0")
-                primary_sort_val = "0000-00-00T00:00:00"
-                if published_date_str:
-                    primary_sort_val = published_date_str
-                elif added_date_str:
-                    logger(f"    ⚠️ Post ID {post_id_str} missing 'published' date, using 'added' date '{added_date_str}' for primary sorting.")
-                    primary_sort_val = added_date_str
-                else:
-                    logger(f"    ⚠️ Post ID {post_id_str} missing both 'published' and 'added' dates. Placing at start of sort (using default earliest date).")
-                secondary_sort_val = 0
-                try:
-                    secondary_sort_val = int(post_id_str)
-                except ValueError:
-                    logger(f"    ⚠️ Post ID '{post_id_str}' is not a valid integer for secondary sorting, using 0.")
-                return (primary_sort_val, secondary_sort_val)
-            all_posts_for_manga_mode.sort(key=sort_key_tuple)
-            for i in range(0, len(all_posts_for_manga_mode), page_size):
-                if cancellation_event and cancellation_event.is_set():
-                    logger("   Manga mode post yielding cancelled.")
-                    break
-                yield all_posts_for_manga_mode[i:i + page_size]
+        if skipped_processed_manga > 0:
+            logger(f"   Manga Mode: Skipped {skipped_processed_manga} already processed post(s) before sorting.")
+        _log_sort_fallbacks(sort_fallbacks, logger)
+
+        try:
+            if manga_sorter.count:
+                logger(f"   Manga Mode: Fetched {manga_sorter.count} total posts. Sorting by publication date (oldest first)...")
+                for posts_batch_sorted in manga_sorter.iter_sorted_batches(page_size):
+                    if cancellation_event and cancellation_event.is_set():
+                        logger("   Manga mode post yielding cancelled.")
+                        break
+                    yield posts_batch_sorted
+        finally:
+            manga_sorter.close()
         return
 
     if manga_mode and not target_post_id and (manga_filename_style_for_sort_check == STYLE_DATE_POST_TITLE):
@@ -312,67 +595,87 @@ def download_from_api(
         current_offset = (start_page - 1) * page_size
         current_page_num = start_page
         logger(f"   Starting from page {current_page_num} (calculated offset {current_offset}).")
-    while True:
-        if pause_event and pause_event.is_set():
-            logger("   Post fetching loop paused...")
-            while pause_event.is_set():
-                if cancellation_event and cancellation_event.is_set():
-                    logger("   Post fetching loop cancelled while paused.")
+    end_offset = (end_page - 1) * page_size if end_page and not target_post_id else None
+    page_iter = _iter_post_pages(
+        api_base_url, headers, current_offset, logger, cancellation_event, pause_event,
+        cookies_dict=cookies_for_api, end_offset=end_offset, page_size=page_size,
+        prefetch_window=prefetch_window, requests_per_second=requests_per_second
+    )
+    try:
+        while True:
+            if pause_event and pause_event.is_set():
+                logger("   Post fetching loop paused...")
+                while pause_event.is_set():
+                    if cancellation_event and cancellation_event.is_set():
+                        logger("   Post fetching loop cancelled while paused.")
+                        break
+                    time.sleep(0.5)
+                if not (cancellation_event and cancellation_event.is_set()): logger("   Post fetching loop resumed.")
+            if cancellation_event and cancellation_event.is_set():
+                logger("   Post fetching loop cancelled.")
+                break
+            if target_post_id and processed_target_post_flag:
+                break
+            try:
+                current_offset, posts_batch = next(page_iter)
+                current_page_num = current_offset // page_size + 1
+                if not isinstance(posts_batch, list):
+                    logger(f"❌ API Error: Expected list of posts, got {type(posts_batch)} at page {current_page_num} (offset {current_offset}).")
                     break
-                time.sleep(0.5)
-            if not (cancellation_event and cancellation_event.is_set()): logger("   Post fetching loop resumed.")
-        if cancellation_event and cancellation_event.is_set():
-            logger("   Post fetching loop cancelled.")
-            break
-        if target_post_id and processed_target_post_flag:
-            break
-        if not target_post_id and end_page and current_page_num > end_page:
-            logger(f"✅ Reached specified end page ({end_page}) for creator feed. Stopping.")
-            break
-        try:
-            posts_batch = fetch_posts_paginated(api_base_url, headers, current_offset, logger, cancellation_event, pause_event, cookies_dict=cookies_for_api)
-            if not isinstance(posts_batch, list):
-                logger(f"❌ API Error: Expected list of posts, got {type(posts_batch)} at page {current_page_num} (offset {current_offset}).")
+            except StopIteration:
+                if not target_post_id and end_page:
+                    logger(f"✅ Reached specified end page ({end_page}) for creator feed. Stopping.")
+                break
+            except RuntimeError as e:
+                if "cancelled by user" in str(e).lower():
+                    logger(f"ℹ️ Pagination stopped due to cancellation: {e}")
+                else:
+                    logger(f"❌ {e}\n   Aborting pagination at page {current_page_num} (offset {current_offset}).")
+                break
+            except Exception as e:
+                logger(f"❌ Unexpected error fetching page {current_page_num} (offset {current_offset}): {e}")
+                traceback.print_exc()
+                break
+            reached_known_posts = (
+                incremental_sync and not target_post_id and posts_batch and
+                all(_is_known_post(p, processed_post_ids, high_water_mark) for p in posts_batch)
+            )
+            if processed_post_ids:
+                original_count = len(posts_batch)
+                posts_batch = [post for post in posts_batch if post.get('id') not in processed_post_ids]
+                skipped_count = original_count - len(posts_batch)
+                if skipped_count > 0:
+                    logger(f"   Skipped {skipped_count} already processed post(s) from page {current_page_num}.")
+                if not posts_batch and original_count and not reached_known_posts:
+                    continue
+            
+            if reached_known_posts:
+                if posts_batch:
+                    yield posts_batch
+                logger(f"   🔁 Incremental sync: page {current_page_num} holds only known posts. Stopping fetch.")
+                break
+
+            if not posts_batch:
+                if target_post_id and not processed_target_post_flag:
+                    logger(f"❌ Target post {target_post_id} not found after checking all available pages (API returned no more posts at offset {current_offset}).")
+                elif not target_post_id:
+                    if current_page_num == (start_page or 1):
+                        logger(f"😕 No posts found on the first page checked (page {current_page_num}, offset {current_offset}).")
+                    else:
+                        logger(f"✅ Reached end of posts (no more content from API at offset {current_offset}).")
                 break
-        except RuntimeError as e:
-            if "cancelled by user" in str(e).lower():
-                logger(f"ℹ️ Pagination stopped due to cancellation: {e}")
-            else:
-                logger(f"❌ {e}\n   Aborting pagination at page {current_page_num} (offset {current_offset}).")
-            break
-        except Exception as e:
-            logger(f"❌ Unexpected error fetching page {current_page_num} (offset {current_offset}): {e}")
-            traceback.print_exc()
-            break
-        if processed_post_ids:
-            original_count = len(posts_batch)
-            posts_batch = [post for post in posts_batch if post.get('id') not in processed_post_ids]
-            skipped_count = original_count - len(posts_batch)
-            if skipped_count > 0:
-                logger(f"   Skipped {skipped_count} already processed post(s) from page {current_page_num}.")
-        
-        if not posts_batch:
             if target_post_id and not processed_target_post_flag:
-                logger(f"❌ Target post {target_post_id} not found after checking all available pages (API returned no more posts at offset {current_offset}).")
+                matching_post = next((p for p in posts_batch if str(p.get('id')) == str(target_post_id)), None)
+                if matching_post:
+                    logger(f"🎯 Found target post {target_post_id} on page {current_page_num} (offset {current_offset}).")
+                    yield [matching_post]
+                    processed_target_post_flag = True
             elif not target_post_id:
-                if current_page_num == (start_page or 1):
-                    logger(f"😕 No posts found on the first page checked (page {current_page_num}, offset {current_offset}).")
-                else:
-                    logger(f"✅ Reached end of posts (no more content from API at offset {current_offset}).")
-            break
-        if target_post_id and not processed_target_post_flag:
-            matching_post = next((p for p in posts_batch if str(p.get('id')) == str(target_post_id)), None)
-            if matching_post:
-                logger(f"🎯 Found target post {target_post_id} on page {current_page_num} (offset {current_offset}).")
-                yield [matching_post]
-                processed_target_post_flag = True
-        elif not target_post_id:
-            yield posts_batch
-        if processed_target_post_flag:
-            break
-        current_offset += page_size
-        current_page_num += 1
-        time.sleep(0.6)
+                yield posts_batch
+            if processed_target_post_flag:
+                break
+    finally:
+        page_iter.close()
     if target_post_id and not processed_target_post_flag and not (cancellation_event and cancellation_event.is_set()):
         logger(f"❌ Target post {target_post_id} could not be found after checking all relevant pages (final check after loop).")
 
@@ -0,0 +1,371 @@
+# --- Standard Library Imports ---
+import os
+import re
+import math
+import hashlib
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# --- Local Application Imports ---
+from ..config.constants import CATALOG_DB_FILENAME, CATALOG_BLOOM_MIN_CAPACITY, CATALOG_BLOOM_FALSE_POSITIVE_RATE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    service      TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    post_id      TEXT NOT NULL,
+    title        TEXT,
+    published    TEXT,
+    processed_at REAL NOT NULL,
+    PRIMARY KEY (service, user_id, post_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS files (
+    path          TEXT PRIMARY KEY,
+    service       TEXT,
+    user_id       TEXT,
+    post_id       TEXT,
+    url           TEXT,
+    original_name TEXT,
+    size          INTEGER,
+    content_hash  TEXT,
+    downloaded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_post ON files (service, user_id, post_id);
+CREATE INDEX IF NOT EXISTS idx_files_hash ON files (content_hash);
+CREATE INDEX IF NOT EXISTS idx_files_url ON files (url);
+
+CREATE TABLE IF NOT EXISTS hashes (
+    content_hash TEXT PRIMARY KEY,
+    count        INTEGER NOT NULL,
+    first_path   TEXT,
+    size         INTEGER
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS failures (
+    url        TEXT PRIMARY KEY,
+    service    TEXT,
+    user_id    TEXT,
+    post_id    TEXT,
+    post_title TEXT,
+    filename   TEXT,
+    permanent  INTEGER NOT NULL DEFAULT 0,
+    attempts   INTEGER NOT NULL DEFAULT 1,
+    failed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_failures_post ON failures (service, user_id, post_id);
+"""
+
+# Server file paths look like /data/ab/cd/abcd<rest of the content hash>.ext. Only the
+# /data/ layout carries the hash of the bytes served; e.g. /thumbnail/data/... does not.
+_PATH_HASH_PATTERN = re.compile(r"^/data/([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{28,})\.[^/]*$", re.IGNORECASE)
+
+
+def path_hash_from_url(url):
+    """Returns the lower-case content hash embedded in a server file URL, or None."""
+    if not url:
+        return None
+    match = _PATH_HASH_PATTERN.match(urlparse(url).path)
+    return match.group(3).lower() if match else None
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test with no false negatives, used to answer
+    most "never seen this hash" questions without touching SQLite.
+    """
+    def __init__(self, capacity, false_positive_rate=CATALOG_BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(1, capacity)
+        self.bit_count = max(64, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SessionPathHashRegistry:
+    """
+    Files saved during the current download session, keyed by their server
+    path hash. Workers record a file here the moment it is saved, before
+    the catalog hears about it through the UI, so a repeated attachment
+    later in the same session is skipped without a request.
+    """
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def record(self, path_hash, path, size=None, content_hash=None):
+        if not path_hash:
+            return
+        with self._lock:
+            self._records[path_hash] = {'path': path, 'size': size, 'content_hash': content_hash}
+
+    def get(self, path_hash):
+        """Returns the {'path', 'size', 'content_hash'} saved for `path_hash` this session, or None."""
+        if not path_hash:
+            return None
+        with self._lock:
+            return self._records.get(path_hash)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+class DownloadCatalog:
+    """
+    An indexed SQLite (WAL) store for processed posts, downloaded files,
+    content hashes and failed downloads.
+
+    Every thread gets its own connection; WAL mode lets readers run while a
+    writer commits. Each write is a single small upsert in its own
+    transaction, so nothing has to load or rewrite a whole JSON document.
+
+    Files are also indexed by the content hash their server path embeds,
+    so a download can be recognised as known before any request is made.
+    Lookups by that hash go through a bloom filter that is loaded from the
+    database the first time it is needed.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._path_hash_filter = None
+        self._path_hash_filter_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+
+    @staticmethod
+    def _migrate(conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+        if 'path_hash' not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN path_hash TEXT")
+            rows = conn.execute("SELECT path, url FROM files WHERE url IS NOT NULL").fetchall()
+            conn.executemany("UPDATE files SET path_hash = ? WHERE path = ?",
+                             [(path_hash_from_url(url), path) for path, url in rows if path_hash_from_url(url)])
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_files_path_hash ON files (path_hash)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Closes every connection opened by this catalog."""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    # --- Posts ---
+
+    def mark_post_processed(self, service, user_id, post_id, title=None, published=None):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO posts (service, user_id, post_id, title, published, processed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (service, user_id, post_id) DO UPDATE SET processed_at = excluded.processed_at",
+                (str(service).lower(), str(user_id), str(post_id), title, published, time.time())
+            )
+
+    def import_processed_post_ids(self, service, user_id, post_ids):
+        """Bulk-adds post IDs (e.g. from a legacy creator profile) without touching existing rows."""
+        now = time.time()
+        rows = [(str(service).lower(), str(user_id), str(post_id), now) for post_id in post_ids]
+        if not rows:
+            return
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts (service, user_id, post_id, processed_at) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def is_post_processed(self, service, user_id, post_id):
+        row = self._connection().execute(
+            "SELECT 1 FROM posts WHERE service = ? AND user_id = ? AND post_id = ?",
+            (str(service).lower(), str(user_id), str(post_id))
+        ).fetchone()
+        return row is not None
+
+    def get_processed_post_ids(self, service, user_id):
+        rows = self._connection().execute(
+            "SELECT post_id FROM posts WHERE service = ? AND user_id = ?",
+            (str(service).lower(), str(user_id))
+        )
+        return {row[0] for row in rows}
+
+    def forget_creator_posts(self, service, user_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM posts WHERE service = ? AND user_id = ?", (str(service).lower(), str(user_id)))
+
+    # --- Files and content hashes ---
+
+    def record_file(self, path, service=None, user_id=None, post_id=None, url=None,
+                    original_name=None, size=None, content_hash=None):
+        """
+        Records a saved file. The reference count of its content hash only
+        goes up when the path is new or now holds different content, so
+        re-saving a file to the same path does not inflate it.
+        """
+        now = time.time()
+        path_hash = path_hash_from_url(url)
+        with self._connection() as conn:
+            previous = conn.execute("SELECT content_hash FROM files WHERE path = ?", (path,)).fetchone()
+            previous_hash = previous[0] if previous else None
+            conn.execute(
+                "INSERT INTO files (path, service, user_id, post_id, url, original_name, size, content_hash, downloaded_at, path_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET url = excluded.url, size = excluded.size, "
+                "content_hash = excluded.content_hash, downloaded_at = excluded.downloaded_at, path_hash = excluded.path_hash",
+                (path, str(service).lower() if service else None, str(user_id) if user_id else None,
+                 str(post_id) if post_id else None, url, original_name, size, content_hash, now, path_hash)
+            )
+            if previous_hash and previous_hash != content_hash:
+                conn.execute("UPDATE hashes SET count = count - 1 WHERE content_hash = ?", (previous_hash,))
+                conn.execute("DELETE FROM hashes WHERE content_hash = ? AND count <= 0", (previous_hash,))
+            if content_hash and content_hash != previous_hash:
+                conn.execute(
+                    "INSERT INTO hashes (content_hash, count, first_path, size) VALUES (?, 1, ?, ?) "
+                    "ON CONFLICT (content_hash) DO UPDATE SET count = count + 1",
+                    (content_hash, path, size)
+                )
+            if url:
+                conn.execute("DELETE FROM failures WHERE url = ?", (url,))
+        if path_hash:
+            with self._path_hash_filter_lock:
+                if self._path_hash_filter is not None:
+                    self._path_hash_filter.add(path_hash)
+
+    def get_hash_count(self, content_hash):
+        row = self._connection().execute(
+            "SELECT count FROM hashes WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def find_file_by_hash(self, content_hash):
+        row = self._connection().execute(
+            "SELECT first_path FROM hashes WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_file_record(self, path):
+        """Returns {'size', 'content_hash'} recorded for a saved file, or None."""
+        row = self._connection().execute(
+            "SELECT size, content_hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return {'size': row[0], 'content_hash': row[1]} if row else None
+
+    def _get_path_hash_filter(self):
+        with self._path_hash_filter_lock:
+            if self._path_hash_filter is None:
+                conn = self._connection()
+                (count,) = conn.execute("SELECT COUNT(*) FROM files WHERE path_hash IS NOT NULL").fetchone()
+                bloom = BloomFilter(max(CATALOG_BLOOM_MIN_CAPACITY, count * 2))
+                for (path_hash,) in conn.execute("SELECT path_hash FROM files WHERE path_hash IS NOT NULL"):
+                    bloom.add(path_hash)
+                self._path_hash_filter = bloom
+            return self._path_hash_filter
+
+    def find_files_by_path_hash(self, path_hash):
+        """
+        Returns the saved files ({'path', 'size', 'content_hash'}, newest
+        first) whose server path carried `path_hash`. Unknown hashes are
+        usually answered by the bloom filter alone.
+        """
+        if not path_hash or not self._get_path_hash_filter().might_contain(path_hash):
+            return []
+        rows = self._connection().execute(
+            "SELECT path, size, content_hash FROM files WHERE path_hash = ? ORDER BY downloaded_at DESC", (path_hash,)
+        )
+        return [{'path': path, 'size': size, 'content_hash': content_hash} for path, size, content_hash in rows]
+
+    # --- Failures ---
+
+    def record_failures(self, failure_details_list, permanent=False, service=None, user_id=None):
+        """Upserts the failure dicts produced by PostProcessorWorker, keyed by file URL."""
+        now = time.time()
+        rows = []
+        for details in failure_details_list or []:
+            file_info = details.get('file_info') or {}
+            url = file_info.get('url')
+            if not url:
+                continue
+            rows.append((
+                url,
+                str(details.get('service') or service or '').lower() or None,
+                str(details.get('user_id') or user_id or '') or None,
+                str(details.get('original_post_id_for_log') or '') or None,
+                details.get('post_title'),
+                details.get('forced_filename_override') or file_info.get('name'),
+                1 if permanent else 0,
+                now
+            ))
+        if not rows:
+            return
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO failures (url, service, user_id, post_id, post_title, filename, permanent, failed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET attempts = attempts + 1, permanent = excluded.permanent, "
+                "failed_at = excluded.failed_at",
+                rows
+            )
+
+    def get_failures(self, permanent=None):
+        query = "SELECT url, service, user_id, post_id, post_title, filename, permanent, attempts, failed_at FROM failures"
+        params = ()
+        if permanent is not None:
+            query += " WHERE permanent = ?"
+            params = (1 if permanent else 0,)
+        columns = ('url', 'service', 'user_id', 'post_id', 'post_title', 'filename', 'permanent', 'attempts', 'failed_at')
+        return [dict(zip(columns, row)) for row in self._connection().execute(query + " ORDER BY failed_at", params)]
+
+
+_catalogs_lock = threading.Lock()
+_catalogs = {}
+
+
+def get_catalog(appdata_dir):
+    """Returns the shared catalog stored in the given appdata directory, opening it on first use."""
+    db_path = os.path.abspath(os.path.join(appdata_dir, CATALOG_DB_FILENAME))
+    with _catalogs_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None:
+            os.makedirs(appdata_dir, exist_ok=True)
+            catalog = DownloadCatalog(db_path)
+            _catalogs[db_path] = catalog
+    return catalog
+
+
+_session_path_hashes = SessionPathHashRegistry()
+
+
+def get_session_path_hashes():
+    """Returns the process-wide registry of files saved this session."""
+    return _session_path_hashes
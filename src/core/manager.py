@@ -4,13 +4,22 @@ import os
 import json
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-from .api_client import download_from_api
+from .api_client import download_from_api, update_high_water_mark
 from .workers import PostProcessorWorker
+from .catalog import get_catalog, get_session_path_hashes
 from ..config.constants import (
     STYLE_DATE_BASED, STYLE_POST_TITLE_GLOBAL_NUMBERING,
-    MAX_THREADS
+    MAX_THREADS, PAGE_PREFETCH_WINDOW, PAGE_PREFETCH_REQUESTS_PER_SECOND,
+    PROFILE_FLUSH_EVERY_POSTS, PROFILE_FLUSH_INTERVAL_SECONDS, OLDEST_FIRST_MERGE,
+    DOWNLOAD_MAX_CONNECTIONS_DEFAULT, DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT
 )
 from ..utils.file_utils import clean_folder_name
+from ..utils.network_utils import extract_post_info
+from ..utils.http_session import configure_session_pools
+from ..utils.download_scheduler import configure_download_scheduler
+from ..utils.head_cache import get_head_cache
+from ..utils.cdn_nodes import get_cdn_nodes
+from ..utils.folder_index import reset_folder_indexes
 
 
 class DownloadManager:
@@ -39,11 +48,21 @@ class DownloadManager:
         self.processed_posts = 0
         self.total_downloads = 0
         self.total_skips = 0
+        self.run_had_failures = False
         self.all_kept_original_filenames = []
         self.creator_profiles_dir = None
         self.current_creator_name_for_profile = None
         self.current_creator_profile_path = None
         self.session_file_path = None
+        self.catalog = None
+
+        # In-memory creator profile, written back in batches (see _note_post_processed).
+        self.creator_profile_data = None
+        self._profile_processed_ids = set()
+        self._profile_lock = threading.Lock()
+        self._results_lock = threading.Lock()
+        self._unsaved_profile_posts = 0
+        self._profile_flush_timer = None
 
     def _log(self, message):
         """Puts a progress message into the queue for the UI."""
@@ -63,6 +82,7 @@ class DownloadManager:
             return
 
         self.session_file_path = config.get('session_file_path')
+        self.catalog = get_catalog(os.path.dirname(self.session_file_path or os.path.join('.', 'session.json')))
         creator_profile_data = self._setup_creator_profile(config)
         
         # Save settings to profile at the start of the session
@@ -71,6 +91,10 @@ class DownloadManager:
             creator_profile_data.setdefault('processed_post_ids', [])
             self._save_creator_profile(creator_profile_data)
             self._log(f"✅ Loaded/created profile for '{self.current_creator_name_for_profile}'. Settings saved.")
+        with self._profile_lock:
+            self.creator_profile_data = creator_profile_data if self.current_creator_profile_path else None
+            self._profile_processed_ids = set(creator_profile_data.get('processed_post_ids', []))
+            self._unsaved_profile_posts = 0
 
         self.is_running = True
         self.cancellation_event.clear()
@@ -80,6 +104,7 @@ class DownloadManager:
         self.processed_posts = 0
         self.total_downloads = 0
         self.total_skips = 0
+        self.run_had_failures = False
         self.all_kept_original_filenames = []
         
         is_single_post = bool(config.get('target_post_id_from_initial_url'))
@@ -113,10 +138,21 @@ class DownloadManager:
         try:
             num_workers = min(config.get('num_threads', 4), MAX_THREADS)
             self.thread_pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='PostWorker_')
+            configure_session_pools(num_workers, 1, config.get('multipart_parts_count', 1) if config.get('allow_multipart_download') else 1)
+            configure_download_scheduler(config.get('max_connections', DOWNLOAD_MAX_CONNECTIONS_DEFAULT),
+                                         config.get('bandwidth_limit', DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT))
+            get_head_cache().clear()
+            get_cdn_nodes().reset()
+            reset_folder_indexes()
+            get_session_path_hashes().clear()
 
             session_processed_ids = set(restore_data.get('processed_post_ids', [])) if restore_data else set()
             profile_processed_ids = set(creator_profile_data.get('processed_post_ids', []))
             processed_ids = session_processed_ids.union(profile_processed_ids)
+            service, user_id, _ = extract_post_info(config.get('api_url', ''))
+            if service and user_id:
+                self.catalog.import_processed_post_ids(service, user_id, profile_processed_ids)
+                processed_ids |= self.catalog.get_processed_post_ids(service, user_id)
 
             if restore_data and 'all_posts_data' in restore_data:
                 # This logic for session restore remains as it relies on a pre-fetched list
@@ -152,11 +188,17 @@ class DownloadManager:
                     selected_cookie_file=config.get('selected_cookie_file'),
                     app_base_dir=config.get('app_base_dir'),
                     manga_filename_style_for_sort_check=config.get('manga_filename_style'),
-                    processed_post_ids=list(processed_ids)
+                    processed_post_ids=list(processed_ids),
+                    prefetch_window=config.get('page_prefetch_window', PAGE_PREFETCH_WINDOW),
+                    requests_per_second=config.get('page_requests_per_second', PAGE_PREFETCH_REQUESTS_PER_SECOND),
+                    incremental_sync=config.get('incremental_sync', False),
+                    high_water_mark=creator_profile_data.get('high_water_mark'),
+                    oldest_first_strategy=config.get('oldest_first_strategy', OLDEST_FIRST_MERGE)
                 )
 
                 self.total_posts = 0
                 self.processed_posts = 0
+                newest_seen = None
 
                 # Process posts in batches as they are yielded by the API client
                 for batch in post_generator:
@@ -164,6 +206,8 @@ class DownloadManager:
                         self._log("   Post fetching cancelled.")
                         break
                     
+                    newest_seen = update_high_water_mark(newest_seen, batch)
+
                     # Filter out any posts that might have been processed since the start
                     posts_in_batch_to_process = [p for p in batch if p.get('id') not in processed_ids]
                     
@@ -184,12 +228,25 @@ class DownloadManager:
                 if self.total_posts == 0 and not self.cancellation_event.is_set():
                      self._log("✅ No new posts found to process.")
 
+                if newest_seen and not self.cancellation_event.is_set():
+                    # Only advance the mark once every queued post has finished without
+                    # failures, so incremental sync never hides posts it has to fetch again.
+                    self.thread_pool.shutdown(wait=True)
+                    if self.run_had_failures:
+                        self._log("   ℹ️ Some files failed; the incremental sync mark was not advanced.")
+                    elif config.get('start_page') or config.get('end_page'):
+                        # Pages outside the range were never downloaded; the mark would hide them.
+                        self._log("   ℹ️ Page range was limited; the incremental sync mark was not advanced.")
+                    elif not self.cancellation_event.is_set():
+                        self._record_high_water_mark(newest_seen)
+
         except Exception as e:
             self._log(f"❌ CRITICAL ERROR in post fetcher thread: {e}")
             self._log(traceback.format_exc())
         finally:
             if self.thread_pool:
                 self.thread_pool.shutdown(wait=True)
+            self._flush_creator_profile(durable=True)
             self.is_running = False
             self._log("🏁 All processing tasks have completed or been cancelled.") 
             self.progress_queue.put({
@@ -202,12 +259,13 @@ class DownloadManager:
         if self.cancellation_event.is_set():
             return
             
-        with threading.Lock(): # Protect shared counters
+        with self._results_lock: # Protect shared counters
             self.processed_posts += 1
             try:
                 if future.cancelled():
                     self._log("⚠️ A post processing task was cancelled.")
                     self.total_skips += 1
+                    self.run_had_failures = True
                 else:
                     result = future.result()
                     (dl_count, skip_count, kept_originals, 
@@ -215,6 +273,8 @@ class DownloadManager:
                     self.total_downloads += dl_count
                     self.total_skips += skip_count
                     self.all_kept_original_filenames.extend(kept_originals)
+                    if retryable or permanent:
+                        self.run_had_failures = True
                     if retryable:
                         self.progress_queue.put({'type': 'retryable_failure', 'payload': (retryable,)})
                     if permanent:
@@ -222,15 +282,17 @@ class DownloadManager:
                     if history:
                         self.progress_queue.put({'type': 'post_processed_history', 'payload': (history,)})
                         post_id = history.get('post_id')
-                        if post_id and self.current_creator_profile_path:
-                            profile_data = self._setup_creator_profile({'creator_name_for_profile': self.current_creator_name_for_profile, 'session_file_path': self.session_file_path})
-                            if post_id not in profile_data.get('processed_post_ids', []):
-                                profile_data.setdefault('processed_post_ids', []).append(post_id)
-                                self._save_creator_profile(profile_data)
+                        if post_id and history.get('service') and history.get('user_id'):
+                            self.catalog.mark_post_processed(history['service'], history['user_id'], post_id,
+                                                             title=history.get('post_title'),
+                                                             published=history.get('upload_date_str'))
+                        if post_id:
+                            self._note_post_processed(post_id)
 
             except Exception as e:
                 self._log(f"❌ Worker task resulted in an exception: {e}")
                 self.total_skips += 1 # Count errored posts as skipped
+                self.run_had_failures = True
             self.progress_queue.put({'type': 'overall_progress', 'payload': (self.total_posts, self.processed_posts)})
 
     def _setup_creator_profile(self, config):
@@ -255,7 +317,7 @@ class DownloadManager:
                 self._log(f"❌ Error loading creator profile '{safe_filename}': {e}. Starting fresh.")
         return {}
 
-    def _save_creator_profile(self, data):
+    def _save_creator_profile(self, data, durable=False):
         """Saves the provided data to the current creator's profile file."""
         if not self.current_creator_profile_path:
             return
@@ -263,10 +325,55 @@ class DownloadManager:
             temp_path = self.current_creator_profile_path + ".tmp"
             with open(temp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
             os.replace(temp_path, self.current_creator_profile_path)
         except OSError as e:
             self._log(f"❌ Error saving creator profile to '{self.current_creator_profile_path}': {e}")
 
+    def _record_high_water_mark(self, newest_seen):
+        """Stores the newest post seen by a completed run in the creator profile."""
+        with self._profile_lock:
+            if self.creator_profile_data is None:
+                return
+            self.creator_profile_data['high_water_mark'] = update_high_water_mark(
+                self.creator_profile_data.get('high_water_mark'), [newest_seen]
+            )
+            self._unsaved_profile_posts += 1
+        self._flush_creator_profile()
+
+    def _note_post_processed(self, post_id):
+        """
+        Adds a processed post to the in-memory profile. The profile file is
+        rewritten every PROFILE_FLUSH_EVERY_POSTS posts, or by a timer so the
+        last few posts of a slow run are not left unsaved for long.
+        """
+        with self._profile_lock:
+            if self.creator_profile_data is None or post_id in self._profile_processed_ids:
+                return
+            self._profile_processed_ids.add(post_id)
+            self.creator_profile_data.setdefault('processed_post_ids', []).append(post_id)
+            self._unsaved_profile_posts += 1
+            flush_now = self._unsaved_profile_posts >= PROFILE_FLUSH_EVERY_POSTS
+            if not flush_now and self._profile_flush_timer is None:
+                self._profile_flush_timer = threading.Timer(PROFILE_FLUSH_INTERVAL_SECONDS, self._flush_creator_profile)
+                self._profile_flush_timer.daemon = True
+                self._profile_flush_timer.start()
+        if flush_now:
+            self._flush_creator_profile()
+
+    def _flush_creator_profile(self, durable=False):
+        """Writes the in-memory profile if it has unsaved changes; fsyncs it when durable is set."""
+        with self._profile_lock:
+            if self._profile_flush_timer is not None:
+                self._profile_flush_timer.cancel()
+                self._profile_flush_timer = None
+            if self.creator_profile_data is None or (not self._unsaved_profile_posts and not durable):
+                return
+            self._save_creator_profile(self.creator_profile_data, durable=durable)
+            self._unsaved_profile_posts = 0
+
     def cancel_session(self):
         """Cancels the current running session."""
         if not self.is_running:
@@ -278,6 +385,7 @@ class DownloadManager:
 
         self._log("⚠️ Cancellation requested by user...")
         self.cancellation_event.set()
+        self._flush_creator_profile(durable=True)
 
         if self.thread_pool:
             self._log("   Signaling all worker threads to stop and shutting down pool...")
@@ -0,0 +1,169 @@
+# --- Standard Library Imports ---
+import heapq
+import json
+import tempfile
+import threading
+
+# --- Local Application Imports ---
+from ..config.constants import MANGA_SORT_RUN_SIZE
+
+# Posts without any date sort before everything else, as the old in-memory sort did.
+EARLIEST_SORT_DATE = "0000-00-00T00:00:00"
+
+
+class PostSummary:
+    """
+    The few fields needed to order and de-duplicate a post, plus where its
+    full JSON lives in a PostSpillStore.
+    """
+    __slots__ = ('published', 'post_id', 'offset', 'length')
+
+    def __init__(self, published, post_id, offset, length):
+        self.published = published
+        self.post_id = post_id
+        self.offset = offset
+        self.length = length
+
+
+def post_sort_values(post):
+    """
+    Returns (published, numeric_id, date_fallback, id_invalid) for a post dict.
+
+    `published` falls back to 'added', then to EARLIEST_SORT_DATE; the two flags
+    tell the caller which fallbacks were needed so it can report them.
+    """
+    published = post.get('published')
+    date_fallback = None
+    if not published:
+        added = post.get('added')
+        if added:
+            published, date_fallback = added, 'added'
+        else:
+            published, date_fallback = EARLIEST_SORT_DATE, 'none'
+    try:
+        numeric_id, id_invalid = int(post.get('id', "0")), False
+    except (TypeError, ValueError):
+        numeric_id, id_invalid = 0, True
+    return published, numeric_id, date_fallback, id_invalid
+
+
+class PostSpillStore:
+    """
+    Keeps full post dicts in an anonymous temporary file so that only small
+    PostSummary objects stay in memory while a whole feed is collected.
+
+    The file is removed automatically when the store is closed.
+    """
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(prefix="posts_", suffix=".jsonl", dir=directory)
+        self._lock = threading.Lock()
+        self._end = 0
+        self.count = 0
+
+    def add(self, post):
+        """Writes a post to the spill file and returns its summary."""
+        published, numeric_id, _, _ = post_sort_values(post)
+        data = json.dumps(post, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n"
+        with self._lock:
+            offset = self._end
+            self._file.seek(offset)
+            self._file.write(data)
+            self._end += len(data)
+            self.count += 1
+        return PostSummary(published, numeric_id, offset, len(data))
+
+    def load(self, summary):
+        """Reads the full post dict for a summary back from disk."""
+        with self._lock:
+            self._file.seek(summary.offset)
+            data = self._file.read(summary.length)
+        return json.loads(data)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _post_sort_key(post):
+    published, numeric_id, _, _ = post_sort_values(post)
+    return (published, numeric_id)
+
+
+class ExternalPostSorter:
+    """
+    Sorts an unbounded stream of posts oldest-first with bounded memory.
+
+    Posts are buffered up to `run_size`, then each buffer is sorted and
+    written to its own temporary run file. iter_sorted() streams a k-way
+    merge (heapq.merge) over the runs, so only one post per run is held in
+    memory while the merged order is read back.
+    """
+    def __init__(self, run_size=MANGA_SORT_RUN_SIZE, directory=None):
+        self.run_size = max(1, run_size)
+        self.directory = directory
+        self._buffer = []
+        self._runs = []
+        self.count = 0
+
+    def add(self, post):
+        self._buffer.append(post)
+        self.count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill_run()
+
+    def _spill_run(self):
+        if not self._buffer:
+            return
+        self._buffer.sort(key=_post_sort_key)
+        run_file = tempfile.TemporaryFile(prefix="posts_run_", suffix=".jsonl", dir=self.directory)
+        for post in self._buffer:
+            run_file.write(json.dumps(post, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n")
+        run_file.seek(0)
+        self._runs.append(run_file)
+        self._buffer = []
+
+    @staticmethod
+    def _iter_run(run_file):
+        for line in run_file:
+            yield json.loads(line)
+
+    def iter_sorted(self):
+        """Yields every added post in (published, id) order."""
+        if not self._runs:
+            self._buffer.sort(key=_post_sort_key)
+            yield from self._buffer
+            return
+        self._spill_run()
+        yield from heapq.merge(*(self._iter_run(run_file) for run_file in self._runs), key=_post_sort_key)
+
+    def iter_sorted_batches(self, batch_size):
+        batch = []
+        for post in self.iter_sorted():
+            batch.append(post)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        for run_file in self._runs:
+            try:
+                run_file.close()
+            except OSError:
+                pass
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
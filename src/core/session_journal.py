@@ -0,0 +1,176 @@
+# --- Standard Library Imports ---
+import json
+import os
+import threading
+
+# --- Local Application Imports ---
+from ..config.constants import SESSION_JOURNAL_COMPACT_EVERY
+
+
+def _journal_path_for(session_file_path):
+    return session_file_path + ".journal"
+
+
+def apply_journal_records(session_data, records):
+    """
+    Folds journal records into a session snapshot dict (in place) and returns it.
+
+    Replaying is idempotent: post IDs and failed file URLs already present in
+    the snapshot are not added twice, and manga counters take the last value.
+    """
+    download_state = session_data.setdefault('download_state', {})
+    if not isinstance(download_state.get('processed_post_ids'), list):
+        download_state['processed_post_ids'] = []
+    if not isinstance(download_state.get('permanently_failed_files'), list):
+        download_state['permanently_failed_files'] = []
+    processed_ids = download_state['processed_post_ids']
+    failed_files = download_state['permanently_failed_files']
+    seen_ids = set(processed_ids)
+    seen_failed_urls = {f.get('file_info', {}).get('url') for f in failed_files}
+
+    for record in records:
+        kind = record.get('type')
+        if kind == 'post':
+            post_id = record.get('post_id')
+            if post_id not in seen_ids:
+                seen_ids.add(post_id)
+                processed_ids.append(post_id)
+            if record.get('manga_counters'):
+                download_state.setdefault('manga_counters', {}).update(record['manga_counters'])
+        elif kind == 'failure':
+            failure = record.get('details') or {}
+            url = failure.get('file_info', {}).get('url')
+            if url not in seen_failed_urls:
+                seen_failed_urls.add(url)
+                failed_files.append(failure)
+    return session_data
+
+
+def read_journal_records(journal_path):
+    """Reads every complete record from a journal file, skipping a torn last line."""
+    records = []
+    if not os.path.exists(journal_path):
+        return records
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash mid-append leaves at most one partial line at the end.
+                continue
+    return records
+
+
+def load_session_with_journal(session_file_path):
+    """Loads the session snapshot and replays its journal on top of it."""
+    with open(session_file_path, 'r', encoding='utf-8') as f:
+        session_data = json.load(f)
+    return apply_journal_records(session_data, read_journal_records(_journal_path_for(session_file_path)))
+
+
+class SessionJournal:
+    """
+    Append-only progress log that sits next to session.json.
+
+    Post workers append one JSON line per finished post and per failed file
+    while holding the lock only for the write itself. Every
+    SESSION_JOURNAL_COMPACT_EVERY records the journal is folded into the
+    snapshot and truncated, so a restore replays at most that many lines.
+    """
+    def __init__(self, session_file_path):
+        self.session_file_path = session_file_path
+        self.journal_path = _journal_path_for(session_file_path)
+        self._lock = threading.Lock()
+        self._handle = None
+        self._records_since_compaction = 0
+
+    def _open(self):
+        if self._handle is None:
+            ends_mid_line = False
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    ends_mid_line = f.read(1) != b"\n"
+            self._handle = open(self.journal_path, 'a', encoding='utf-8')
+            if ends_mid_line:
+                # Keep a line torn by a crash from swallowing the next record.
+                self._handle.write("\n")
+        return self._handle
+
+    def _close_handle(self):
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            finally:
+                self._handle = None
+
+    def record_post(self, post_id, manga_counters=None, permanent_failures=None):
+        """Appends the outcome of one post. Does nothing if no session snapshot exists."""
+        lines = [json.dumps({'type': 'post', 'post_id': post_id, 'manga_counters': manga_counters or None})]
+        for failure in permanent_failures or []:
+            lines.append(json.dumps({'type': 'failure', 'details': failure}))
+        payload = "\n".join(lines) + "\n"
+        with self._lock:
+            if not os.path.exists(self.session_file_path):
+                return
+            handle = self._open()
+            handle.write(payload)
+            handle.flush()
+            self._records_since_compaction += len(lines)
+            if self._records_since_compaction >= SESSION_JOURNAL_COMPACT_EVERY:
+                self._compact_locked()
+
+    def _write_snapshot_locked(self, session_data):
+        temp_path = self.session_file_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(session_data, f)
+        os.replace(temp_path, self.session_file_path)
+        self._close_handle()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._records_since_compaction = 0
+
+    def _compact_locked(self):
+        self._close_handle()
+        session_data = load_session_with_journal(self.session_file_path)
+        self._write_snapshot_locked(session_data)
+
+    def compact(self):
+        """Folds the journal into session.json and truncates it."""
+        with self._lock:
+            if os.path.exists(self.session_file_path):
+                self._compact_locked()
+
+    def write_snapshot(self, session_data):
+        """
+        Replaces session.json with a snapshot that already includes every journal
+        record (e.g. one built by load_session_with_journal), then drops the journal.
+        """
+        with self._lock:
+            self._write_snapshot_locked(session_data)
+
+    def discard(self):
+        """Removes the journal file; used when the session itself is cleared."""
+        with self._lock:
+            self._close_handle()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._records_since_compaction = 0
+
+
+_journals_lock = threading.Lock()
+_journals = {}
+
+
+def get_session_journal(session_file_path):
+    """Returns the shared journal for a session file."""
+    key = os.path.abspath(session_file_path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = SessionJournal(session_file_path)
+            _journals[key] = journal
+    return journal
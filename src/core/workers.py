@@ -12,7 +12,6 @@ import json
 from collections import deque, defaultdict
 import hashlib
 from concurrent.futures import ThreadPoolExecutor, as_completed, CancelledError, Future
-from io import BytesIO
 from urllib .parse import urlparse 
 import requests
 import cloudscraper 
@@ -41,34 +40,30 @@ except ImportError:
 from PyQt5 .QtCore import Qt ,QThread ,pyqtSignal ,QMutex ,QMutexLocker ,QObject ,QTimer ,QSettings ,QStandardPaths ,QCoreApplication ,QUrl ,QSize ,QProcess 
 from .api_client import download_from_api, fetch_post_comments, fetch_single_post_data
 from ..services.multipart_downloader import download_file_in_parts, MULTIPART_DOWNLOADER_AVAILABLE
+from ..services.partial_download import PartialDownload, claim_part_path, release_part_path
+from ..services.image_compressor import get_image_compression_pool
 from ..services.drive_downloader import (
     download_mega_file, download_gdrive_file, download_dropbox_file
 )
 from ..utils.file_utils import (
     is_image, is_video, is_zip, is_rar, is_archive, is_audio, KNOWN_NAMES,
-    clean_filename, clean_folder_name
+    clean_filename, clean_folder_name, hash_file, hash_file_content, robust_clean_name, get_filename_transformer
 )
 from ..utils.network_utils import prepare_cookies_for_request, get_link_platform
+from ..utils.http_session import get_session
+from ..utils.download_scheduler import get_download_scheduler
+from ..utils.head_cache import get_head_cache
+from ..utils.cdn_nodes import get_cdn_nodes
+from ..utils.folder_index import get_folder_index
+from .session_journal import get_session_journal
+from .catalog import get_catalog, get_session_path_hashes, path_hash_from_url
 from ..utils.text_utils import (
-    is_title_match_for_character, is_filename_match_for_character, strip_html_tags,
+    strip_html_tags,
     extract_folder_name_from_title, # This was the function causing the error
-    match_folders_from_title, match_folders_from_filename_enhanced
+    match_folders_from_title, match_folders_from_filename_enhanced, get_character_filter_matcher
 )
 from ..config.constants import *
 
-def robust_clean_name(name):
-    """A more robust function to remove illegal characters for filenames and folders."""
-    if not name:
-        return ""
-    illegal_chars_pattern = r'[\x00-\x1f<>:"/\\|?*\']'
-    cleaned_name = re.sub(illegal_chars_pattern, '', name)
-
-    cleaned_name = cleaned_name.strip(' .')
-
-    if not cleaned_name:
-        return "untitled_folder"
-    return cleaned_name
-
 class PostProcessorSignals (QObject ):
     progress_signal =pyqtSignal (str )
     file_download_status_signal =pyqtSignal (bool )
@@ -122,6 +117,7 @@ class PostProcessorWorker:
                  multipart_scope='both', 
                  multipart_parts_count=4, 
                  multipart_min_size_mb=100,
+                 multipart_min_segment_mb=MULTIPART_MIN_SEGMENT_MB,
                  skip_file_size_mb=None 
                  ):
         self.post = post_data
@@ -160,6 +156,7 @@ class PostProcessorWorker:
         self.manga_filename_style = manga_filename_style
         self.char_filter_scope = char_filter_scope
         self.remove_from_filename_words_list = remove_from_filename_words_list if remove_from_filename_words_list is not None else []
+        self.filename_transformer = get_filename_transformer(self.remove_from_filename_words_list)
         self.allow_multipart_download = allow_multipart_download
         self.manga_date_file_counter_ref = manga_date_file_counter_ref
         self.selected_cookie_file = selected_cookie_file
@@ -179,6 +176,8 @@ class PostProcessorWorker:
         self.downloaded_hash_counts_lock = downloaded_hash_counts_lock if downloaded_hash_counts_lock is not None else threading.Lock()
         self.session_file_path = session_file_path
         self.session_lock = session_lock
+        # The catalog lives next to session.json; it remembers files saved in earlier sessions.
+        self.catalog = get_catalog(os.path.dirname(session_file_path)) if session_file_path else None
         self.text_only_scope = text_only_scope
         self.text_export_format = text_export_format
         self.single_pdf_mode = single_pdf_mode
@@ -187,6 +186,7 @@ class PostProcessorWorker:
         self.multipart_scope = multipart_scope 
         self.multipart_parts_count = multipart_parts_count 
         self.multipart_min_size_mb = multipart_min_size_mb 
+        self.multipart_min_segment_mb = multipart_min_segment_mb
         self.skip_file_size_mb = skip_file_size_mb
         if self.compress_images and Image is None:
             self.logger("⚠️ Image compression disabled: Pillow library not found.")
@@ -222,33 +222,46 @@ class PostProcessorWorker:
             return self .dynamic_filter_holder .get_filters ()
         return self .filter_character_list_objects_initial 
 
-    def _find_valid_subdomain(self, url: str, max_subdomains: int = 4) -> str:
+    def _find_known_copy(self, path_hash):
+        """
+        Looks up a file saved in this or an earlier session whose server path
+        carried `path_hash`: first in this session's registry, then in the
+        catalog. Returns its record if the file is still on disk, otherwise None.
+        """
+        if not path_hash:
+            return None
+        session_record = get_session_path_hashes().get(path_hash)
+        if session_record and os.path.exists(session_record['path']):
+            return session_record
+        if self.catalog is None:
+            return None
+        try:
+            records = self.catalog.find_files_by_path_hash(path_hash)
+        except Exception as e:
+            self.logger(f"   ⚠️ Could not look up '{path_hash[:12]}…' in the catalog: {e}")
+            return None
+        for record in records:
+            if os.path.exists(record['path']):
+                return record
+        return None
+
+    def _find_valid_subdomain(self, url: str) -> str:
         """
         Attempts to find a working subdomain for a Kemono/Coomer URL that returned a 403 error.
         Returns the original URL if no other valid subdomain is found.
+        The outcome is cached per file, and the shared CDN node table makes
+        sure workers hitting the same failing node do not all probe again.
         """
-        self.logger(f"    probing for a valid subdomain...")
-        parsed_url = urlparse(url)
-        original_domain = parsed_url.netloc
-
-        for i in range(1, max_subdomains + 1):
-            domain_parts = original_domain.split('.')
-            if len(domain_parts) > 1:
-                base_domain = ".".join(domain_parts[-2:])
-                new_domain = f"n{i}.{base_domain}"
-            else:
-                continue 
+        head_cache = get_head_cache()
+        cached_entry = head_cache.get(url)
+        if cached_entry is not None and cached_entry.working_url and cached_entry.working_url != url:
+            return cached_entry.working_url
+
+        new_url = get_cdn_nodes().find_working_url(url, logger=self.logger)
+        if new_url != url:
+            head_cache.update(url, working_url=new_url)
+            return new_url
 
-            new_url = parsed_url._replace(netloc=new_domain).geturl()
-            
-            try:
-                with requests.head(new_url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5, allow_redirects=True) as resp:
-                    if resp.status_code == 200:
-                        self.logger(f"   ✅ Valid subdomain found: {new_domain}")
-                        return new_url
-            except requests.RequestException:
-                continue
-        
         self.logger(f"   ⚠️ No other valid subdomain found. Sticking with the original.")
         return url
 
@@ -278,21 +291,34 @@ class PostProcessorWorker:
         if self.use_cookie:
             cookies_to_use_for_file = prepare_cookies_for_request(self.use_cookie, self.cookie_text, self.selected_cookie_file, self.app_base_dir, self.logger)
         
+        # Server paths embed the SHA-256 of the content; it identifies the file before any request
+        # and lets the downloaded bytes be checked against it.
+        url_path_hash = path_hash_from_url(file_url)
+        verify_sha256 = url_path_hash is not None and len(url_path_hash) == 64
+
+        if self.keep_duplicates_mode == DUPLICATE_HANDLING_HASH:
+            known_copy = self._find_known_copy(url_path_hash)
+            if known_copy:
+                api_original_filename_for_known_check = file_info.get('_original_name_for_log', file_info.get('name'))
+                self.logger(f"   -> Skip (Content Duplicate, Known): '{api_original_filename_for_known_check}' was already saved as '{known_copy['path']}'. No request made.")
+                if known_copy.get('content_hash'):
+                    with self.downloaded_hash_counts_lock:
+                        self.downloaded_hash_counts[known_copy['content_hash']] += 1
+                return 0, 1, api_original_filename_for_known_check, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
+
         if self.skip_file_size_mb is not None:
                 api_original_filename_for_size_check = file_info.get('_original_name_for_log', file_info.get('name'))
                 try:
-                        # Use a stream=True HEAD request to get headers without downloading the body
-                        with requests.head(file_url, headers=file_download_headers, timeout=15, cookies=cookies_to_use_for_file, allow_redirects=True) as head_response:
-                                head_response.raise_for_status()
-                                content_length = head_response.headers.get('Content-Length')
-                                if content_length:
-                                        file_size_bytes = int(content_length)
-                                        file_size_mb = file_size_bytes / (1024 * 1024)
-                                        if file_size_mb < self.skip_file_size_mb:
-                                                self.logger(f"   -> Skip File (Size): '{api_original_filename_for_size_check}' is {file_size_mb:.2f} MB, which is smaller than the {self.skip_file_size_mb} MB limit.")
-                                                return 0, 1, api_original_filename_for_size_check, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
-                                else:
-                                        self.logger(f"   ⚠️ Could not determine file size for '{api_original_filename_for_size_check}' to check against size limit. Proceeding with download.")
+                        # HEAD the file (or reuse what an earlier request learned) to get its size without the body
+                        head_metadata = get_head_cache().head(file_url, headers=file_download_headers, cookies=cookies_to_use_for_file)
+                        if head_metadata.content_length:
+                                file_size_bytes = head_metadata.content_length
+                                file_size_mb = file_size_bytes / (1024 * 1024)
+                                if file_size_mb < self.skip_file_size_mb:
+                                        self.logger(f"   -> Skip File (Size): '{api_original_filename_for_size_check}' is {file_size_mb:.2f} MB, which is smaller than the {self.skip_file_size_mb} MB limit.")
+                                        return 0, 1, api_original_filename_for_size_check, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
+                        else:
+                                self.logger(f"   ⚠️ Could not determine file size for '{api_original_filename_for_size_check}' to check against size limit. Proceeding with download.")
                 except requests.RequestException as e:
                         self.logger(f"   ⚠️ Could not fetch file headers to check size for '{api_original_filename_for_size_check}': {e}. Proceeding with download.")
                 
@@ -309,7 +335,7 @@ class PostProcessorWorker:
                         self.logger(f"   -> Skip File (Keyword in Original Name '{skip_word}'): '{api_original_filename}'. Scope: {self.skip_words_scope}")
                         return 0, 1, api_original_filename, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
 
-            cleaned_original_api_filename = robust_clean_name(api_original_filename)
+            cleaned_original_api_filename = self.filename_transformer.clean(api_original_filename)
             original_filename_cleaned_base, original_ext = os.path.splitext(cleaned_original_api_filename)
             if not original_ext.startswith('.'): original_ext = '.' + original_ext if original_ext else ''
 
@@ -330,7 +356,7 @@ class PostProcessorWorker:
                     was_original_name_kept_flag = True
                 elif self.manga_filename_style == STYLE_POST_TITLE:
                     if post_title and post_title.strip():
-                        cleaned_post_title_base = robust_clean_name(post_title.strip())
+                        cleaned_post_title_base = self.filename_transformer.clean(post_title.strip())
                         if num_files_in_this_post > 1:
                             if file_index_in_post == 0:
                                 filename_to_save_in_main_path = f"{cleaned_post_title_base}{original_ext}"
@@ -351,7 +377,7 @@ class PostProcessorWorker:
                             manga_date_file_counter_ref[0] += 1
                         base_numbered_name = f"{counter_val_for_filename:03d}"
                         if self.manga_date_prefix and self.manga_date_prefix.strip():
-                            cleaned_prefix = robust_clean_name(self.manga_date_prefix.strip())
+                            cleaned_prefix = self.filename_transformer.clean(self.manga_date_prefix.strip())
                             if cleaned_prefix:
                                 filename_to_save_in_main_path = f"{cleaned_prefix} {base_numbered_name}{original_ext}"
                             else:
@@ -368,7 +394,7 @@ class PostProcessorWorker:
                         with counter_lock:
                             counter_val_for_filename = manga_global_file_counter_ref[0]
                             manga_global_file_counter_ref[0] += 1
-                        cleaned_post_title_base_for_global = robust_clean_name(post_title.strip() if post_title and post_title.strip() else "post")
+                        cleaned_post_title_base_for_global = self.filename_transformer.clean(post_title.strip() if post_title and post_title.strip() else "post")
                         filename_to_save_in_main_path = f"{cleaned_post_title_base_for_global}_{counter_val_for_filename:03d}{original_ext}"
                     else:
                         self.logger(f"⚠️ Manga Title+GlobalNum Mode: Counter ref not provided or malformed for '{api_original_filename}'. Using original. Ref: {manga_global_file_counter_ref}")
@@ -400,7 +426,7 @@ class PostProcessorWorker:
                         self.logger(f"     ⚠️ Post ID {original_post_id_for_log} missing both 'published' and 'added' dates for STYLE_DATE_POST_TITLE. Using 'nodate'.")
 
                     if post_title and post_title.strip():
-                        temp_cleaned_title = robust_clean_name(post_title.strip())
+                        temp_cleaned_title = self.filename_transformer.clean(post_title.strip())
                         if not temp_cleaned_title or temp_cleaned_title.startswith("untitled_folder"):
                             self.logger(f"⚠️ Manga mode (Date+PostTitle Style): Post title for post {original_post_id_for_log} ('{post_title}') was empty or generic after cleaning. Using 'post' as title part.")
                             cleaned_post_title_for_filename = "post"
@@ -442,7 +468,7 @@ class PostProcessorWorker:
                         except Exception:
                             ext = ".file"
 
-                    cleaned_post_title = robust_clean_name(post_title.strip() if post_title else "post")[:40]
+                    cleaned_post_title = self.filename_transformer.clean(post_title.strip() if post_title else "post")[:40]
                     filename_to_save_in_main_path = f"{cleaned_post_title}_{name_hash}{ext}"
                     was_original_name_kept_flag = False
                 else:
@@ -450,19 +476,7 @@ class PostProcessorWorker:
                     was_original_name_kept_flag = True
 
             if self.remove_from_filename_words_list and filename_to_save_in_main_path:
-                base_name_for_removal, ext_for_removal = os.path.splitext(filename_to_save_in_main_path)
-                modified_base_name = base_name_for_removal
-                for word_to_remove in self.remove_from_filename_words_list:
-                    if not word_to_remove: continue
-                    pattern = re.compile(re.escape(word_to_remove), re.IGNORECASE)
-                    modified_base_name = pattern.sub("", modified_base_name)
-                modified_base_name = re.sub(r'[_.\s-]+', ' ', modified_base_name)
-                modified_base_name = re.sub(r'\s+', ' ', modified_base_name)
-                modified_base_name = modified_base_name.strip()
-                if modified_base_name and modified_base_name != ext_for_removal.lstrip('.'):
-                    filename_to_save_in_main_path = modified_base_name + ext_for_removal
-                else:
-                    filename_to_save_in_main_path = base_name_for_removal + ext_for_removal
+                filename_to_save_in_main_path = self.filename_transformer.strip_removed_words(filename_to_save_in_main_path)
 
         if not self.download_thumbnails:
             is_img_type = is_image(api_original_filename)
@@ -495,48 +509,70 @@ class PostProcessorWorker:
             return 0, 1, api_original_filename, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
 
         temp_file_base_for_unique_part, temp_file_ext_for_unique_part = os.path.splitext(filename_to_save_in_main_path if filename_to_save_in_main_path else api_original_filename)
-        unique_id_for_part_file = uuid.uuid4().hex[:8]
-        unique_part_file_stem_on_disk = f"{temp_file_base_for_unique_part}_{unique_id_for_part_file}"
+        # A stem derived from the URL (not a fresh uuid) lets a later attempt find
+        # and resume the partial file left by this one.
+        stable_part_id = hashlib.md5(file_url.encode('utf-8')).hexdigest()[:8]
+        unique_part_file_stem_on_disk = f"{temp_file_base_for_unique_part}_{stable_part_id}"
         max_retries = 3
+        folder_index = get_folder_index(target_folder_path)
         if not self.keep_in_post_duplicates:
             final_save_path_check = os.path.join(target_folder_path, filename_to_save_in_main_path)
-            if os.path.exists(final_save_path_check):
+            if folder_index.exists(filename_to_save_in_main_path):
                 try:
-                    with requests.head(file_url, headers=file_download_headers, timeout=15, cookies=cookies_to_use_for_file, allow_redirects=True) as head_response:
-                        head_response.raise_for_status()
-                        expected_size = int(head_response.headers.get('Content-Length', -1))
-                    
+                    head_metadata = get_head_cache().head(file_url, headers=file_download_headers, cookies=cookies_to_use_for_file)
+                    expected_size = head_metadata.content_length if head_metadata.content_length is not None else -1
+
                     actual_size = os.path.getsize(final_save_path_check)
 
                     if expected_size != -1 and actual_size == expected_size:
                         self.logger(f"   -> Skip (File Exists & Complete): '{filename_to_save_in_main_path}' is already on disk with the correct size.")
                         try:
-                            md5_hasher = hashlib.md5()
-                            with open(final_save_path_check, 'rb') as f_verify:
-                                for chunk in iter(lambda: f_verify.read(8192), b""):
-                                    md5_hasher.update(chunk)
+                            # Reuse the hash recorded when the file was saved instead of re-reading it.
+                            existing_record = self.catalog.get_file_record(final_save_path_check) if self.catalog else None
+                            if existing_record and existing_record['content_hash'] and existing_record['size'] == actual_size:
+                                existing_file_hash = existing_record['content_hash']
+                            else:
+                                existing_file_hash = hash_file(final_save_path_check)
                             with self.downloaded_hash_counts_lock:
-                                self.downloaded_hash_counts[md5_hasher.hexdigest()] += 1
+                                self.downloaded_hash_counts[existing_file_hash] += 1
                         except Exception as hash_exc:
                              self.logger(f"   ⚠️ Could not hash existing file '{filename_to_save_in_main_path}' for session: {hash_exc}")
                         return 0, 1, filename_to_save_in_main_path, was_original_name_kept_flag, FILE_DOWNLOAD_STATUS_SKIPPED, None
                     else:
                         self.logger(f"   ⚠️ File '{filename_to_save_in_main_path}' exists but is incomplete (Expected: {expected_size}, Actual: {actual_size}). Re-downloading.")
-                except requests.RequestException as e:
+                except (requests.RequestException, OSError) as e:
                     self.logger(f"   ⚠️ Could not verify size of existing file '{filename_to_save_in_main_path}': {e}. Proceeding with download.")
         
         max_retries = 3
         retry_delay = 5
         downloaded_size_bytes = 0
         calculated_file_hash = None
+        content_hasher = None
         downloaded_part_file_path = None
         download_successful_flag = False
         last_exception_for_retry_later = None
         is_permanent_error = False
-        data_to_write_io = None
+        compressed_part_file_path = None
+
+        single_stream_part_path = os.path.join(target_folder_path, f"{unique_part_file_stem_on_disk}{temp_file_ext_for_unique_part}.part")
+        if not claim_part_path(single_stream_part_path):
+            # Another thread is fetching the same URL into this folder; use a throwaway name.
+            single_stream_part_path = os.path.join(target_folder_path, f"{temp_file_base_for_unique_part}_{uuid.uuid4().hex[:8]}{temp_file_ext_for_unique_part}.part")
+            claim_part_path(single_stream_part_path)
+        partial_download = PartialDownload(single_stream_part_path, file_url)
+
+        # Queue position in the global connection budget: smaller files go first.
+        download_scheduler = get_download_scheduler()
+        if is_image(api_original_filename):
+            download_size_hint = DOWNLOAD_SIZE_HINT_IMAGE
+        elif is_video(api_original_filename) or is_archive(api_original_filename):
+            download_size_hint = DOWNLOAD_SIZE_HINT_LARGE
+        else:
+            download_size_hint = DOWNLOAD_SIZE_HINT_OTHER
 
         for attempt_num_single_stream in range(max_retries + 1):
             response = None
+            holds_download_slot = False
             if self._check_pause(f"File download attempt for '{api_original_filename}'"): break
             if self.check_cancel() or (skip_event and skip_event.is_set()): break
             try:
@@ -544,11 +580,22 @@ class PostProcessorWorker:
                     self.logger(f"   Retrying download for '{api_original_filename}' (Overall Attempt {attempt_num_single_stream + 1}/{max_retries + 1})...")
                     time.sleep(retry_delay * (2 ** (attempt_num_single_stream - 1)))
                 
+                if not download_scheduler.acquire(download_size_hint, self.cancellation_event):
+                    break
+                holds_download_slot = True
                 self._emit_signal('file_download_status', True)
                 
-                current_url_to_try = file_url
-                
-                response = requests.get(current_url_to_try, headers=file_download_headers, timeout=(30, 300), stream=True, cookies=cookies_to_use_for_file)
+                # Go straight to the mirror an earlier request of this file ended up on,
+                # or else to the node the CDN table expects to serve it.
+                preferred_url = get_head_cache().preferred_url(file_url)
+                current_url_to_try = file_url = preferred_url if preferred_url != file_url else get_cdn_nodes().route(file_url)
+
+                request_headers = partial_download.request_headers(file_download_headers)
+                request_started = time.monotonic()
+                response = get_session(current_url_to_try, cookies=cookies_to_use_for_file).get(current_url_to_try, headers=request_headers, timeout=(30, 300), stream=True, cancellation_event=self.cancellation_event)
+                if response.status_code != 403:
+                    get_cdn_nodes().record_result(current_url_to_try, response.status_code < 500, time.monotonic() - request_started,
+                                                  served=response.status_code in (200, 206))
                 
                 if response.status_code == 403 and ('kemono.cr' in current_url_to_try or 'coomer.st' in current_url_to_try):
                     self.logger(f"   ⚠️ Got 403 Forbidden for '{api_original_filename}'. Attempting subdomain rotation...")
@@ -557,18 +604,26 @@ class PostProcessorWorker:
                         self.logger(f"   Retrying with new URL: {new_url}")
                         file_url = new_url
                         response.close() # Close the old response
-                        response = requests.get(new_url, headers=file_download_headers, timeout=(30, 300), stream=True, cookies=cookies_to_use_for_file)
+                        request_started = time.monotonic()
+                        response = get_session(new_url, cookies=cookies_to_use_for_file).get(new_url, headers=request_headers, timeout=(30, 300), stream=True, cancellation_event=self.cancellation_event)
+                        get_cdn_nodes().record_result(new_url, response.status_code < 500, time.monotonic() - request_started,
+                                                      served=response.status_code in (200, 206))
 
                 response.raise_for_status()
                 
                 # --- REVISED AND MOVED SIZE CHECK LOGIC ---
-                total_size_bytes = int(response.headers.get('Content-Length', 0))
+                total_size_bytes = PartialDownload.total_size_for(response)
+                resume_offset = partial_download.start_offset_for(response)
+                get_head_cache().record_response(file_url, response, total_size=total_size_bytes or None)
+                if total_size_bytes > 0:
+                    download_size_hint = total_size_bytes
 
                 if self.skip_file_size_mb is not None:
                     if total_size_bytes > 0:
                         file_size_mb = total_size_bytes / (1024 * 1024)
                         if file_size_mb < self.skip_file_size_mb:
                             self.logger(f"   -> Skip File (Size): '{api_original_filename}' is {file_size_mb:.2f} MB, which is smaller than the {self.skip_file_size_mb} MB limit.")
+                            release_part_path(single_stream_part_path)
                             return 0, 1, api_original_filename, False, FILE_DOWNLOAD_STATUS_SKIPPED, None
                     # If Content-Length is missing, we can't check, so we no longer log a warning here and just proceed.
                 # --- END OF REVISED LOGIC ---
@@ -591,23 +646,27 @@ class PostProcessorWorker:
                 attempt_multipart = (self.allow_multipart_download and MULTIPART_DOWNLOADER_AVAILABLE and
                                      file_is_eligible_by_scope and
                                      num_parts_for_file > 1 and total_size_bytes > min_size_in_bytes and 
-                                     'bytes' in response.headers.get('Accept-Ranges', '').lower())
+                                     'bytes' in response.headers.get('Accept-Ranges', '').lower() and
+                                     resume_offset == 0)
           
                 if self._check_pause(f"Multipart decision for '{api_original_filename}'"): break
 
                 if attempt_multipart:
                     response.close() # Close the initial connection before starting multipart
                     mp_save_path_for_unique_part_stem_arg = os.path.join(target_folder_path, f"{unique_part_file_stem_on_disk}{temp_file_ext_for_unique_part}")
-                    mp_success, mp_bytes, mp_hash, mp_file_handle = download_file_in_parts(
+                    mp_success, mp_bytes, mp_hasher, mp_file_handle = download_file_in_parts(
                         file_url, mp_save_path_for_unique_part_stem_arg, total_size_bytes, num_parts_for_file, file_download_headers, api_original_filename,
                         emitter_for_multipart=self.emitter, cookies_for_chunk_session=cookies_to_use_for_file,
                         cancellation_event=self.cancellation_event, skip_event=skip_event, logger_func=self.logger,
-                        pause_event=self.pause_event
+                        pause_event=self.pause_event,
+                        min_segment_size=self.multipart_min_segment_mb * 1024 * 1024,
+                        with_sha256=verify_sha256
                     )
                     if mp_success:
                         download_successful_flag = True
                         downloaded_size_bytes = mp_bytes
-                        calculated_file_hash = mp_hash
+                        content_hasher = mp_hasher
+                        calculated_file_hash = mp_hasher.hexdigest()
                         downloaded_part_file_path = mp_save_path_for_unique_part_stem_arg
                         if mp_file_handle: mp_file_handle.close()
                         break
@@ -618,27 +677,38 @@ class PostProcessorWorker:
                             download_successful_flag = False; break
                 else:
                     self.logger(f"⬇️ Downloading (Single Stream): '{api_original_filename}' (Size: {total_size_bytes / (1024 * 1024):.2f} MB if known) [Base Name: '{filename_to_save_in_main_path}']")
-                    current_single_stream_part_path = os.path.join(target_folder_path, f"{unique_part_file_stem_on_disk}{temp_file_ext_for_unique_part}.part")
-                    current_attempt_downloaded_bytes = 0
-                    md5_hasher = hashlib.md5()
+                    if resume_offset:
+                        self.logger(f"   ↪️ Resuming '{api_original_filename}' from {resume_offset / (1024 * 1024):.2f} MB (HTTP Range).")
+                    elif partial_download.resume_offset:
+                        self.logger(f"   ⚠️ Server did not honour the resume request for '{api_original_filename}' (file changed or Range unsupported). Starting over.")
+                    current_single_stream_part_path = single_stream_part_path
+                    stream_hasher = partial_download.begin(response, resume_offset, total_size_bytes, with_sha256=verify_sha256)
+                    current_attempt_downloaded_bytes = resume_offset
                     last_progress_time = time.time()
                     try:
-                        with open(current_single_stream_part_path, 'wb') as f_part:
+                        with open(current_single_stream_part_path, 'ab' if resume_offset else 'wb') as f_part:
                             for chunk in response.iter_content(chunk_size=1 * 1024 * 1024):
                                 if self._check_pause(f"Chunk download for '{api_original_filename}'"): break
                                 if self.check_cancel() or (skip_event and skip_event.is_set()): break
                                 if chunk:
+                                    download_scheduler.throttle(len(chunk), self.cancellation_event)
                                     f_part.write(chunk)
-                                    md5_hasher.update(chunk)
+                                    stream_hasher.update(chunk)
+                                    partial_download.note_written(len(chunk))
                                     current_attempt_downloaded_bytes += len(chunk)
                                     if time.time() - last_progress_time > 1 and total_size_bytes > 0:
                                         self._emit_signal('file_progress', api_original_filename, (current_attempt_downloaded_bytes, total_size_bytes))
                                         last_progress_time = time.time()
-                        if self.check_cancel() or (skip_event and skip_event.is_set()) or (self.pause_event and self.pause_event.is_set() and not (current_attempt_downloaded_bytes > 0 or (total_size_bytes == 0 and response.status_code == 200))):
-                            if os.path.exists(current_single_stream_part_path): os.remove(current_single_stream_part_path)
+                        if skip_event and skip_event.is_set():
+                            partial_download.discard()
+                            break
+                        if self.check_cancel() or (self.pause_event and self.pause_event.is_set() and not (current_attempt_downloaded_bytes > 0 or (total_size_bytes == 0 and response.status_code in (200, 206)))):
+                            # Keep the .part file and its sidecar so a later run can resume it.
+                            if not partial_download.can_resume:
+                                partial_download.discard()
                             break
                         attempt_is_complete = False
-                        if response.status_code == 200:
+                        if response.status_code in (200, 206):
                             if total_size_bytes > 0:
                                 if current_attempt_downloaded_bytes == total_size_bytes:
                                     attempt_is_complete = True
@@ -651,20 +721,21 @@ class PostProcessorWorker:
                                 else:
                                     attempt_is_complete = True
                         if attempt_is_complete:
-                            calculated_file_hash = md5_hasher.hexdigest()
+                            content_hasher = stream_hasher
+                            calculated_file_hash = stream_hasher.hexdigest()
                             downloaded_size_bytes = current_attempt_downloaded_bytes
                             downloaded_part_file_path = current_single_stream_part_path
                             download_successful_flag = True
+                            partial_download.discard_meta()
                             break
-                        else:
-                            if os.path.exists(current_single_stream_part_path):
-                                try:
-                                    os.remove(current_single_stream_part_path)
-                                except OSError as e_rem_part:
-                                    self.logger(f"   -> Failed to remove .part file after failed single stream attempt: {e_rem_part}")
+                        elif current_attempt_downloaded_bytes > total_size_bytes > 0 or not partial_download.can_resume:
+                            # More data than announced, or a server without byte ranges:
+                            # the .part file cannot be resumed, so do not leave it behind.
+                            partial_download.discard()
                     except Exception as e_write:
                         self.logger(f"   ❌ Error writing single-stream to disk for '{api_original_filename}': {e_write}")
-                        if os.path.exists(current_single_stream_part_path): os.remove(current_single_stream_part_path)
+                        if not partial_download.can_resume:
+                            partial_download.discard()
                         raise
 
             except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, http.client.IncompleteRead) as e:
@@ -690,8 +761,14 @@ class PostProcessorWorker:
             finally:
                 if response:
                     response.close()
+                if holds_download_slot:
+                    download_scheduler.release()
                 self._emit_signal('file_download_status', False)
 
+        if is_permanent_error or (not download_successful_flag and not partial_download.can_resume):
+            partial_download.discard()
+        release_part_path(single_stream_part_path)
+
         final_total_for_progress = total_size_bytes if download_successful_flag and total_size_bytes > 0 else downloaded_size_bytes
         self._emit_signal('file_progress', api_original_filename, (downloaded_size_bytes, final_total_for_progress))
 
@@ -703,11 +780,8 @@ class PostProcessorWorker:
                 if actual_size == total_size_bytes:
                     self.logger(f"   ✅ Rescued '{api_original_filename}': IncompleteRead error occurred, but file size matches. Proceeding with save.")
                     download_successful_flag = True
-                    md5_hasher = hashlib.md5()
-                    with open(downloaded_part_file_path, 'rb') as f_verify:
-                        for chunk in iter(lambda: f_verify.read(8192), b""):
-                            md5_hasher.update(chunk)
-                    calculated_file_hash = md5_hasher.hexdigest()
+                    content_hasher = hash_file_content(downloaded_part_file_path, verify_sha256)
+                    calculated_file_hash = content_hasher.hexdigest()
             except Exception as rescue_exc:
                 self.logger(f"   ⚠️ Failed to rescue file despite matching size. Error: {rescue_exc}")
 
@@ -723,6 +797,20 @@ class PostProcessorWorker:
             if self._check_pause(f"Post-download hash check for '{api_original_filename}'"):
                 return 0, 1, filename_to_save_in_main_path, was_original_name_kept_flag, FILE_DOWNLOAD_STATUS_SKIPPED, None
 
+            if verify_sha256 and content_hasher is not None and content_hasher.sha256_hexdigest() != url_path_hash:
+                self.logger(f"   ❌ Checksum mismatch for '{api_original_filename}': its SHA-256 does not match the hash in its URL. Discarding the download; it will be retried later.")
+                if downloaded_part_file_path and os.path.exists(downloaded_part_file_path):
+                    try:
+                        os.remove(downloaded_part_file_path)
+                    except OSError: pass
+                details_for_failure = {
+                    'file_info': file_info, 'target_folder_path': target_folder_path, 'headers': file_download_headers,
+                    'original_post_id_for_log': original_post_id_for_log, 'post_title': post_title,
+                    'file_index_in_post': file_index_in_post, 'num_files_in_this_post': num_files_in_this_post,
+                    'forced_filename_override': filename_to_save_in_main_path,
+                }
+                return 0, 1, filename_to_save_in_main_path, was_original_name_kept_flag, FILE_DOWNLOAD_STATUS_FAILED_RETRYABLE_LATER, details_for_failure
+
             should_skip = False
             with self.downloaded_hash_counts_lock:
                 current_count = self.downloaded_hash_counts.get(calculated_file_hash, 0)
@@ -753,45 +841,44 @@ class PostProcessorWorker:
             
             if (self.compress_images and downloaded_part_file_path and
                     is_image(api_original_filename) and
-                    os.path.getsize(downloaded_part_file_path) > 1.5 * 1024 * 1024):
+                    os.path.getsize(downloaded_part_file_path) > IMAGE_COMPRESSION_MIN_BYTES):
                 
                 self.logger(f"   🔄 Compressing '{api_original_filename}' to WebP...")
+                # Encoded next to the .part file, i.e. on the target filesystem, so the save below is a plain rename.
+                webp_part_path = f"{downloaded_part_file_path}.webp"
                 try:
-                    with Image.open(downloaded_part_file_path) as img:
-                        if img.mode not in ('RGB', 'RGBA'):
-                            img = img.convert('RGBA')
-                        
-                        output_buffer = BytesIO()
-                        img.save(output_buffer, format='WebP', quality=85)
-                        
-                        data_to_write_io = output_buffer
-                        
+                    compression_result = get_image_compression_pool().compress(downloaded_part_file_path, webp_part_path, self.cancellation_event)
+                    if compression_result is None:
+                        self.logger(f"   Compression of '{api_original_filename}' cancelled. Saving original file instead.")
+                    else:
+                        compressed_size, scaled_to = compression_result
+                        if scaled_to:
+                            self.logger(f"   Image too large to compress at full size; scaled down to {scaled_to[0]}x{scaled_to[1]}.")
+                        compressed_part_file_path = webp_part_path
                         base, _ = os.path.splitext(filename_to_save_in_main_path)
                         filename_to_save_in_main_path = f"{base}.webp"
-                        self.logger(f"   ✅ Compression successful. New size: {len(data_to_write_io.getvalue()) / (1024*1024):.2f} MB")
+                        self.logger(f"   ✅ Compression successful. New size: {compressed_size / (1024*1024):.2f} MB")
 
                 except Exception as e_compress:
                     self.logger(f"   ⚠️ Failed to compress '{api_original_filename}': {e_compress}. Saving original file instead.")
-                    data_to_write_io = None
+                    compressed_part_file_path = None
+                if compressed_part_file_path is None and os.path.exists(webp_part_path):
+                    try:
+                        os.remove(webp_part_path)
+                    except OSError:
+                        pass
             
             effective_save_folder = target_folder_path
-            base_name, extension = os.path.splitext(filename_to_save_in_main_path)
-            counter = 1
-            final_filename_on_disk = filename_to_save_in_main_path
+            final_filename_on_disk = folder_index.reserve_unique(filename_to_save_in_main_path)
             final_save_path = os.path.join(effective_save_folder, final_filename_on_disk)
 
-            while os.path.exists(final_save_path):
-                final_filename_on_disk = f"{base_name}_{counter}{extension}"
-                final_save_path = os.path.join(effective_save_folder, final_filename_on_disk)
-                counter += 1
-            
-            if counter > 1:
+            if final_filename_on_disk != filename_to_save_in_main_path:
                 self.logger(f"   ⚠️ Filename collision: Saving as '{final_filename_on_disk}' instead.")
 
             try:
-                if data_to_write_io:
-                    with open(final_save_path, 'wb') as f_out:
-                        f_out.write(data_to_write_io.getvalue())
+                if compressed_part_file_path:
+                    os.replace(compressed_part_file_path, final_save_path)
+                    compressed_part_file_path = None
                     if downloaded_part_file_path and os.path.exists(downloaded_part_file_path):
                         try:
                             os.remove(downloaded_part_file_path)
@@ -806,6 +893,7 @@ class PostProcessorWorker:
                 
                 with self.downloaded_file_hashes_lock:
                     self.downloaded_file_hashes.add(calculated_file_hash)
+                get_session_path_hashes().record(url_path_hash, final_save_path, downloaded_size_bytes, calculated_file_hash)
                 
                 final_filename_saved_for_return = final_filename_on_disk
                 self.logger(f"✅ Saved: '{final_filename_saved_for_return}' (from '{api_original_filename}', {downloaded_size_bytes / (1024 * 1024):.2f} MB) in '{os.path.basename(effective_save_folder)}'")
@@ -820,7 +908,11 @@ class PostProcessorWorker:
                     'service': self.service,
                     'user_id': self.user_id,
                     'api_original_filename': api_original_filename,
-                    'folder_context_name': folder_context_name_for_history or os.path.basename(effective_save_folder)
+                    'folder_context_name': folder_context_name_for_history or os.path.basename(effective_save_folder),
+                    'saved_path': final_save_path,
+                    'file_url': file_url,
+                    'file_size': downloaded_size_bytes,
+                    'content_hash': calculated_file_hash
                 }
                 self._emit_signal('file_successfully_downloaded', downloaded_file_details)
                 time.sleep(0.05)
@@ -842,6 +934,8 @@ class PostProcessorWorker:
                         os.remove(final_save_path)
                     except OSError:
                         self.logger(f"   -> Failed to remove partially saved file: {final_save_path}")
+                if not os.path.exists(final_save_path):
+                    folder_index.release(final_filename_on_disk)
 
                 permanent_failure_details = {
                     'file_info': file_info, 'target_folder_path': target_folder_path, 'headers': file_download_headers,
@@ -851,8 +945,11 @@ class PostProcessorWorker:
                 }
                 return 0, 1, final_filename_saved_for_return, was_original_name_kept_flag, FILE_DOWNLOAD_STATUS_FAILED_PERMANENTLY_THIS_SESSION, permanent_failure_details
             finally:
-                if data_to_write_io and hasattr(data_to_write_io, 'close'):
-                    data_to_write_io.close()
+                if compressed_part_file_path and os.path.exists(compressed_part_file_path):
+                    try:
+                        os.remove(compressed_part_file_path)
+                    except OSError:
+                        pass
         else:
             self.logger(f"->>Download Fail for '{api_original_filename}' (Post ID: {original_post_id_for_log}). No successful download after retries.")
             details_for_failure = {
@@ -940,6 +1037,7 @@ class PostProcessorWorker:
                 return (0, 0, [], [], [], None, None)
 
             current_character_filters = self._get_current_character_filters()
+            char_filter_matcher = get_character_filter_matcher(current_character_filters) if current_character_filters else None
             kept_original_filenames_for_log = []
             retryable_failures_this_post = []
             permanent_failures_this_post = []
@@ -996,21 +1094,12 @@ class PostProcessorWorker:
                 if self._check_pause(f"Character title filter for post {post_id}"):
                     result_tuple = (0, num_potential_files_in_post, [], [], [], None, None)
                     return result_tuple
-                for idx, filter_item_obj in enumerate(current_character_filters):
-                    if self.check_cancel(): break
-                    terms_to_check_for_title = list(filter_item_obj["aliases"])
-                    if filter_item_obj["is_group"]:
-                        if filter_item_obj["name"] not in terms_to_check_for_title:
-                            terms_to_check_for_title.append(filter_item_obj["name"])
-                    unique_terms_for_title_check = list(set(terms_to_check_for_title))
-                    for term_to_match in unique_terms_for_title_check:
-                        match_found_for_term = is_title_match_for_character(post_title, term_to_match)
-                        if match_found_for_term:
-                            post_is_candidate_by_title_char_match = True
-                            char_filter_that_matched_title = filter_item_obj
-                            self.logger(f"   Post title matches char filter term '{term_to_match}' (from group/name '{filter_item_obj['name']}', Scope: {self.char_filter_scope}). Post is candidate.")
-                            break
-                    if post_is_candidate_by_title_char_match: break
+                title_match = char_filter_matcher.match_title(post_title)
+                if title_match:
+                    filter_item_obj, term_to_match = title_match
+                    post_is_candidate_by_title_char_match = True
+                    char_filter_that_matched_title = filter_item_obj
+                    self.logger(f"   Post title matches char filter term '{term_to_match}' (from group/name '{filter_item_obj['name']}', Scope: {self.char_filter_scope}). Post is candidate.")
 
             all_files_from_post_api_for_char_check = []
             api_file_domain_for_char_check = urlparse(self.api_url_input).netloc
@@ -1035,18 +1124,13 @@ class PostProcessorWorker:
                     if self.check_cancel(): break
                     current_api_original_filename_for_check = file_info_item.get('_original_name_for_log')
                     if not current_api_original_filename_for_check: continue
-                    for filter_item_obj in current_character_filters:
-                        terms_to_check = list(filter_item_obj["aliases"])
-                        if filter_item_obj["is_group"] and filter_item_obj["name"] not in terms_to_check:
-                            terms_to_check.append(filter_item_obj["name"])
-                        for term_to_match in terms_to_check:
-                            if is_filename_match_for_character(current_api_original_filename_for_check, term_to_match):
-                                post_is_candidate_by_file_char_match_in_comment_scope = True
-                                char_filter_that_matched_file_in_comment_scope = filter_item_obj
-                                self.logger(f"     Match Found (File in Comments Scope): File '{current_api_original_filename_for_check}' matches char filter term '{term_to_match}' (from group/name '{filter_item_obj['name']}'). Post is candidate.")
-                                break
-                        if post_is_candidate_by_file_char_match_in_comment_scope: break
-                    if post_is_candidate_by_file_char_match_in_comment_scope: break
+                    file_match = char_filter_matcher.match_filename(current_api_original_filename_for_check)
+                    if file_match:
+                        filter_item_obj, term_to_match = file_match
+                        post_is_candidate_by_file_char_match_in_comment_scope = True
+                        char_filter_that_matched_file_in_comment_scope = filter_item_obj
+                        self.logger(f"     Match Found (File in Comments Scope): File '{current_api_original_filename_for_check}' matches char filter term '{term_to_match}' (from group/name '{filter_item_obj['name']}'). Post is candidate.")
+                        break
                 self.logger(f"   [Char Scope: Comments] Phase 1 Result: post_is_candidate_by_file_char_match_in_comment_scope = {post_is_candidate_by_file_char_match_in_comment_scope}")
 
             if current_character_filters and self.char_filter_scope == CHAR_SCOPE_COMMENTS and self.service != 'discord':
@@ -1076,19 +1160,14 @@ class PostProcessorWorker:
                                 if not raw_comment_content: continue
                                 cleaned_comment_text = strip_html_tags(raw_comment_content)
                                 if not cleaned_comment_text.strip(): continue
-                                for filter_item_obj in current_character_filters:
-                                    terms_to_check_comment = list(filter_item_obj["aliases"])
-                                    if filter_item_obj["is_group"] and filter_item_obj["name"] not in terms_to_check_comment:
-                                        terms_to_check_comment.append(filter_item_obj["name"])
-                                    for term_to_match_comment in terms_to_check_comment:
-                                        if is_title_match_for_character(cleaned_comment_text, term_to_match_comment):
-                                            post_is_candidate_by_comment_char_match = True
-                                            char_filter_that_matched_comment = filter_item_obj
-                                            self.logger(f"     Match Found (Comment in Comments Scope): Comment in post {post_id} matches char filter term '{term_to_match_comment}' (from group/name '{filter_item_obj['name']}'). Post is candidate.")
-                                            self.logger(f"       Matching comment (first 100 chars): '{cleaned_comment_text[:100]}...'")
-                                            break
-                                    if post_is_candidate_by_comment_char_match: break
-                                if post_is_candidate_by_comment_char_match: break
+                                comment_match = char_filter_matcher.match_text(cleaned_comment_text)
+                                if comment_match:
+                                    filter_item_obj, term_to_match_comment = comment_match
+                                    post_is_candidate_by_comment_char_match = True
+                                    char_filter_that_matched_comment = filter_item_obj
+                                    self.logger(f"     Match Found (Comment in Comments Scope): Comment in post {post_id} matches char filter term '{term_to_match_comment}' (from group/name '{filter_item_obj['name']}'). Post is candidate.")
+                                    self.logger(f"       Matching comment (first 100 chars): '{cleaned_comment_text[:100]}...'")
+                                    break
                         else:
                             self.logger(f"     No comments found or fetched for post {post_id} to check against character filters.")
                     except RuntimeError as e_fetch_comment:
@@ -1413,11 +1492,8 @@ class PostProcessorWorker:
                     final_save_path = os.path.join(determined_post_save_path_for_history, txt_filename)
                     try:
                         os.makedirs(determined_post_save_path_for_history, exist_ok=True)
-                        base, ext = os.path.splitext(final_save_path)
-                        counter = 1
-                        while os.path.exists(final_save_path):
-                            final_save_path = f"{base}_{counter}{ext}"
-                            counter += 1
+                        txt_filename = get_folder_index(determined_post_save_path_for_history).reserve_unique(txt_filename)
+                        final_save_path = os.path.join(determined_post_save_path_for_history, txt_filename)
 
                         if file_extension == 'pdf':
                             if FPDF:
@@ -1737,18 +1813,12 @@ class PostProcessorWorker:
                         file_is_candidate_by_char_filter_scope = True
                     else:
                         if self.char_filter_scope == CHAR_SCOPE_FILES:
-                            for filter_item_obj in current_character_filters:
-                                terms_to_check_for_file = list(filter_item_obj["aliases"])
-                                if filter_item_obj["is_group"] and filter_item_obj["name"] not in terms_to_check_for_file:
-                                    terms_to_check_for_file.append(filter_item_obj["name"])
-                                unique_terms_for_file_check = list(set(terms_to_check_for_file))
-                                for term_to_match in unique_terms_for_file_check:
-                                    if is_filename_match_for_character(current_api_original_filename, term_to_match):
-                                        file_is_candidate_by_char_filter_scope = True
-                                        char_filter_info_that_matched_file = filter_item_obj
-                                        self.logger(f"   File '{current_api_original_filename}' matches char filter term '{term_to_match}' (from '{filter_item_obj['name']}'). Scope: Files.")
-                                        break
-                                if file_is_candidate_by_char_filter_scope: break
+                            file_match = char_filter_matcher.match_filename(current_api_original_filename)
+                            if file_match:
+                                filter_item_obj, term_to_match = file_match
+                                file_is_candidate_by_char_filter_scope = True
+                                char_filter_info_that_matched_file = filter_item_obj
+                                self.logger(f"   File '{current_api_original_filename}' matches char filter term '{term_to_match}' (from '{filter_item_obj['name']}'). Scope: Files.")
                         elif self.char_filter_scope == CHAR_SCOPE_TITLE:
                             if post_is_candidate_by_title_char_match:
                                 file_is_candidate_by_char_filter_scope = True
@@ -1760,18 +1830,12 @@ class PostProcessorWorker:
                                 char_filter_info_that_matched_file = char_filter_that_matched_title
                                 self.logger(f"   File '{current_api_original_filename}' is candidate because post title matched. Scope: Both (Title part).")
                             else:
-                                for filter_item_obj_both_file in current_character_filters:
-                                    terms_to_check_for_file_both = list(filter_item_obj_both_file["aliases"])
-                                    if filter_item_obj_both_file["is_group"] and filter_item_obj_both_file["name"] not in terms_to_check_for_file_both:
-                                        terms_to_check_for_file_both.append(filter_item_obj_both_file["name"])
-                                    unique_terms_for_file_both_check = list(set(terms_to_check_for_file_both))
-                                    for term_to_match in unique_terms_for_file_both_check:
-                                        if is_filename_match_for_character(current_api_original_filename, term_to_match):
-                                            file_is_candidate_by_char_filter_scope = True
-                                            char_filter_info_that_matched_file = filter_item_obj_both_file
-                                            self.logger(f"   File '{current_api_original_filename}' matches char filter term '{term_to_match}' (from '{filter_item_obj['name']}'). Scope: Both (File part).")
-                                            break
-                                    if file_is_candidate_by_char_filter_scope: break
+                                file_match = char_filter_matcher.match_filename(current_api_original_filename)
+                                if file_match:
+                                    filter_item_obj_both_file, term_to_match = file_match
+                                    file_is_candidate_by_char_filter_scope = True
+                                    char_filter_info_that_matched_file = filter_item_obj_both_file
+                                    self.logger(f"   File '{current_api_original_filename}' matches char filter term '{term_to_match}' (from '{filter_item_obj_both_file['name']}'). Scope: Both (File part).")
                         elif self.char_filter_scope == CHAR_SCOPE_COMMENTS:
                             if post_is_candidate_by_file_char_match_in_comment_scope:
                                 file_is_candidate_by_char_filter_scope = True
@@ -1858,38 +1922,14 @@ class PostProcessorWorker:
 
             if self.session_file_path and self.session_lock:
                 try:
-                    with self.session_lock:
-                        if os.path.exists(self.session_file_path):
-                            with open(self.session_file_path, 'r', encoding='utf-8') as f:
-                                session_data = json.load(f)
-                        
-                            if 'download_state' not in session_data:
-                                session_data['download_state'] = {}
-                            if not isinstance(session_data['download_state'].get('processed_post_ids'), list):
-                                session_data['download_state']['processed_post_ids'] = []
-                            
-                            session_data['download_state']['processed_post_ids'].append(self.post.get('id'))
-
-                            if 'manga_counters' not in session_data['download_state']:
-                                session_data['download_state']['manga_counters'] = {}
-                            
-                            if self.manga_date_file_counter_ref is not None:
-                                session_data['download_state']['manga_counters']['date_based'] = self.manga_date_file_counter_ref[0]
-                            
-                            if self.manga_global_file_counter_ref is not None:
-                                session_data['download_state']['manga_counters']['global_numbering'] = self.manga_global_file_counter_ref[0]
-                          
-                            if permanent_failures_this_post:
-                                if not isinstance(session_data['download_state'].get('permanently_failed_files'), list):
-                                    session_data['download_state']['permanently_failed_files'] = []
-                                existing_failed_urls = {f.get('file_info', {}).get('url') for f in session_data['download_state']['permanently_failed_files']}
-                                for failure in permanent_failures_this_post:
-                                    if failure.get('file_info', {}).get('url') not in existing_failed_urls:
-                                        session_data['download_state']['permanently_failed_files'].append(failure)
-                            temp_file_path = self.session_file_path + ".tmp"
-                            with open(temp_file_path, 'w', encoding='utf-8') as f_tmp:
-                                json.dump(session_data, f_tmp, indent=2)
-                            os.replace(temp_file_path, self.session_file_path)
+                    manga_counters = {}
+                    if self.manga_date_file_counter_ref is not None:
+                        manga_counters['date_based'] = self.manga_date_file_counter_ref[0]
+                    if self.manga_global_file_counter_ref is not None:
+                        manga_counters['global_numbering'] = self.manga_global_file_counter_ref[0]
+                    get_session_journal(self.session_file_path).record_post(
+                        self.post.get('id'), manga_counters, permanent_failures_this_post
+                    )
                 except Exception as e:
                     self.logger(f"⚠️ Could not update session file for post {post_id}: {e}")
 
@@ -1994,6 +2034,7 @@ class DownloadThread(QThread):
                  allow_multipart_download=True,
                  multipart_parts_count=4, 
                  multipart_min_size_mb=100, 
+                 multipart_min_segment_mb=MULTIPART_MIN_SEGMENT_MB,
                  selected_cookie_file=None,
                  override_output_dir=None,
                  app_base_dir=None,
@@ -2018,7 +2059,8 @@ class DownloadThread(QThread):
                  processed_post_ids=None,
                  start_offset=0,
                  fetch_first=False,
-                 skip_file_size_mb=None
+                 skip_file_size_mb=None,
+                 oldest_first_strategy=OLDEST_FIRST_MERGE
                  ): 
         super().__init__()
         self.api_url_input = api_url_input
@@ -2061,6 +2103,7 @@ class DownloadThread(QThread):
         self.allow_multipart_download = allow_multipart_download
         self.multipart_parts_count = multipart_parts_count 
         self.multipart_min_size_mb = multipart_min_size_mb 
+        self.multipart_min_segment_mb = multipart_min_segment_mb
         self.selected_cookie_file = selected_cookie_file
         self.app_base_dir = app_base_dir
         self.cookie_text = cookie_text
@@ -2087,6 +2130,7 @@ class DownloadThread(QThread):
         self.start_offset = start_offset 
         self.fetch_first = fetch_first
         self.skip_file_size_mb = skip_file_size_mb
+        self.oldest_first_strategy = oldest_first_strategy
 
         if self.compress_images and Image is None:
             self.logger("⚠️ Image compression disabled: Pillow library not found (DownloadThread).")
@@ -2134,7 +2178,8 @@ class DownloadThread(QThread):
                 app_base_dir=self.app_base_dir,
                 manga_filename_style_for_sort_check=self.manga_filename_style if self.manga_mode_active else None,
                 processed_post_ids=self.processed_post_ids_set,
-                fetch_all_first=self.fetch_first 
+                fetch_all_first=self.fetch_first,
+                oldest_first_strategy=self.oldest_first_strategy
             )
 
             for posts_batch_data in post_generator:
@@ -2207,6 +2252,7 @@ class DownloadThread(QThread):
                         'single_pdf_mode': self.single_pdf_mode,
                         'multipart_parts_count': self.multipart_parts_count, 
                         'multipart_min_size_mb': self.multipart_min_size_mb, 
+                        'multipart_min_segment_mb': self.multipart_min_segment_mb,
                         'skip_file_size_mb': self.skip_file_size_mb, 
                         'project_root_dir': self.project_root_dir,
                     }
@@ -0,0 +1,151 @@
+# --- Standard Library Imports ---
+import os
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# --- Third-Party Library Imports ---
+try:
+    from PIL import Image
+    IMAGE_COMPRESSION_AVAILABLE = True
+except ImportError:
+    Image = None
+    IMAGE_COMPRESSION_AVAILABLE = False
+
+# --- Local Application Imports ---
+from ..config.constants import (
+    IMAGE_COMPRESSION_MAX_PROCESSES, IMAGE_COMPRESSION_QUEUE_PER_PROCESS, IMAGE_COMPRESSION_WEBP_QUALITY,
+    IMAGE_COMPRESSION_MAX_PIXELS
+)
+
+# --- Module Constants ---
+_BACKPRESSURE_POLL_SECONDS = 0.25
+WEBP_MAX_DIMENSION = 16383  # Largest width/height the WebP format can store
+
+
+def webp_target_size(width, height, max_pixels=IMAGE_COMPRESSION_MAX_PIXELS):
+    """
+    Returns the (width, height) an image is encoded at: unchanged unless it
+    exceeds the WebP dimension limit or `max_pixels`, in which case it is
+    scaled down keeping its aspect ratio.
+    """
+    scale = min(1.0, WEBP_MAX_DIMENSION / max(width, height, 1))
+    if max_pixels and width * height > max_pixels:
+        scale = min(scale, math.sqrt(max_pixels / (width * height)))
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def compress_to_webp(source_path, output_path, quality=IMAGE_COMPRESSION_WEBP_QUALITY):
+    """
+    Re-encodes an image file as WebP, writing straight to `output_path`.
+    Runs inside a worker process, so it only takes and returns plain values.
+
+    Images too large for WebP or above IMAGE_COMPRESSION_MAX_PIXELS are
+    scaled down while decoding: thumbnail() lets JPEG decode at a reduced
+    DCT scale and reduces other formats by whole factors before
+    resampling, so the full-size pixels are never converted or resampled.
+
+    Returns:
+        tuple: (size in bytes of the written file, (width, height) it was
+        scaled to, or None if kept at full size).
+    """
+    scaled_to = None
+    with Image.open(source_path) as img:
+        target_size = webp_target_size(*img.size)
+        if target_size != img.size:
+            img.thumbnail(target_size, reducing_gap=2.0)
+            scaled_to = img.size
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        img.save(output_path, format='WebP', quality=quality)
+    return os.path.getsize(output_path), scaled_to
+
+
+class ImageCompressionPool:
+    """
+    Compresses downloaded images in a pool of worker processes, so Pillow's
+    decode/encode work runs on every core instead of holding the GIL on a
+    download thread.
+
+    At most `max_processes * queue_per_process` images are queued or being
+    compressed at once. A download thread that finishes an image while the
+    pool is full waits in compress() until a place frees up, which holds
+    back further downloads instead of piling .part files up on disk. If
+    worker processes cannot be started, images are compressed in the
+    calling thread as before. Running the encoder in a child process also
+    means a huge image can only exhaust that child's memory.
+    """
+    def __init__(self, max_processes=IMAGE_COMPRESSION_MAX_PROCESSES,
+                 queue_per_process=IMAGE_COMPRESSION_QUEUE_PER_PROCESS):
+        self.max_processes = max_processes or max(1, (os.cpu_count() or 2) - 1)
+        self._slots = threading.BoundedSemaphore(self.max_processes * max(1, queue_per_process))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._use_processes = True
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None and self._use_processes:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_processes)
+                except (OSError, NotImplementedError, ValueError):
+                    self._use_processes = False
+            return self._executor
+
+    def _reset_executor(self, broken_executor):
+        with self._lock:
+            if self._executor is broken_executor:
+                self._executor = None
+
+    def compress(self, source_path, output_path, cancellation_event=None, quality=IMAGE_COMPRESSION_WEBP_QUALITY):
+        """
+        Compresses `source_path` into `output_path` and returns the result of
+        compress_to_webp(), or None if cancelled while waiting for room in
+        the pool. Errors from Pillow are raised to the caller.
+        """
+        while not self._slots.acquire(timeout=_BACKPRESSURE_POLL_SECONDS):
+            if cancellation_event and cancellation_event.is_set():
+                return None
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return compress_to_webp(source_path, output_path, quality)
+            try:
+                return executor.submit(compress_to_webp, source_path, output_path, quality).result()
+            except BrokenProcessPool:
+                # A worker process died (e.g. killed for memory). Retrying in this process
+                # could take the application down with it, so the caller keeps the original
+                # and a fresh pool is started for the next image.
+                self._reset_executor(executor)
+                raise
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_compression_pool = None
+_compression_pool_lock = threading.Lock()
+
+
+def get_image_compression_pool():
+    """Returns the process-wide compression pool, creating it on first use."""
+    global _compression_pool
+    with _compression_pool_lock:
+        if _compression_pool is None:
+            _compression_pool = ImageCompressionPool()
+        return _compression_pool
+
+
+def shutdown_image_compression_pool():
+    """Stops the worker processes; called when the application exits."""
+    with _compression_pool_lock:
+        if _compression_pool is not None:
+            _compression_pool.shutdown()
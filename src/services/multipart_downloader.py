@@ -1,47 +1,364 @@
 # --- Standard Library Imports ---
 # --- Standard Library Imports ---
 import os
+import json
 import time
-import hashlib
 import http.client
 import traceback
 import threading
 import queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # --- Third-Party Library Imports ---
 import requests
 MULTIPART_DOWNLOADER_AVAILABLE = True
 
+# --- Local Application Imports ---
+from ..utils.http_session import get_session
+from ..utils.download_scheduler import get_download_scheduler
+from ..utils.file_utils import hash_file_content, update_hash_from_file, ContentHasher, HASH_READ_BLOCK_SIZE
+
 # --- Module Constants ---
 CHUNK_DOWNLOAD_RETRY_DELAY = 2
 MAX_CHUNK_DOWNLOAD_RETRIES = 1
 DOWNLOAD_CHUNK_SIZE_ITER = 1024 * 256  # 256 KB per iteration chunk
+MULTIPART_DATA_SUFFIX = ".mpart"       # Preallocated output file that chunks write into
+RANGES_SIDECAR_SUFFIX = ".ranges"      # JSON list of byte ranges already on disk
+RANGES_SIDECAR_VERSION = 1
+RANGE_CHECKPOINT_BYTES = 16 * 1024 * 1024  # Record progress in the sidecar every 16 MB per chunk
+MIN_SEGMENT_SIZE_DEFAULT = 4 * 1024 * 1024  # Ranges are never split below this size
+HASH_MAX_BLOCKS_PER_PASS = 16  # Lets the hashing thread notice a stop request between passes
+
+# Output paths currently being written, so two workers never share one .mpart file.
+_active_outputs = set()
+_active_outputs_lock = threading.Lock()
+
+
+def _merge_ranges(ranges):
+    """Sorts half-open (start, end) ranges and merges the ones that touch or overlap."""
+    merged = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class _RangeTracker:
+    """
+    Thread-safe record of which byte ranges of the preallocated output file
+    hold downloaded data. Every update is persisted to a small JSON sidecar
+    (written to a temp file and swapped in with os.replace) so an interrupted
+    download can resume with only the missing ranges.
+    """
+    def __init__(self, sidecar_path, total_size, completed=None):
+        self.sidecar_path = sidecar_path
+        self.total_size = total_size
+        self._completed = _merge_ranges(completed or [])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, sidecar_path, data_path, total_size):
+        """
+        Restores the ranges recorded by an earlier attempt. Returns an empty
+        tracker if the sidecar is missing, unreadable, or describes a different
+        file size, or if the data file is no longer the preallocated size.
+        """
+        completed = []
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('version') == RANGES_SIDECAR_VERSION and state.get('total_size') == total_size and
+                    os.path.exists(data_path) and os.path.getsize(data_path) == total_size):
+                completed = [(int(start), int(end)) for start, end in state.get('completed', [])]
+        except (OSError, ValueError, TypeError, AttributeError):
+            completed = []
+        return cls(sidecar_path, total_size, completed)
+
+    @property
+    def completed_bytes(self):
+        with self._lock:
+            return sum(end - start for start, end in self._completed)
+
+    def completed_ranges(self):
+        with self._lock:
+            return list(self._completed)
+
+    def is_complete(self):
+        with self._lock:
+            return self._completed == [(0, self.total_size)]
+
+    def missing_in(self, start, end):
+        """Returns the sub-ranges of [start, end) that are not on disk yet."""
+        gaps = []
+        position = start
+        with self._lock:
+            for done_start, done_end in self._completed:
+                if done_end <= position:
+                    continue
+                if done_start >= end:
+                    break
+                if done_start > position:
+                    gaps.append((position, done_start))
+                position = max(position, done_end)
+                if position >= end:
+                    break
+        if position < end:
+            gaps.append((position, end))
+        return gaps
+
+    def add(self, start, end):
+        """Marks [start, end) as written (and synced) and persists the sidecar."""
+        if end <= start:
+            return
+        with self._lock:
+            self._completed = _merge_ranges(self._completed + [(start, end)])
+            self._persist_locked()
+
+    def _persist_locked(self):
+        temp_path = self.sidecar_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': RANGES_SIDECAR_VERSION, 'total_size': self.total_size,
+                           'completed': [list(r) for r in self._completed]}, f)
+            os.replace(temp_path, self.sidecar_path)
+        except OSError:
+            # Losing a checkpoint only means re-downloading that range on resume.
+            pass
+
+    def save(self):
+        with self._lock:
+            self._persist_locked()
+
+    def discard(self):
+        with self._lock:
+            for path in (self.sidecar_path, self.sidecar_path + ".tmp"):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+
+class _InOrderHasher:
+    """
+    Computes the ContentHasher digests of the output file front to back while
+    chunks are still downloading.
+
+    Chunk threads report every range they write; a background thread hashes
+    the part of the file that has become contiguous from byte 0, reading it
+    back in large blocks while it is still in the OS page cache. By the time
+    the last chunk finishes, only the tail written after the final report is
+    left to hash. Ranges already on disk from an earlier session are hashed
+    first, which is the one re-read that cannot be avoided.
+    """
+    def __init__(self, data_path, total_size, written_ranges=None, with_sha256=False):
+        self.data_path = data_path
+        self.total_size = total_size
+        self._hasher = ContentHasher(with_sha256)
+        self._hashed_upto = 0
+        self._written = _merge_ranges(written_ranges or [])
+        self._cond = threading.Condition()
+        self._finishing = False
+        self._stopped = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="MPHasher", daemon=True)
+        self._thread.start()
+
+    def _frontier_locked(self):
+        if self._written and self._written[0][0] == 0:
+            return self._written[0][1]
+        return 0
+
+    def note_written(self, start, end):
+        """Reports that bytes [start, end) are written and visible to other file handles."""
+        if end <= start:
+            return
+        with self._cond:
+            self._written = _merge_ranges(self._written + [(start, end)])
+            if self._frontier_locked() > self._hashed_upto:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._stopped or self._finishing) and self._frontier_locked() <= self._hashed_upto:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                start = self._hashed_upto
+                end = min(self._frontier_locked(), start + HASH_READ_BLOCK_SIZE * HASH_MAX_BLOCKS_PER_PASS)
+                if end <= start:
+                    return  # Finishing and nothing contiguous is left to hash
+            try:
+                hashed = update_hash_from_file(self._hasher, self.data_path, start, end)
+            except OSError as e:
+                self._error = e
+                return
+            with self._cond:
+                self._hashed_upto = start + hashed
+                if hashed < end - start:
+                    self._error = OSError(f"short read at byte {self._hashed_upto}")
+                    return
+
+    def finish(self):
+        """Waits for the remaining contiguous bytes and returns the ContentHasher, or None if incomplete."""
+        with self._cond:
+            self._finishing = True
+            self._cond.notify()
+        self._thread.join()
+        if self._error is not None or self._hashed_upto != self.total_size:
+            return None
+        return self._hasher
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+
+class _Segment:
+    """A byte range [position, end) being fetched by one connection. `end` shrinks when the range is split."""
+    __slots__ = ('start', 'position', 'end', 'owner', 'stolen')
+
+    def __init__(self, start, end, owner, stolen=False):
+        self.start = start
+        self.position = start
+        self.end = end
+        self.owner = owner
+        self.stolen = stolen
+
+    @property
+    def remaining(self):
+        return max(0, self.end - self.position)
+
+
+class _SegmentScheduler:
+    """
+    Hands byte ranges to connection threads and rebalances them as they finish.
+
+    Each connection starts with the missing ranges of its own slice of the
+    file. When its queue runs dry it first takes a queued range from another
+    connection, and otherwise splits the active range with the longest
+    estimated time left (remaining bytes / current speed) and takes its second
+    half. A range is only split while both halves are at least
+    `min_segment_size`, so the tail is not shredded into tiny requests.
+
+    The owner of a split range keeps writing up to its new `end`. Splits
+    always leave at least `min_segment_size` (more than one write) in front
+    of the owner's position, so a write in flight never crosses the new end.
+    """
+    def __init__(self, initial_ranges, progress_data, min_segment_size):
+        self._pending = {conn_id: deque(_Segment(start, end, conn_id) for start, end in ranges)
+                         for conn_id, ranges in initial_ranges.items()}
+        self._active = {}
+        self._lock = threading.Lock()
+        self.progress_data = progress_data
+        self.min_segment_size = max(int(min_segment_size), DOWNLOAD_CHUNK_SIZE_ITER * 2)
+        self.splits = 0
+
+    def next_segment(self, conn_id):
+        """Returns the next range for a connection, or None when there is nothing left worth taking."""
+        with self._lock:
+            self._active.pop(conn_id, None)
+            segment = self._take_pending_locked(conn_id) or self._split_slowest_locked(conn_id)
+            if segment is not None:
+                self._active[conn_id] = segment
+            return segment
+
+    def has_work_for_new_connection(self):
+        """True if a connection started now would find a queued range or one worth splitting."""
+        with self._lock:
+            if any(self._pending.values()):
+                return True
+            return any(segment.remaining >= 2 * self.min_segment_size for segment in self._active.values())
+
+    def release(self, conn_id, segment):
+        """Queues the unfinished rest of a failed connection's range so other connections can take it."""
+        with self._lock:
+            self._active.pop(conn_id, None)
+            if segment is not None and segment.remaining > 0:
+                rest = _Segment(segment.position, segment.end, conn_id)
+                self._pending.setdefault(conn_id, deque()).append(rest)
+
+    def _take_pending_locked(self, conn_id):
+        own_queue = self._pending.get(conn_id)
+        if own_queue:
+            return own_queue.popleft()
+        donors = [donor for donor, queued in self._pending.items() if queued]
+        if not donors:
+            return None
+        donor = max(donors, key=lambda c: sum(s.remaining for s in self._pending[c]))
+        segment = self._pending[donor].pop()
+        self._move_total_locked(donor, conn_id, segment.remaining)
+        segment.owner = conn_id
+        segment.stolen = True
+        return segment
+
+    def _split_slowest_locked(self, conn_id):
+        victim = None
+        victim_eta = -1.0
+        with self.progress_data['lock']:
+            statuses = self.progress_data['chunks_status']
+            for owner, segment in self._active.items():
+                remaining = segment.remaining
+                if remaining < 2 * self.min_segment_size:
+                    continue
+                bytes_per_second = statuses[owner]['speed_bps'] / 8
+                eta = remaining / bytes_per_second if bytes_per_second > 0 else float('inf')
+                if victim is None or eta > victim_eta or (eta == victim_eta and remaining > victim.remaining):
+                    victim, victim_eta = segment, eta
+        if victim is None:
+            return None
+        split_at = victim.position + victim.remaining // 2
+        if split_at - victim.position < self.min_segment_size or victim.end - split_at < self.min_segment_size:
+            return None
+        stolen = _Segment(split_at, victim.end, conn_id, stolen=True)
+        victim.end = split_at
+        self._move_total_locked(victim.owner, conn_id, stolen.end - stolen.start)
+        self.splits += 1
+        return stolen
+
+    def _move_total_locked(self, from_conn, to_conn, byte_count):
+        # Keeps the per-connection totals summing to the file size for the progress display.
+        with self.progress_data['lock']:
+            statuses = self.progress_data['chunks_status']
+            statuses[from_conn]['total'] -= byte_count
+            statuses[to_conn]['total'] += byte_count
 
 
 def _download_individual_chunk(
-    chunk_url, chunk_temp_file_path, start_byte, end_byte, headers,
-    part_num, total_parts, progress_data, cancellation_event,
+    chunk_url, output_path, scheduler, headers,
+    part_num, total_parts, progress_data, range_tracker, hasher, cancellation_event,
     skip_event, pause_event, global_emit_time_ref, cookies_for_chunk,
-    logger_func, emitter=None, api_original_filename=None
+    logger_func, emitter=None, api_original_filename=None, holds_extra_slot=False
 ):
     """
-    Downloads a single segment (chunk) of a larger file to its own unique part file.
+    Runs one download connection: takes ranges from the scheduler and writes
+    them straight into the shared, preallocated output file at their offsets
+    until no range is left worth taking.
     This function is intended to be run in a separate thread by a ThreadPoolExecutor.
 
-    It handles retries, pauses, and cancellations for its specific chunk. If a
-    download fails, the partial chunk file is removed, allowing a clean retry later.
+    Each connection opens its own handle on the output file, so seek + write
+    never races with another thread. Written bytes are flushed, fsynced and
+    recorded in the range tracker at every checkpoint and when a request ends,
+    so a retry (or a later resume) continues from the last recorded byte
+    instead of starting the range over. If the scheduler shortens the current
+    range, the connection stops at the new end and drops the rest of the reply.
 
     Args:
         chunk_url (str): The URL to download the file from.
-        chunk_temp_file_path (str): The unique path to save this specific chunk
-                                    (e.g., 'my_video.mp4.part0').
-        start_byte (int): The starting byte for the Range header.
-        end_byte (int): The ending byte for the Range header.
+        output_path (str): The preallocated file shared by all chunks.
+        scheduler (_SegmentScheduler): Hands out and rebalances byte ranges.
         headers (dict): The HTTP headers to use for the request.
-        part_num (int): The index of this chunk (e.g., 0 for the first part).
-        total_parts (int): The total number of chunks for the entire file.
+        part_num (int): The index of this connection (e.g., 0 for the first part).
+        total_parts (int): The total number of connections for the entire file.
         progress_data (dict): A thread-safe dictionary for sharing progress.
+        range_tracker (_RangeTracker): Records completed ranges in the sidecar.
+        hasher (_InOrderHasher): Receives every written range for in-order hashing.
         cancellation_event (threading.Event): Event to signal cancellation.
         skip_event (threading.Event): Event to signal skipping the file.
         pause_event (threading.Event): Event to signal pausing the download.
@@ -51,10 +368,14 @@ def _download_individual_chunk(
         logger_func (function): A function to log messages.
         emitter (queue.Queue or QObject): Emitter for sending progress to the UI.
         api_original_filename (str): The original filename for UI display.
+        holds_extra_slot (bool): True if this connection borrowed a slot from the global
+                                 download scheduler; it is handed back between ranges
+                                 as soon as another file is waiting for one.
 
     Returns:
         tuple: A tuple containing (bytes_downloaded, success_flag).
     """
+    download_scheduler = get_download_scheduler()
     # --- Pre-download checks for control events ---
     if cancellation_event and cancellation_event.is_set():
         logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Download cancelled before start.")
@@ -74,90 +395,131 @@ def _download_individual_chunk(
     # Set this chunk's status to 'active' before starting the download.
     with progress_data['lock']:
         progress_data['chunks_status'][part_num]['active'] = True
+        bytes_before_this_run = progress_data['chunks_status'][part_num]['downloaded']
 
+    bytes_this_chunk = 0
+    segment = None
+    last_speed_calc_time = time.time()
+    bytes_at_last_speed_calc = 0
     try:
-        # Prepare headers for the specific byte range of this chunk
-        chunk_headers = headers.copy()
-        if end_byte != -1:
-            chunk_headers['Range'] = f"bytes={start_byte}-{end_byte}"
-
-        bytes_this_chunk = 0
-        last_speed_calc_time = time.time()
-        bytes_at_last_speed_calc = 0
-
-        # --- Retry Loop ---
-        for attempt in range(MAX_CHUNK_DOWNLOAD_RETRIES + 1):
-            if cancellation_event and cancellation_event.is_set():
-                return bytes_this_chunk, False
-
-            try:
-                if attempt > 0:
-                    logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Retrying (Attempt {attempt + 1}/{MAX_CHUNK_DOWNLOAD_RETRIES + 1})...")
-                    time.sleep(CHUNK_DOWNLOAD_RETRY_DELAY * (2 ** (attempt - 1)))
-                    last_speed_calc_time = time.time()
-                    bytes_at_last_speed_calc = bytes_this_chunk
-
-                logger_func(f"   🚀 [Chunk {part_num + 1}/{total_parts}] Starting download: bytes {start_byte}-{end_byte if end_byte != -1 else 'EOF'}")
-
-                response = requests.get(chunk_url, headers=chunk_headers, timeout=(10, 120), stream=True, cookies=cookies_for_chunk)
-                response.raise_for_status()
-
-                # --- Data Writing Loop ---
-                # We open the unique chunk file in write-binary ('wb') mode.
-                # No more seeking is required.
-                with open(chunk_temp_file_path, 'wb') as f:
-                    for data_segment in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE_ITER):
-                        if cancellation_event and cancellation_event.is_set():
-                            return bytes_this_chunk, False
-                        if pause_event and pause_event.is_set():
-                            # Handle pausing during the download stream
-                            logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Paused...")
-                            while pause_event.is_set():
-                                if cancellation_event and cancellation_event.is_set(): return bytes_this_chunk, False
-                                time.sleep(0.2)
-                            logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Resumed.")
-
-                        if data_segment:
-                            f.write(data_segment)
-                            bytes_this_chunk += len(data_segment)
-
-                            # Update shared progress data structure
-                            with progress_data['lock']:
-                                progress_data['total_downloaded_so_far'] += len(data_segment)
-                                progress_data['chunks_status'][part_num]['downloaded'] = bytes_this_chunk
-
-                                # Calculate and update speed for this chunk
-                                current_time = time.time()
-                                time_delta = current_time - last_speed_calc_time
-                                if time_delta > 0.5:
-                                    bytes_delta = bytes_this_chunk - bytes_at_last_speed_calc
-                                    current_speed_bps = (bytes_delta * 8) / time_delta if time_delta > 0 else 0
-                                    progress_data['chunks_status'][part_num]['speed_bps'] = current_speed_bps
-                                    last_speed_calc_time = current_time
-                                    bytes_at_last_speed_calc = bytes_this_chunk
-
-                                # Emit progress signal to the UI via the queue
-                                if emitter and (current_time - global_emit_time_ref[0] > 0.25):
-                                    global_emit_time_ref[0] = current_time
-                                    status_list_copy = [dict(s) for s in progress_data['chunks_status']]
-                                    if isinstance(emitter, queue.Queue):
-                                        emitter.put({'type': 'file_progress', 'payload': (api_original_filename, status_list_copy)})
-                                    elif hasattr(emitter, 'file_progress_signal'):
-                                        emitter.file_progress_signal.emit(api_original_filename, status_list_copy)
-
-                # If we get here, the download for this chunk is successful
-                return bytes_this_chunk, True
-
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, http.client.IncompleteRead) as e:
-                logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Retryable error: {e}")
-            except requests.exceptions.RequestException as e:
-                logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Non-retryable error: {e}")
-                return bytes_this_chunk, False # Break loop on non-retryable errors
-            except Exception as e:
-                logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Unexpected error: {e}\n{traceback.format_exc(limit=1)}")
-                return bytes_this_chunk, False
-
-        # If the retry loop finishes without a successful download
+        with open(output_path, 'r+b') as out_file:
+            while True:
+                if holds_extra_slot and download_scheduler.has_waiters():
+                    # Other files are queued for a connection; give the borrowed slot back.
+                    return bytes_this_chunk, True
+                segment = scheduler.next_segment(part_num)
+                if segment is None:
+                    return bytes_this_chunk, True
+                if segment.stolen:
+                    logger_func(f"   🔀 [Chunk {part_num + 1}/{total_parts}] Taking over bytes {segment.position}-{segment.end - 1}.")
+
+                # --- Retry Loop ---
+                for attempt in range(MAX_CHUNK_DOWNLOAD_RETRIES + 1):
+                    if cancellation_event and cancellation_event.is_set():
+                        return bytes_this_chunk, False
+
+                    checkpoint_start = segment.position
+                    try:
+                        if attempt > 0:
+                            logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Retrying from byte {segment.position} (Attempt {attempt + 1}/{MAX_CHUNK_DOWNLOAD_RETRIES + 1})...")
+                            time.sleep(CHUNK_DOWNLOAD_RETRY_DELAY * (2 ** (attempt - 1)))
+                            last_speed_calc_time = time.time()
+                            bytes_at_last_speed_calc = bytes_this_chunk
+
+                        logger_func(f"   🚀 [Chunk {part_num + 1}/{total_parts}] Starting download: bytes {segment.position}-{segment.end - 1}")
+
+                        # Prepare headers for the specific byte range still missing
+                        chunk_headers = headers.copy()
+                        chunk_headers['Range'] = f"bytes={segment.position}-{segment.end - 1}"
+                        response = get_session(chunk_url, cookies=cookies_for_chunk).get(chunk_url, headers=chunk_headers, timeout=(10, 120), stream=True, cancellation_event=cancellation_event)
+                        try:
+                            response.raise_for_status()
+                            if response.status_code != 206:
+                                # Writing a full-body reply at this offset would corrupt the file.
+                                logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Server ignored the Range request (HTTP {response.status_code}).")
+                                scheduler.release(part_num, segment)
+                                return bytes_this_chunk, False
+
+                            # --- Data Writing Loop ---
+                            out_file.seek(segment.position)
+                            for data_segment in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE_ITER):
+                                if cancellation_event and cancellation_event.is_set():
+                                    return bytes_this_chunk, False
+                                if pause_event and pause_event.is_set():
+                                    # Handle pausing during the download stream
+                                    logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Paused...")
+                                    while pause_event.is_set():
+                                        if cancellation_event and cancellation_event.is_set(): return bytes_this_chunk, False
+                                        time.sleep(0.2)
+                                    logger_func(f"   [Chunk {part_num + 1}/{total_parts}] Resumed.")
+
+                                if not data_segment:
+                                    continue
+                                position = segment.position
+                                # `end` may have been moved back by a split since the request was sent.
+                                data_segment = data_segment[:segment.end - position]
+                                download_scheduler.throttle(len(data_segment), cancellation_event)
+                                out_file.write(data_segment)
+                                out_file.flush()
+                                hasher.note_written(position, position + len(data_segment))
+                                segment.position = position + len(data_segment)
+                                bytes_this_chunk += len(data_segment)
+
+                                if segment.position - checkpoint_start >= RANGE_CHECKPOINT_BYTES:
+                                    os.fsync(out_file.fileno())
+                                    range_tracker.add(checkpoint_start, segment.position)
+                                    checkpoint_start = segment.position
+
+                                # Update shared progress data structure
+                                with progress_data['lock']:
+                                    progress_data['total_downloaded_so_far'] += len(data_segment)
+                                    progress_data['chunks_status'][part_num]['downloaded'] = bytes_before_this_run + bytes_this_chunk
+
+                                    # Calculate and update speed for this chunk
+                                    current_time = time.time()
+                                    time_delta = current_time - last_speed_calc_time
+                                    if time_delta > 0.5:
+                                        bytes_delta = bytes_this_chunk - bytes_at_last_speed_calc
+                                        current_speed_bps = (bytes_delta * 8) / time_delta if time_delta > 0 else 0
+                                        progress_data['chunks_status'][part_num]['speed_bps'] = current_speed_bps
+                                        last_speed_calc_time = current_time
+                                        bytes_at_last_speed_calc = bytes_this_chunk
+
+                                    # Emit progress signal to the UI via the queue
+                                    if emitter and (current_time - global_emit_time_ref[0] > 0.25):
+                                        global_emit_time_ref[0] = current_time
+                                        status_list_copy = [dict(s) for s in progress_data['chunks_status']]
+                                        if isinstance(emitter, queue.Queue):
+                                            emitter.put({'type': 'file_progress', 'payload': (api_original_filename, status_list_copy)})
+                                        elif hasattr(emitter, 'file_progress_signal'):
+                                            emitter.file_progress_signal.emit(api_original_filename, status_list_copy)
+
+                                if segment.position >= segment.end:
+                                    break
+                        finally:
+                            response.close()
+                            if segment.position > checkpoint_start:
+                                os.fsync(out_file.fileno())
+                                range_tracker.add(checkpoint_start, segment.position)
+
+                        if segment.position >= segment.end:
+                            break  # This range is complete, ask the scheduler for the next one
+                        logger_func(f"   ⚠️ [Chunk {part_num + 1}/{total_parts}] Stream ended early at byte {segment.position} of {segment.end}.")
+
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, http.client.IncompleteRead) as e:
+                        logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Retryable error: {e}")
+                    except requests.exceptions.RequestException as e:
+                        logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Non-retryable error: {e}")
+                        scheduler.release(part_num, segment)
+                        return bytes_this_chunk, False # Break loop on non-retryable errors
+
+                if segment.position < segment.end:
+                    # The retry loop finished without completing this range; let another connection try.
+                    scheduler.release(part_num, segment)
+                    return bytes_this_chunk, False
+    except Exception as e:
+        logger_func(f"   ❌ [Chunk {part_num + 1}/{total_parts}] Unexpected error: {e}\n{traceback.format_exc(limit=1)}")
+        scheduler.release(part_num, segment)
         return bytes_this_chunk, False
     finally:
         # This block runs whether the download succeeded or failed
@@ -166,24 +528,41 @@ def _download_individual_chunk(
             progress_data['chunks_status'][part_num]['speed_bps'] = 0.0
 
 
+def _run_connection(borrowed_slot, **connection_kwargs):
+    """Runs one connection and returns its borrowed scheduler slot, if any, when it ends."""
+    try:
+        return _download_individual_chunk(**connection_kwargs)
+    finally:
+        if borrowed_slot:
+            get_download_scheduler().release()
+
+
 def download_file_in_parts(file_url, save_path, total_size, num_parts, headers, api_original_filename,
                            emitter_for_multipart, cookies_for_chunk_session,
-                           cancellation_event, skip_event, logger_func, pause_event):
+                           cancellation_event, skip_event, logger_func, pause_event,
+                           min_segment_size=MIN_SEGMENT_SIZE_DEFAULT, with_sha256=False):
     """
-    Manages a resilient, multipart file download by saving each chunk to a separate file.
+    Manages a resilient, multipart file download into a single preallocated file.
 
     This function orchestrates the download process by:
-    1. Checking for already completed chunk files to resume a previous download.
-    2. Submitting only the missing chunks to a thread pool for parallel download.
-    3. Assembling the final file from the individual chunks upon successful completion.
-    4. Cleaning up temporary chunk files after assembly.
-    5. Leaving completed chunks on disk if the download fails, allowing for a future resume.
+    1. Preallocating '<save_path>.mpart' at the full size (or reopening it when
+       its '.ranges' sidecar shows an earlier attempt for the same size).
+    2. Running up to `num_parts` connections that write directly at their own
+       offsets in the shared file. Each starts on the missing ranges of its
+       own slice; a connection that runs out of work takes half of the slowest
+       remaining range (see _SegmentScheduler), so one slow connection does
+       not hold up the whole file.
+    3. Hashing the file in order while it downloads (see _InOrderHasher), then
+       renaming it to save_path once the sidecar covers every byte. There is
+       no assembly pass and no per-chunk temp files.
+    4. Leaving the .mpart file and its sidecar on disk if the download fails,
+       allowing for a future resume.
 
     Args:
         file_url (str): The URL of the file to download.
         save_path (str): The final desired path for the downloaded file (e.g., 'my_video.mp4').
         total_size (int): The total size of the file in bytes.
-        num_parts (int): The number of parts to split the download into.
+        num_parts (int): The maximum number of connections used for the file.
         headers (dict): HTTP headers for the download requests.
         api_original_filename (str): The original filename for UI progress display.
         emitter_for_multipart (queue.Queue or QObject): Emitter for UI signals.
@@ -192,45 +571,68 @@ def download_file_in_parts(file_url, save_path, total_size, num_parts, headers,
         skip_event (threading.Event): Event to signal skipping the file.
         logger_func (function): A function for logging messages.
         pause_event (threading.Event): Event to signal pausing the download.
+        min_segment_size (int): Smallest range, in bytes, that splitting may produce.
+        with_sha256 (bool): Also compute the SHA-256 of the file.
 
     Returns:
-        tuple: A tuple containing (success_flag, total_bytes_downloaded, md5_hash, file_handle).
-               The file_handle will be for the final assembled file if successful, otherwise None.
+        tuple: A tuple containing (success_flag, total_bytes_downloaded, content_hasher, file_handle).
+               content_hasher is a ContentHasher holding the file's digests.
+               The file_handle will be for the final file if successful, otherwise None.
     """
     logger_func(f"⬇️ Initializing Resumable Multi-part Download ({num_parts} parts) for: '{api_original_filename}' (Size: {total_size / (1024*1024):.2f} MB)")
 
-    # Calculate the byte range for each chunk
+    output_key = os.path.abspath(save_path)
+    with _active_outputs_lock:
+        if output_key in _active_outputs:
+            logger_func(f"   ⚠️ '{api_original_filename}' is already being downloaded to the same path. Skipping multi-part attempt.")
+            return False, 0, None, None
+        _active_outputs.add(output_key)
+    try:
+        return _download_into_preallocated_file(
+            file_url, save_path, total_size, num_parts, headers, api_original_filename,
+            emitter_for_multipart, cookies_for_chunk_session,
+            cancellation_event, skip_event, logger_func, pause_event, min_segment_size, with_sha256
+        )
+    finally:
+        with _active_outputs_lock:
+            _active_outputs.discard(output_key)
+
+
+def _download_into_preallocated_file(file_url, save_path, total_size, num_parts, headers, api_original_filename,
+                                     emitter_for_multipart, cookies_for_chunk_session,
+                                     cancellation_event, skip_event, logger_func, pause_event, min_segment_size,
+                                     with_sha256):
+    data_path = save_path + MULTIPART_DATA_SUFFIX
+    range_tracker = _RangeTracker.load(data_path + RANGES_SIDECAR_SUFFIX, data_path, total_size)
+
+    # Calculate the half-open byte range each connection starts with
     chunk_size_calc = total_size // num_parts
     chunks_ranges = []
     for i in range(num_parts):
         start = i * chunk_size_calc
-        end = start + chunk_size_calc - 1 if i < num_parts - 1 else total_size - 1
-        if start <= end:
+        end = start + chunk_size_calc if i < num_parts - 1 else total_size
+        if start < end:
             chunks_ranges.append((start, end))
-        elif total_size == 0 and i == 0: # Handle zero-byte files
-            chunks_ranges.append((0, -1))
-
-    # Calculate the expected size of each chunk
-    chunk_actual_sizes = []
-    for start, end in chunks_ranges:
-        chunk_actual_sizes.append(end - start + 1 if end != -1 else 0)
 
     if not chunks_ranges and total_size > 0:
         logger_func(f"   ⚠️ No valid chunk ranges for multipart download of '{api_original_filename}'. Aborting.")
         return False, 0, None, None
 
-    # --- Resumption Logic: Check for existing complete chunks ---
-    chunks_to_download = []
-    total_bytes_resumed = 0
-    for i, (start, end) in enumerate(chunks_ranges):
-        chunk_part_path = f"{save_path}.part{i}"
-        expected_chunk_size = chunk_actual_sizes[i]
-
-        if os.path.exists(chunk_part_path) and os.path.getsize(chunk_part_path) == expected_chunk_size:
-            logger_func(f"   [Chunk {i + 1}/{num_parts}] Resuming with existing complete chunk file.")
-            total_bytes_resumed += expected_chunk_size
+    # --- Preallocation / Resumption ---
+    try:
+        if range_tracker.completed_bytes == 0:
+            # truncate() extends the file without writing data, so this is sparse
+            # (or lazily zero-filled) on common filesystems.
+            with open(data_path, 'wb') as f:
+                f.truncate(total_size)
         else:
-            chunks_to_download.append({'index': i, 'start': start, 'end': end})
+            logger_func(f"   Resuming '{api_original_filename}': {range_tracker.completed_bytes / (1024*1024):.2f} MB already on disk.")
+        range_tracker.save()
+    except OSError as e:
+        logger_func(f"   ❌ Could not preallocate '{data_path}': {e}")
+        return False, 0, None, None
+
+    total_bytes_resumed = range_tracker.completed_bytes
 
     # Setup the shared progress data structure
     progress_data = {
@@ -240,86 +642,96 @@ def download_file_in_parts(file_url, save_path, total_size, num_parts, headers,
         'lock': threading.Lock(),
         'last_global_emit_time': [time.time()]
     }
-    for i in range(num_parts):
-        is_resumed = not any(c['index'] == i for c in chunks_to_download)
+    initial_ranges = {}
+    for i, (start, end) in enumerate(chunks_ranges):
+        initial_ranges[i] = range_tracker.missing_in(start, end)
+        missing_bytes = sum(seg_end - seg_start for seg_start, seg_end in initial_ranges[i])
         progress_data['chunks_status'].append({
             'id': i,
-            'downloaded': chunk_actual_sizes[i] if is_resumed else 0,
-            'total': chunk_actual_sizes[i],
+            'downloaded': (end - start) - missing_bytes,
+            'total': end - start,
             'active': False,
             'speed_bps': 0.0
         })
+    scheduler = _SegmentScheduler(initial_ranges, progress_data, min_segment_size)
+    hasher = _InOrderHasher(data_path, total_size, range_tracker.completed_ranges(), with_sha256)
 
     # --- Download Phase ---
-    chunk_futures = []
     all_chunks_successful = True
     total_bytes_from_threads = 0
 
-    with ThreadPoolExecutor(max_workers=num_parts, thread_name_prefix=f"MPChunk_{api_original_filename[:10]}_") as chunk_pool:
-        for chunk_info in chunks_to_download:
-            if cancellation_event and cancellation_event.is_set():
-                all_chunks_successful = False
-                break
-            
-            i, start, end = chunk_info['index'], chunk_info['start'], chunk_info['end']
-            chunk_part_path = f"{save_path}.part{i}"
-            
+    if not range_tracker.is_complete() and total_size > 0:
+        download_scheduler = get_download_scheduler()
+        running = {}  # future -> connection id
+
+        def start_connection(conn_id, holds_extra_slot):
             future = chunk_pool.submit(
-                _download_individual_chunk,
-                chunk_url=file_url,
-                chunk_temp_file_path=chunk_part_path,
-                start_byte=start, end_byte=end, headers=headers, part_num=i, total_parts=num_parts,
-                progress_data=progress_data, cancellation_event=cancellation_event,
-                skip_event=skip_event, global_emit_time_ref=progress_data['last_global_emit_time'],
+                _run_connection, holds_extra_slot,
+                chunk_url=file_url, output_path=data_path, scheduler=scheduler,
+                headers=headers, part_num=conn_id, total_parts=len(chunks_ranges),
+                progress_data=progress_data, range_tracker=range_tracker, hasher=hasher,
+                cancellation_event=cancellation_event, skip_event=skip_event,
+                global_emit_time_ref=progress_data['last_global_emit_time'],
                 pause_event=pause_event, cookies_for_chunk=cookies_for_chunk_session,
                 logger_func=logger_func, emitter=emitter_for_multipart,
-                api_original_filename=api_original_filename
+                api_original_filename=api_original_filename, holds_extra_slot=holds_extra_slot
             )
-            chunk_futures.append(future)
-
-        for future in as_completed(chunk_futures):
-            if cancellation_event and cancellation_event.is_set():
-                all_chunks_successful = False
-            bytes_downloaded, success = future.result()
-            total_bytes_from_threads += bytes_downloaded
-            if not success:
-                all_chunks_successful = False
+            running[future] = conn_id
+
+        with ThreadPoolExecutor(max_workers=len(chunks_ranges), thread_name_prefix=f"MPChunk_{api_original_filename[:10]}_") as chunk_pool:
+            # Connection 0 runs on the slot the caller already holds for this file;
+            # the others borrow spare slots from the global download scheduler.
+            start_connection(0, False)
+            for i in range(1, len(chunks_ranges)):
+                if not download_scheduler.try_acquire_extra():
+                    break
+                start_connection(i, True)
+            if len(running) < len(chunks_ranges):
+                logger_func(f"   Connection budget: starting '{api_original_filename}' on {len(running)} of {len(chunks_ranges)} connections.")
+
+            while running:
+                done, _ = wait(list(running), timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    bytes_downloaded, success = future.result()
+                    total_bytes_from_threads += bytes_downloaded
+                    if not success:
+                        all_chunks_successful = False
+                if cancellation_event and cancellation_event.is_set():
+                    continue
+                # Pick up slots freed by downloads that finished elsewhere.
+                idle_conn_ids = sorted(set(range(len(chunks_ranges))) - set(running.values()))
+                if (idle_conn_ids and running and scheduler.has_work_for_new_connection() and
+                        download_scheduler.try_acquire_extra()):
+                    start_connection(idle_conn_ids[0], True)
 
     total_bytes_final = total_bytes_resumed + total_bytes_from_threads
+    if scheduler.splits:
+        logger_func(f"   🔀 Rebalanced '{api_original_filename}' {scheduler.splits} time(s) across idle connections.")
 
     if cancellation_event and cancellation_event.is_set():
         logger_func(f"   Multi-part download for '{api_original_filename}' cancelled by main event.")
         all_chunks_successful = False
+    elif not all_chunks_successful and range_tracker.is_complete():
+        # A connection failed, but the others picked up the range it released.
+        all_chunks_successful = True
 
-    # --- Assembly and Cleanup Phase ---
-    if all_chunks_successful and (total_bytes_final == total_size or total_size == 0):
-        logger_func(f"   ✅ All {num_parts} chunks complete. Assembling final file...")
-        md5_hasher = hashlib.md5()
+    # --- Finalize: the data is already in place, so only a rename remains ---
+    if all_chunks_successful and (range_tracker.is_complete() or total_size == 0):
         try:
-            with open(save_path, 'wb') as final_file:
-                for i in range(num_parts):
-                    chunk_part_path = f"{save_path}.part{i}"
-                    with open(chunk_part_path, 'rb') as chunk_file:
-                        content = chunk_file.read()
-                        final_file.write(content)
-                        md5_hasher.update(content)
-            
-            calculated_hash = md5_hasher.hexdigest()
-            logger_func(f"   ✅ Assembly successful for '{api_original_filename}'. Total bytes: {total_bytes_final}")
-            return True, total_bytes_final, calculated_hash, open(save_path, 'rb')
-        except Exception as e:
-            logger_func(f"   ❌ Critical error during file assembly: {e}. Cleaning up.")
+            content_hasher = hasher.finish()
+            if content_hasher is None:
+                logger_func(f"   ⚠️ In-order hashing did not cover '{api_original_filename}'. Hashing the finished file instead.")
+                content_hasher = hash_file_content(data_path, with_sha256)
+            os.replace(data_path, save_path)
+            range_tracker.discard()
+            logger_func(f"   ✅ All {len(chunks_ranges)} chunks complete for '{api_original_filename}'. Total bytes: {total_size}")
+            return True, total_size, content_hasher, open(save_path, 'rb')
+        except OSError as e:
+            logger_func(f"   ❌ Critical error finalizing '{api_original_filename}': {e}")
             return False, total_bytes_final, None, None
-        finally:
-            # Cleanup all individual chunk files after successful assembly
-            for i in range(num_parts):
-                chunk_part_path = f"{save_path}.part{i}"
-                if os.path.exists(chunk_part_path):
-                    try:
-                        os.remove(chunk_part_path)
-                    except OSError as e:
-                        logger_func(f"    ⚠️ Failed to remove temp part file '{chunk_part_path}': {e}")
     else:
+        hasher.stop()
         # If download failed, we do NOT clean up, allowing for resumption later
-        logger_func(f"   ❌ Multi-part download failed for '{api_original_filename}'. Success: {all_chunks_successful}, Bytes: {total_bytes_final}/{total_size}. Partial chunks saved for future resumption.")
+        logger_func(f"   ❌ Multi-part download failed for '{api_original_filename}'. Success: {all_chunks_successful}, Bytes: {range_tracker.completed_bytes}/{total_size}. Partial data saved for future resumption.")
         return False, total_bytes_final, None, None
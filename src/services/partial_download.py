@@ -0,0 +1,190 @@
+# --- Standard Library Imports ---
+import os
+import re
+import json
+import threading
+
+# --- Local Application Imports ---
+from ..utils.file_utils import update_hash_from_file, ContentHasher
+
+# --- Module Constants ---
+PARTIAL_META_SUFFIX = ".meta"  # Sidecar next to the .part file holding the resume validators
+PARTIAL_META_VERSION = 1
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", re.IGNORECASE)
+
+# .part paths currently being written, so two threads never append to the same file.
+_claimed_paths = set()
+_claimed_paths_lock = threading.Lock()
+
+
+def claim_part_path(part_path):
+    """Reserves a .part path for the calling download. Returns False if another download holds it."""
+    key = os.path.abspath(part_path)
+    with _claimed_paths_lock:
+        if key in _claimed_paths:
+            return False
+        _claimed_paths.add(key)
+        return True
+
+
+def release_part_path(part_path):
+    with _claimed_paths_lock:
+        _claimed_paths.discard(os.path.abspath(part_path))
+
+
+def parse_content_range(value):
+    """Parses 'bytes start-end/total' into (start, end, total); total is None for '*'."""
+    match = _CONTENT_RANGE_PATTERN.match(value or "")
+    if not match:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), (None if total == '*' else int(total))
+
+
+class PartialDownload:
+    """
+    A single-stream .part file that can be continued with an HTTP Range request.
+
+    The sidecar '<part>.meta' stores the URL, the ETag / Last-Modified
+    validators and the full size seen when the download started. A resumed
+    request sends 'Range: bytes=N-' plus 'If-Range' with the strongest
+    validator, so a server whose copy changed answers 200 with the whole
+    body instead of a mismatching tail.
+
+    The hash of the bytes already in the .part file is kept in memory across
+    retries of the same download, so a retry does not re-read the file. A
+    hashlib object cannot be serialized, so resuming a .part file left by an
+    earlier session re-hashes its prefix once, with large reads.
+    """
+    def __init__(self, part_path, url):
+        self.part_path = part_path
+        self.meta_path = part_path + PARTIAL_META_SUFFIX
+        self.url = url
+        self._meta = self._load_meta()
+        self._hasher = None
+        self._hashed_bytes = 0
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') == PARTIAL_META_VERSION and meta.get('url') == self.url:
+                return meta
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    @property
+    def resume_offset(self):
+        """Number of bytes that can be resumed from, or 0 if the .part file cannot be continued."""
+        if not self._meta or not os.path.exists(self.part_path):
+            return 0
+        size = os.path.getsize(self.part_path)
+        total = self._meta.get('total_size') or 0
+        return size if 0 < size < total else 0
+
+    @property
+    def can_resume(self):
+        """True if resume metadata was recorded, i.e. keeping the .part file is worthwhile."""
+        return self._meta is not None
+
+    def request_headers(self, base_headers):
+        """Returns the headers for the next attempt, adding Range/If-Range when resuming."""
+        headers = dict(base_headers)
+        offset = self.resume_offset
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            validator = self._meta.get('etag') or self._meta.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+        return headers
+
+    def start_offset_for(self, response):
+        """
+        Returns where the body of `response` belongs in the .part file: the
+        resume offset for a matching 206 reply, otherwise 0 (start over).
+        """
+        offset = self.resume_offset
+        if not offset or response.status_code != 206:
+            return 0
+        content_range = parse_content_range(response.headers.get('Content-Range'))
+        if not content_range:
+            return 0
+        start, _, total = content_range
+        if start != offset or (total is not None and total != self._meta.get('total_size')):
+            return 0
+        etag = response.headers.get('ETag')
+        if etag and self._meta.get('etag') and etag != self._meta['etag']:
+            return 0
+        return offset
+
+    @staticmethod
+    def total_size_for(response):
+        """Full size of the file behind `response`, taking a 206 Content-Range into account."""
+        if response.status_code == 206:
+            content_range = parse_content_range(response.headers.get('Content-Range'))
+            if content_range and content_range[2] is not None:
+                return content_range[2]
+        return int(response.headers.get('Content-Length', 0) or 0)
+
+    def begin(self, response, start_offset, total_size, with_sha256=False):
+        """
+        Prepares for writing the body of `response` at `start_offset` and
+        returns the ContentHasher, positioned at that offset. When starting
+        over, the validators are recorded if the server supports byte ranges.
+        """
+        if start_offset == 0:
+            self._hasher = ContentHasher(with_sha256)
+            self._hashed_bytes = 0
+            accepts_ranges = ('bytes' in response.headers.get('Accept-Ranges', '').lower() or
+                              response.status_code == 206)
+            if accepts_ranges and total_size > 0:
+                self._meta = {
+                    'version': PARTIAL_META_VERSION,
+                    'url': self.url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'total_size': total_size,
+                }
+                self._write_meta()
+            else:
+                self._meta = None
+                self.discard_meta()
+        elif (self._hasher is None or self._hashed_bytes != start_offset or
+              self._hasher.with_sha256 != with_sha256):
+            # Resuming a .part file from an earlier session: hash its prefix once.
+            self._hasher = ContentHasher(with_sha256)
+            self._hashed_bytes = update_hash_from_file(self._hasher, self.part_path, 0, start_offset)
+        return self._hasher
+
+    def note_written(self, byte_count):
+        """Records bytes that were both written to the .part file and fed to the hasher."""
+        self._hashed_bytes += byte_count
+
+    def _write_meta(self):
+        temp_path = self.meta_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._meta, f)
+            os.replace(temp_path, self.meta_path)
+        except OSError:
+            pass
+
+    def discard_meta(self):
+        if os.path.exists(self.meta_path):
+            try:
+                os.remove(self.meta_path)
+            except OSError:
+                pass
+
+    def discard(self):
+        """Removes the .part file and its sidecar."""
+        self.discard_meta()
+        self._hasher = None
+        self._hashed_bytes = 0
+        if os.path.exists(self.part_path):
+            try:
+                os.remove(self.part_path)
+            except OSError:
+                pass
@@ -22,6 +22,7 @@ from ..main_window import get_app_icon_object
 from ...core.api_client import download_from_api
 from ...utils.network_utils import extract_post_info, prepare_cookies_for_request
 from ...utils.resolution import get_dark_theme
+from ...utils.creator_index import load_creator_records, CreatorIndexAborted
 
 
 class PostsFetcherThread (QThread ):
@@ -449,51 +450,30 @@ class EmptyPopupDialog (QDialog ):
             QCoreApplication .processEvents ()
             return 
 
-        try :
-            with open (creators_file_path ,'r',encoding ='utf-8')as f :
-                data =json .load (f )
+        def _keep_loading (entries_read ):
             QCoreApplication .processEvents ()
-            if not self .isVisible ():return 
-
-            raw_data_list =[]
-            if isinstance (data ,list )and len (data )>0 and isinstance (data [0 ],list ):
-                raw_data_list =data [0 ]
-            elif isinstance (data ,list )and all (isinstance (item ,dict )for item in data ):
-                raw_data_list =data 
-            else :
-                self .list_widget .addItem ("Error: Invalid format in creators.json.")
-                self .all_creators_data =[]
-                self .progress_bar .setVisible (False );QCoreApplication .processEvents ();return 
-
-
-            unique_creators_map ={}
-            duplicates_skipped_count =0 
-            for creator_entry in raw_data_list :
-                service =creator_entry .get ('service')
-                creator_id =creator_entry .get ('id')
-                name_for_log =creator_entry .get ('name','Unknown')
-
-                if service and creator_id :
-                    key =(str (service ).lower ().strip (),str (creator_id ).strip ())
-                    if key not in unique_creators_map :
-                        unique_creators_map [key ]=creator_entry 
-                    else :
-                        duplicates_skipped_count +=1 
-                else :
-                    print (f"Warning: Creator entry in creators.json missing service or ID: {name_for_log }")
+            return self .isVisible ()
 
-            self .all_creators_data =list (unique_creators_map .values ())
+        index_cache_path =os .path .join (self .app_base_dir ,"appdata","creators_index.json")if self .app_base_dir else None 
+        try :
+            self .all_creators_data ,duplicates_skipped_count =load_creator_records (
+            creators_file_path ,index_cache_path ,progress_callback =_keep_loading )
             if duplicates_skipped_count >0 :
                 print (f"INFO (Creator Popup): Skipped {duplicates_skipped_count } duplicate creator entries from creators.json based on (service, id).")
-
-            self .all_creators_data .sort (key =lambda c :(-c .get ('favorited',0 ),c .get ('name','').lower ()))
             QCoreApplication .processEvents ()
             if not self .isVisible ():return 
 
+        except CreatorIndexAborted :
+            self .all_creators_data =[]
+            return 
         except json .JSONDecodeError :
             self .list_widget .addItem ("Error: Could not parse creators.json.")
             self .all_creators_data =[]
             self .progress_bar .setVisible (False );QCoreApplication .processEvents ();return 
+        except ValueError :
+            self .list_widget .addItem ("Error: Invalid format in creators.json.")
+            self .all_creators_data =[]
+            self .progress_bar .setVisible (False );QCoreApplication .processEvents ();return 
         except Exception as e :
             self .list_widget .addItem (f"Error loading creators: {e }")
             self .all_creators_data =[]
@@ -17,7 +17,10 @@ from ...config.constants import (
     THEME_KEY, LANGUAGE_KEY, DOWNLOAD_LOCATION_KEY,
     RESOLUTION_KEY, UI_SCALE_KEY, SAVE_CREATOR_JSON_KEY,
     COOKIE_TEXT_KEY, USE_COOKIE_KEY,
-    FETCH_FIRST_KEY ### ADDED ###
+    FETCH_FIRST_KEY, ### ADDED ###
+    INCREMENTAL_SYNC_KEY, OLDEST_FIRST_STRATEGY_KEY, OLDEST_FIRST_MERGE, OLDEST_FIRST_REVERSE_PAGES,
+    DOWNLOAD_MAX_CONNECTIONS_KEY, DOWNLOAD_MAX_CONNECTIONS_DEFAULT,
+    DOWNLOAD_BANDWIDTH_LIMIT_KEY, DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT
 )
 
 
@@ -98,6 +101,26 @@ class FutureSettingsDialog(QDialog):
         self.fetch_first_checkbox.stateChanged.connect(self._fetch_first_setting_changed)
         download_window_layout.addWidget(self.fetch_first_checkbox, 3, 0, 1, 2)
 
+        self.incremental_sync_checkbox = QCheckBox()
+        self.incremental_sync_checkbox.stateChanged.connect(self._incremental_sync_setting_changed)
+        download_window_layout.addWidget(self.incremental_sync_checkbox, 4, 0, 1, 2)
+
+        self.reverse_pages_checkbox = QCheckBox()
+        self.reverse_pages_checkbox.stateChanged.connect(self._reverse_pages_setting_changed)
+        download_window_layout.addWidget(self.reverse_pages_checkbox, 5, 0, 1, 2)
+
+        self.max_connections_label = QLabel()
+        self.max_connections_combo_box = QComboBox()
+        self.max_connections_combo_box.currentIndexChanged.connect(self._download_limits_changed)
+        download_window_layout.addWidget(self.max_connections_label, 6, 0)
+        download_window_layout.addWidget(self.max_connections_combo_box, 6, 1)
+
+        self.bandwidth_limit_label = QLabel()
+        self.bandwidth_limit_combo_box = QComboBox()
+        self.bandwidth_limit_combo_box.currentIndexChanged.connect(self._download_limits_changed)
+        download_window_layout.addWidget(self.bandwidth_limit_label, 7, 0)
+        download_window_layout.addWidget(self.bandwidth_limit_combo_box, 7, 1)
+
         main_layout.addWidget(self.download_window_group_box)
 
         main_layout.addStretch(1)
@@ -118,6 +141,16 @@ class FutureSettingsDialog(QDialog):
         self.fetch_first_checkbox.setChecked(should_fetch_first)
         self.fetch_first_checkbox.blockSignals(False)
 
+        self.incremental_sync_checkbox.blockSignals(True)
+        use_incremental_sync = self.parent_app.settings.value(INCREMENTAL_SYNC_KEY, True, type=bool)
+        self.incremental_sync_checkbox.setChecked(use_incremental_sync)
+        self.incremental_sync_checkbox.blockSignals(False)
+
+        self.reverse_pages_checkbox.blockSignals(True)
+        oldest_first_strategy = self.parent_app.settings.value(OLDEST_FIRST_STRATEGY_KEY, OLDEST_FIRST_MERGE, type=str)
+        self.reverse_pages_checkbox.setChecked(oldest_first_strategy == OLDEST_FIRST_REVERSE_PAGES)
+        self.reverse_pages_checkbox.blockSignals(False)
+
     def _creator_json_setting_changed(self, state):
         """Saves the state of the 'Save Creator.json' checkbox."""
         is_checked = state == Qt.Checked
@@ -130,6 +163,24 @@ class FutureSettingsDialog(QDialog):
         self.parent_app.settings.setValue(FETCH_FIRST_KEY, is_checked)
         self.parent_app.settings.sync()
 
+    def _incremental_sync_setting_changed(self, state):
+        """Saves the state of the 'Incremental Update Check' checkbox."""
+        is_checked = state == Qt.Checked
+        self.parent_app.settings.setValue(INCREMENTAL_SYNC_KEY, is_checked)
+        self.parent_app.settings.sync()
+
+    def _reverse_pages_setting_changed(self, state):
+        """Saves which strategy oldest-first manga downloads use to order posts."""
+        strategy = OLDEST_FIRST_REVERSE_PAGES if state == Qt.Checked else OLDEST_FIRST_MERGE
+        self.parent_app.settings.setValue(OLDEST_FIRST_STRATEGY_KEY, strategy)
+        self.parent_app.settings.sync()
+
+    def _download_limits_changed(self):
+        """Saves the global connection and bandwidth limits; they apply from the next download."""
+        self.parent_app.settings.setValue(DOWNLOAD_MAX_CONNECTIONS_KEY, self.max_connections_combo_box.currentData())
+        self.parent_app.settings.setValue(DOWNLOAD_BANDWIDTH_LIMIT_KEY, self.bandwidth_limit_combo_box.currentData())
+        self.parent_app.settings.sync()
+
     def _tr(self, key, default_text=""):
         if callable(get_translation) and self.parent_app:
             return get_translation(self.parent_app.current_selected_language, key, default_text)
@@ -151,6 +202,14 @@ class FutureSettingsDialog(QDialog):
         
         self.fetch_first_checkbox.setText(self._tr("fetch_first_label", "Fetch First (Download after all pages are found)"))
         self.fetch_first_checkbox.setToolTip(self._tr("fetch_first_tooltip", "If checked, the downloader will find all posts from a creator first before starting any downloads.\nThis can be slower to start but provides a more accurate progress bar."))
+
+        self.incremental_sync_checkbox.setText(self._tr("incremental_sync_label", "Incremental Update Check (Stop at already-known posts)"))
+        self.reverse_pages_checkbox.setText(self._tr("reverse_pages_label", "Manga Oldest-First: Start from the last page"))
+        self.reverse_pages_checkbox.setToolTip(self._tr("reverse_pages_tooltip", "If checked, oldest-first Manga/Comic downloads locate the creator's last page and walk back towards the newest,\nso downloads start right away instead of after every page has been fetched and sorted."))
+        self.max_connections_label.setText(self._tr("max_connections_label", "Max Connections (all downloads):"))
+        self.max_connections_combo_box.setToolTip(self._tr("max_connections_tooltip", "Caps the file-download connections open at once across all post workers, file threads and multi-part chunks.\nSmaller files are served first; multi-part downloads only use connections nobody else is waiting for."))
+        self.bandwidth_limit_label.setText(self._tr("bandwidth_limit_label", "Bandwidth Limit:"))
+        self.incremental_sync_checkbox.setToolTip(self._tr("incremental_sync_tooltip", "If checked, 'Check For Updates' stops paging a creator's feed as soon as it reaches a page of posts\nthat were already downloaded or are older than the newest post of the last complete update."))
         
         self._update_theme_toggle_button_text()
         self.save_path_button.setText(self._tr("settings_save_cookie_path_button", "Save Cookie + Download Path"))
@@ -158,6 +217,7 @@ class FutureSettingsDialog(QDialog):
         self.ok_button.setText(self._tr("ok_button", "OK"))
 
         self._populate_display_combo_boxes()
+        self._populate_download_limit_combo_boxes()
         self._populate_language_combo_box()
         self._load_checkbox_states()
 
@@ -223,6 +283,28 @@ class FutureSettingsDialog(QDialog):
                 self.ui_scale_combo_box.setCurrentIndex(self.ui_scale_combo_box.count() - 1)
         self.ui_scale_combo_box.blockSignals(False)
 
+    def _populate_download_limit_combo_boxes(self):
+        self.max_connections_combo_box.blockSignals(True)
+        self.max_connections_combo_box.clear()
+        current_connections = self.parent_app.settings.value(DOWNLOAD_MAX_CONNECTIONS_KEY, DOWNLOAD_MAX_CONNECTIONS_DEFAULT, type=int)
+        for connections in (8, 16, 32, 64, 128, 256):
+            label = f"{connections}" + (f" ({self._tr('default_suffix', 'Default')})" if connections == DOWNLOAD_MAX_CONNECTIONS_DEFAULT else "")
+            self.max_connections_combo_box.addItem(label, connections)
+            if connections == current_connections:
+                self.max_connections_combo_box.setCurrentIndex(self.max_connections_combo_box.count() - 1)
+        self.max_connections_combo_box.blockSignals(False)
+
+        self.bandwidth_limit_combo_box.blockSignals(True)
+        self.bandwidth_limit_combo_box.clear()
+        current_limit = self.parent_app.settings.value(DOWNLOAD_BANDWIDTH_LIMIT_KEY, DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT, type=int)
+        limits = [(0, self._tr("bandwidth_unlimited", "Unlimited"))]
+        limits += [(mb * 1024 * 1024, f"{mb} MB/s") for mb in (1, 2, 5, 10, 25, 50, 100)]
+        for limit_bytes, limit_name in limits:
+            self.bandwidth_limit_combo_box.addItem(limit_name, limit_bytes)
+            if limit_bytes == current_limit:
+                self.bandwidth_limit_combo_box.setCurrentIndex(self.bandwidth_limit_combo_box.count() - 1)
+        self.bandwidth_limit_combo_box.blockSignals(False)
+
     def _display_setting_changed(self):
         selected_res = self.resolution_combo_box.currentData()
         selected_scale = self.ui_scale_combo_box.currentData()
@@ -18,7 +18,7 @@ class MultipartScopeDialog(QDialog):
     SCOPE_ARCHIVES = 'archives'
     SCOPE_BOTH = 'both'
 
-    def __init__(self, current_scope='both', current_parts=4, current_min_size_mb=100, parent=None):
+    def __init__(self, current_scope='both', current_parts=4, current_min_size_mb=100, parent=None, current_min_segment_mb=4):
         super().__init__(parent)
         self.setWindowTitle("Multipart Download Options")
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
@@ -63,7 +63,7 @@ class MultipartScopeDialog(QDialog):
         self.parts_input = QLineEdit(str(current_parts))
         self.parts_input.setValidator(QIntValidator(2, MAX_PARTS, self))
         self.parts_input.setFixedWidth(40)
-        self.parts_input.setToolTip(f"Set the number of concurrent connections per file (2-{MAX_PARTS}).")
+        self.parts_input.setToolTip(f"Set the maximum number of concurrent connections per file (2-{MAX_PARTS}).")
         parts_layout.addWidget(self.parts_label)
         parts_layout.addStretch()
         parts_layout.addWidget(self.parts_input)
@@ -81,6 +81,19 @@ class MultipartScopeDialog(QDialog):
         size_layout.addWidget(self.size_input)
         settings_layout.addLayout(size_layout)
 
+        # Layout for Minimum Split Segment Size
+        segment_layout = QHBoxLayout()
+        self.segment_label = QLabel("Minimum split segment size (MB):")
+        self.segment_input = QLineEdit(str(current_min_segment_mb))
+        self.segment_input.setValidator(QIntValidator(1, 512, self))
+        self.segment_input.setFixedWidth(40)
+        self.segment_input.setToolTip("When a part finishes early, it takes over half of the slowest part's remaining bytes.\n"
+                                      "Remaining ranges smaller than twice this size are not split.")
+        segment_layout.addWidget(self.segment_label)
+        segment_layout.addStretch()
+        segment_layout.addWidget(self.segment_input)
+        settings_layout.addLayout(segment_layout)
+
         self.settings_group_box.setLayout(settings_layout)
         layout.addWidget(self.settings_group_box)
         # --- END: MODIFIED Download Settings Group ---
@@ -115,4 +128,12 @@ class MultipartScopeDialog(QDialog):
             size = int(self.size_input.text())
             return max(10, min(size, 10000)) # Enforce valid range
         except (ValueError, TypeError):
-            return 100 # Return a safe default
\ No newline at end of file
+            return 100 # Return a safe default
+
+    def get_selected_min_segment_size(self):
+        """Returns the selected minimum split segment size in MB as an integer."""
+        try:
+            size = int(self.segment_input.text())
+            return max(1, min(size, 512))
+        except (ValueError, TypeError):
+            return 4
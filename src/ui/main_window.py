@@ -34,14 +34,22 @@ from ..services.drive_downloader import download_mega_file as drive_download_meg
 from ..core.workers import DownloadThread as BackendDownloadThread
 from ..core.workers import PostProcessorWorker  
 from ..core.workers import PostProcessorSignals
-from ..core.api_client import download_from_api
+from ..core.api_client import download_from_api, update_high_water_mark
 from ..core.discord_client import fetch_server_channels, fetch_channel_messages 
 from ..core.manager import DownloadManager
 from ..core.nhentai_client import fetch_nhentai_gallery
+from ..core.catalog import get_catalog, get_session_path_hashes
+from ..core.session_journal import get_session_journal, load_session_with_journal
+from ..core.post_store import PostSpillStore
 from .assets import get_app_icon_object
 from ..config.constants import *
 from ..utils.file_utils import KNOWN_NAMES, clean_folder_name
 from ..utils.network_utils import extract_post_info, prepare_cookies_for_request
+from ..utils.http_session import configure_session_pools
+from ..utils.download_scheduler import configure_download_scheduler
+from ..utils.folder_index import reset_folder_indexes
+from ..utils.head_cache import get_head_cache
+from ..utils.cdn_nodes import get_cdn_nodes
 from ..utils.resolution import setup_ui
 from ..utils.resolution import get_dark_theme
 from ..i18n.translator import get_translation
@@ -109,6 +117,9 @@ class DownloaderApp (QWidget ):
         super().__init__()
         self.settings = QSettings(CONFIG_ORGANIZATION_NAME, CONFIG_APP_NAME_MAIN)
         self.active_update_profile = None
+        self.active_update_profile_name = None
+        self.pending_update_high_water_mark = None
+        self.update_processed_post_ids = set()
         self.new_posts_for_update = []
         self.is_finishing = False 
         self.finish_lock = threading.Lock() 
@@ -134,6 +145,7 @@ class DownloaderApp (QWidget ):
         self.config_file = os.path.join(user_data_path, "Known.txt")
         self.session_file_path = os.path.join(user_data_path, "session.json")
         self.persistent_history_file = os.path.join(user_data_path, "download_history.json")
+        self.catalog = get_catalog(user_data_path)
 
         self.download_thread = None
         self.thread_pool = None
@@ -232,6 +244,7 @@ class DownloaderApp (QWidget ):
         self.multipart_scope = 'both'
         self.multipart_parts_count = 4     
         self.multipart_min_size_mb = 100 
+        self.multipart_min_segment_mb = MULTIPART_MIN_SEGMENT_MB
         self.use_cookie_setting = False
         self.scan_content_images_setting = self.settings.value(SCAN_CONTENT_IMAGES_KEY, False, type=bool)
         self.cookie_text_setting = ""
@@ -364,6 +377,17 @@ class DownloaderApp (QWidget ):
         except OSError as e:
             self.log_signal.emit(f"❌ Error saving creator profile to '{profile_path}': {e}")
 
+    def _record_update_high_water_mark(self):
+        """Stores the newest post of a completed update in its creator profile for the next incremental check."""
+        if not self.pending_update_high_water_mark or not self.active_update_profile_name:
+            return
+        profile_data = self._setup_creator_profile(self.active_update_profile_name, self.session_file_path)
+        if not profile_data:
+            return
+        profile_data['high_water_mark'] = update_high_water_mark(profile_data.get('high_water_mark'), [self.pending_update_high_water_mark])
+        self._save_creator_profile(self.active_update_profile_name, profile_data, self.session_file_path)
+        self.pending_update_high_water_mark = None
+
     def _create_initial_session_file(self, api_url_for_session, override_output_dir_for_session, remaining_queue=None):
         """Creates the initial session file at the start of a new download."""
         if self.is_restore_pending:
@@ -470,8 +494,7 @@ class DownloaderApp (QWidget ):
         """Checks for an incomplete session file on startup and prepares the UI for restore if found."""
         if os.path.exists(self.session_file_path):
             try:
-                with open(self.session_file_path, 'r', encoding='utf-8') as f:
-                    session_data = json.load(f)
+                session_data = load_session_with_journal(self.session_file_path)
                 
                 if "ui_settings" not in session_data or "download_state" not in session_data:
                     raise ValueError("Invalid session file structure.")
@@ -495,6 +518,7 @@ class DownloaderApp (QWidget ):
             except Exception as e:
                 self.log_signal.emit(f"❌ Error reading session file: {e}. Deleting corrupt session file.")
                 os.remove(self.session_file_path)
+                get_session_journal(self.session_file_path).discard()
                 self.interrupted_session_data = None
                 self.is_restore_pending = False
 
@@ -520,6 +544,7 @@ class DownloaderApp (QWidget ):
 
     def _clear_session_file(self):
         """Safely deletes the session file."""
+        get_session_journal(self.session_file_path).discard()
         if os.path.exists(self.session_file_path):
             try:
                 os.remove(self.session_file_path)
@@ -528,15 +553,17 @@ class DownloaderApp (QWidget ):
                 self.log_signal.emit(f"❌ Failed to clear session file: {e}")
 
     def _save_session_file(self, session_data):
-        """Safely saves the session data to the session file using an atomic write pattern."""
+        """
+        Safely saves the session data to the session file using an atomic write pattern.
+        The data must already include the journal (fresh sessions, or data from
+        load_session_with_journal), since the journal is dropped afterwards.
+        """
         temp_session_file_path = self.session_file_path + ".tmp"
         try:
             if 'download_state' in session_data:
                 with self.downloaded_file_hashes_lock:
                     session_data['download_state']['successfully_downloaded_hashes'] = list(self.downloaded_file_hashes)
-            with open(temp_session_file_path, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2)
-            os.replace(temp_session_file_path, self.session_file_path)
+            get_session_journal(self.session_file_path).write_snapshot(session_data)
         except Exception as e:
             self.log_signal.emit(f"❌ Failed to save session state: {e}")
             if os.path.exists(temp_session_file_path):
@@ -1535,6 +1562,21 @@ class DownloaderApp (QWidget ):
 
         self .last_downloaded_files_details .append (file_details_dict )
 
+        if file_details_dict .get ('saved_path'):
+            try :
+                self .catalog .record_file (
+                file_details_dict ['saved_path'],
+                service =file_details_dict .get ('service'),
+                user_id =file_details_dict .get ('user_id'),
+                post_id =file_details_dict .get ('post_id'),
+                url =file_details_dict .get ('file_url'),
+                original_name =file_details_dict .get ('api_original_filename'),
+                size =file_details_dict .get ('file_size'),
+                content_hash =file_details_dict .get ('content_hash')
+                )
+            except Exception as e :
+                self .log_signal .emit (f"⚠️ Could not record '{file_details_dict ['disk_filename']}' in the catalog: {e }")
+
 
     def _handle_favorite_mode_toggle (self ,checked ):
         if not self .url_or_placeholder_stack or not self .bottom_action_buttons_stack :
@@ -3547,6 +3589,7 @@ class DownloaderApp (QWidget ):
                     self.log_signal.emit("   Fresh download session: Clearing previous post history for this creator to re-download all.")
                     if 'processed_post_ids' in creator_profile_data:
                         creator_profile_data['processed_post_ids'] = []
+                    self.catalog.forget_creator_posts(service, user_id)
 
                 creator_profile_data.setdefault('processed_post_ids', [])
                 self._save_creator_profile(creator_name_for_profile, creator_profile_data, self.session_file_path)
@@ -3892,6 +3935,17 @@ class DownloaderApp (QWidget ):
                 effective_num_post_workers = max(1, min(num_threads_from_gui, MAX_THREADS))
                 effective_num_file_threads_per_worker = 1
 
+        self._apply_download_limits()
+        get_head_cache().clear()
+        get_cdn_nodes().reset()
+        reset_folder_indexes()
+        get_session_path_hashes().clear()
+        configure_session_pools(
+            effective_num_post_workers,
+            effective_num_file_threads_per_worker,
+            self.multipart_parts_count if self.allow_multipart_download_setting else 1
+        )
+
         if not extract_links_only: log_messages.append(f"    Save Location: {effective_output_dir_for_run}")
 
         if post_id_from_url:
@@ -4013,6 +4067,7 @@ class DownloaderApp (QWidget ):
             'multipart_scope': self.multipart_scope,
             'multipart_parts_count': self.multipart_parts_count,
             'multipart_min_size_mb': self.multipart_min_size_mb,
+            'multipart_min_segment_mb': self.multipart_min_segment_mb,
             'cookie_text': cookie_text_from_input,
             'selected_cookie_file': selected_cookie_file_path_for_backend,
             'manga_global_file_counter_ref': manga_global_file_counter_ref_for_thread,
@@ -4032,6 +4087,7 @@ class DownloaderApp (QWidget ):
             'processed_post_ids': processed_post_ids_for_this_run,
             'start_offset': start_offset_for_restore, 
             'fetch_first': fetch_first_enabled, 
+            'oldest_first_strategy': self.settings.value(OLDEST_FIRST_STRATEGY_KEY, OLDEST_FIRST_MERGE, type=str),
         }
 
         args_template['override_output_dir'] = override_output_dir
@@ -4087,10 +4143,10 @@ class DownloaderApp (QWidget ):
                     'manga_mode_active', 'unwanted_keywords', 'manga_filename_style', 'scan_content_for_images',
                     'allow_multipart_download', 'use_cookie', 'cookie_text', 'app_base_dir', 'selected_cookie_file', 'override_output_dir', 'project_root_dir',
                     'text_only_scope', 'text_export_format',
-                    'single_pdf_mode','multipart_parts_count', 'multipart_min_size_mb', 
+                    'single_pdf_mode','multipart_parts_count', 'multipart_min_size_mb', 'multipart_min_segment_mb',
                     'use_date_prefix_for_subfolder','keep_in_post_duplicates', 'keep_duplicates_mode',
                     'keep_duplicates_limit', 'downloaded_hash_counts', 'downloaded_hash_counts_lock',
-                    'processed_post_ids'
+                    'processed_post_ids', 'oldest_first_strategy'
                 ]
                 args_template['skip_current_file_flag'] = None
                 single_thread_args = {key: args_template[key] for key in dt_expected_keys if key in args_template}
@@ -4189,11 +4245,22 @@ class DownloaderApp (QWidget ):
         """Appends details of files that failed but might be retryable later."""
         if list_of_retry_details :
             self .retryable_failed_files_info .extend (list_of_retry_details )
+            self ._record_failures_in_catalog (list_of_retry_details ,permanent =False )
+
+    def _record_failures_in_catalog(self, failure_details_list, permanent, history_data=None):
+        """Stores failed file downloads in the catalog so they survive the session."""
+        history_data = history_data or {}
+        try:
+            self.catalog.record_failures(failure_details_list, permanent=permanent,
+                                         service=history_data.get('service'), user_id=history_data.get('user_id'))
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ Could not record failed downloads in the catalog: {e}")
 
     def _handle_permanent_file_failure_from_thread (self ,list_of_permanent_failure_details ):
         """Handles permanently failed files signaled by the single BackendDownloadThread."""
         if list_of_permanent_failure_details :
             self .permanently_failed_files_for_dialog .extend (list_of_permanent_failure_details )
+            self ._record_failures_in_catalog (list_of_permanent_failure_details ,permanent =True )
             self .log_signal .emit (f"ℹ️ {len (list_of_permanent_failure_details )} file(s) from single-thread download marked as permanently failed for this session.")
             self._update_error_button_count()
 
@@ -4360,7 +4427,8 @@ class DownloaderApp (QWidget ):
                 app_base_dir=worker_args_template.get('app_base_dir'),
                 manga_filename_style_for_sort_check=worker_args_template.get('manga_filename_style'),
                 processed_post_ids=worker_args_template.get('processed_post_ids', []),
-                fetch_all_first=worker_args_template.get('fetch_first', False)
+                fetch_all_first=worker_args_template.get('fetch_first', False),
+                oldest_first_strategy=worker_args_template.get('oldest_first_strategy', OLDEST_FIRST_MERGE)
             )
 
             ppw_expected_keys = list(PostProcessorWorker.__init__.__code__.co_varnames)[1:]
@@ -4372,16 +4440,27 @@ class DownloaderApp (QWidget ):
             if fetch_first_enabled:
                 # --- FETCH FIRST LOGIC ---
                 # Exhaust the generator to get all posts into one list before processing.
-                logger_func("   Fetch First: All posts have been fetched. Now queuing for download...")
-                all_posts = [post for batch in post_generator for post in batch]
-                
-                self.total_posts_to_process = len(all_posts)
-                self.overall_progress_signal.emit(self.total_posts_to_process, self.processed_posts_count)
-
-                for post_data in all_posts:
-                    if self.cancellation_event.is_set():
-                        break
-                    self._submit_post_to_worker_pool(post_data, worker_args_template, num_file_dl_threads, emitter, ppw_expected_keys, {})
+                # Full posts are spilled to a temporary file; only compact summaries stay in memory
+                # and posts are loaded back just before they are handed to a worker.
+                with PostSpillStore() as spill_store:
+                    post_summaries = [spill_store.add(post) for batch in post_generator for post in batch]
+                    logger_func("   Fetch First: All posts have been fetched. Now queuing for download...")
+
+                    self.total_posts_to_process = len(post_summaries)
+                    self.overall_progress_signal.emit(self.total_posts_to_process, self.processed_posts_count)
+
+                    max_queued_posts = max(1, fetcher_args.get('num_post_workers', 1)) * 4
+                    queued_futures = []
+                    for summary in post_summaries:
+                        while not self.cancellation_event.is_set():
+                            queued_futures = [f for f in queued_futures if not f.done()]
+                            if len(queued_futures) < max_queued_posts:
+                                break
+                            time.sleep(0.1)
+                        if self.cancellation_event.is_set():
+                            break
+                        if self._submit_post_to_worker_pool(spill_store.load(summary), worker_args_template, num_file_dl_threads, emitter, ppw_expected_keys, {}):
+                            queued_futures.append(self.active_futures[-1])
 
             else:
                 # --- STANDARD CONCURRENT LOGIC ---
@@ -4432,6 +4511,7 @@ class DownloaderApp (QWidget ):
             if permanent:
                 self.permanently_failed_files_for_dialog.extend(permanent)
                 self._update_error_button_count()
+                self._record_failures_in_catalog(permanent, permanent=True, history_data=history_data)
             
             if history_data and not permanent:
                 self._add_to_history_candidates(history_data)
@@ -4498,14 +4578,12 @@ class DownloaderApp (QWidget ):
             service = history_data.get('service')
             user_id = history_data.get('user_id')
             if post_id and service and user_id:
-                creator_key = (service.lower(), str(user_id))
-                creator_name = self.creator_name_cache.get(creator_key, f"{service}_{user_id}")
-                
-                profile_data = self._setup_creator_profile(creator_name, self.session_file_path)
-                
-                if post_id not in profile_data.get('processed_post_ids', []):
-                    profile_data.setdefault('processed_post_ids', []).append(post_id)
-                    self._save_creator_profile(creator_name, profile_data, self.session_file_path)
+                try:
+                    self.catalog.mark_post_processed(service, user_id, post_id,
+                                                     title=history_data.get('post_title'),
+                                                     published=history_data.get('upload_date_str'))
+                except Exception as e:
+                    self.log_signal.emit(f"⚠️ Could not mark post {post_id} as processed in the catalog: {e}")
 
         if history_data and len(self.download_history_candidates) < 8:
             history_data['download_date_timestamp'] = time.time()
@@ -4877,6 +4955,8 @@ class DownloaderApp (QWidget ):
                 self.is_restore_pending = False
 
             self._finalize_download_history()
+            if self.active_update_profile and not self.retryable_failed_files_info:
+                self._record_update_high_water_mark()
             status_message = self._tr("status_completed", "Completed")
 
             summary_log = "=" * 40
@@ -5181,8 +5261,7 @@ class DownloaderApp (QWidget ):
         if os.path.exists(self.session_file_path):
             try:
                 with self.session_lock:
-                    with open(self.session_file_path, 'r', encoding='utf-8') as f:
-                        session_data = json.load(f)
+                    session_data = load_session_with_journal(self.session_file_path)
                     
                     if 'download_state' in session_data:
                         session_data['download_state']['permanently_failed_files'] = self.permanently_failed_files_for_dialog
@@ -5389,19 +5468,29 @@ class DownloaderApp (QWidget ):
         else:
             self.error_btn.setText(base_text)
 
+    def _apply_download_limits(self):
+        """Pushes the connection and bandwidth limits from the settings into the global download scheduler."""
+        max_connections = self.settings.value(DOWNLOAD_MAX_CONNECTIONS_KEY, DOWNLOAD_MAX_CONNECTIONS_DEFAULT, type=int)
+        bandwidth_limit = self.settings.value(DOWNLOAD_BANDWIDTH_LIMIT_KEY, DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT, type=int)
+        configure_download_scheduler(max_connections, bandwidth_limit)
+        if bandwidth_limit:
+            self.log_signal.emit(f"ℹ️ Download limits: {max_connections} connections, {bandwidth_limit / (1024 * 1024):.1f} MB/s total.")
+
     def _toggle_multipart_mode(self):
         """
         Opens the Multipart Scope Dialog and updates settings based on user choice.
         """
         current_scope = self.multipart_scope if self.allow_multipart_download_setting else 'both'
-        dialog = MultipartScopeDialog(current_scope, self.multipart_parts_count, self.multipart_min_size_mb, self)
+        dialog = MultipartScopeDialog(current_scope, self.multipart_parts_count, self.multipart_min_size_mb,
+                                      parent=self, current_min_segment_mb=self.multipart_min_segment_mb)
         
         if dialog.exec_() == QDialog.Accepted:
             self.multipart_scope = dialog.get_selected_scope()
             self.multipart_parts_count = dialog.get_selected_parts()
             self.multipart_min_size_mb = dialog.get_selected_min_size() # Get the new value
+            self.multipart_min_segment_mb = dialog.get_selected_min_segment_size()
             self.allow_multipart_download_setting = True
-            self.log_signal.emit(f"ℹ️ Multi-part download enabled: Scope='{self.multipart_scope.capitalize()}', Parts={self.multipart_parts_count}, Min Size={self.multipart_min_size_mb} MB")
+            self.log_signal.emit(f"ℹ️ Multi-part download enabled: Scope='{self.multipart_scope.capitalize()}', Parts={self.multipart_parts_count}, Min Size={self.multipart_min_size_mb} MB, Min Split={self.multipart_min_segment_mb} MB")
         else:
             self.allow_multipart_download_setting = False
             self.log_signal.emit("ℹ️ Multi-part download setting remains OFF.")
@@ -5497,7 +5586,18 @@ class DownloaderApp (QWidget ):
         
         update_url = self.active_update_profile['creator_url'][0]
         processed_ids_from_profile = set(self.active_update_profile['processed_post_ids'])
+        update_service, update_user_id, _ = extract_post_info(update_url)
+        if update_service and update_user_id:
+            # Profiles written before the catalog existed still carry their IDs in JSON.
+            self.catalog.import_processed_post_ids(update_service, update_user_id, processed_ids_from_profile)
+            processed_ids_from_profile |= self.catalog.get_processed_post_ids(update_service, update_user_id)
+        # The catalog is the store that keeps up to date; update workers get this merged set.
+        self.update_processed_post_ids = processed_ids_from_profile
+        previous_high_water_mark = self.active_update_profile.get('high_water_mark')
+        use_incremental_sync = self.settings.value(INCREMENTAL_SYNC_KEY, True, type=bool)
         self.log_signal.emit(f"   Checking URL: {update_url}")
+        if use_incremental_sync and (processed_ids_from_profile or previous_high_water_mark):
+            self.log_signal.emit("   Incremental check: paging stops at the first page of already-known posts.")
         
         self.set_ui_enabled(False)
         self.progress_label.setText(self._tr("progress_fetching_all_posts", "Progress: Fetching all post pages..."))
@@ -5513,7 +5613,9 @@ class DownloaderApp (QWidget ):
                 cookie_text=self.cookie_text_input.text(),
                 selected_cookie_file=self.selected_cookie_filepath,
                 app_base_dir=self.app_base_dir,
-                processed_post_ids=processed_ids_from_profile
+                processed_post_ids=processed_ids_from_profile,
+                incremental_sync=use_incremental_sync,
+                high_water_mark=previous_high_water_mark
             )
             all_posts_from_api = [post for batch in post_generator for post in batch]
         except Exception as e:
@@ -5525,6 +5627,7 @@ class DownloaderApp (QWidget ):
         
         # CORRECTED LINE: Assign the list directly without re-filtering
         self.new_posts_for_update = all_posts_from_api
+        self.pending_update_high_water_mark = update_high_water_mark(previous_high_water_mark, all_posts_from_api)
         
         if not self.new_posts_for_update:
             self.log_signal.emit("✅ Creator is up to date! No new posts found.")
@@ -5558,6 +5661,12 @@ class DownloaderApp (QWidget ):
         except ValueError:
             num_threads_from_gui = 1
         effective_num_file_threads_per_worker = max(1, min(num_threads_from_gui, MAX_FILE_THREADS_PER_POST_OR_WORKER))
+        self._apply_download_limits()
+        get_head_cache().clear()
+        get_cdn_nodes().reset()
+        reset_folder_indexes()
+        get_session_path_hashes().clear()
+        configure_session_pools(1, effective_num_file_threads_per_worker)
 
         # Logic to get folder ignore words if no character filters are used
         creator_folder_ignore_words_for_run = None
@@ -5613,6 +5722,7 @@ class DownloaderApp (QWidget ):
             'multipart_scope': 'files',
             'multipart_parts_count': 8,
             'multipart_min_size_mb': 100,
+            'multipart_min_segment_mb': self.multipart_min_segment_mb,
 
             'manga_global_file_counter_ref': None,
             'use_date_prefix_for_subfolder': self.date_prefix_checkbox.isChecked(),
@@ -5627,7 +5737,7 @@ class DownloaderApp (QWidget ):
             'text_export_format': self.text_export_format,
             'single_pdf_mode': self.single_pdf_setting, 
             'project_root_dir': self.app_base_dir,
-            'processed_post_ids': list(self.active_update_profile['processed_post_ids']),
+            'processed_post_ids': list(self.update_processed_post_ids),
             'keep_archives_skip_others': self.keep_archives_skip_others_checkbox.isChecked() if hasattr(self, 'keep_archives_skip_others_checkbox') else False
         }
 
@@ -5656,6 +5766,7 @@ class DownloaderApp (QWidget ):
         if dialog.exec_() == QDialog.Accepted:
             if dialog.update_profile_data:
                 self.active_update_profile = dialog.update_profile_data
+                self.active_update_profile_name = dialog.update_creator_name
                 self.link_input.setText(dialog.update_creator_name)
                 self.favorite_download_queue.clear()
                 
@@ -0,0 +1,240 @@
+# --- Standard Library Imports ---
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# --- Third-Party Library Imports ---
+import requests
+
+# --- Local Application Imports ---
+from .http_session import get_session
+from ..config.constants import (
+    CDN_NODE_DOMAINS, CDN_NODE_COUNT, CDN_NODE_FAILURE_THRESHOLD, CDN_NODE_COOLDOWN_SECONDS,
+    CDN_NODE_REPROBE_INTERVAL_SECONDS, CDN_NODE_PREFIX_MAX_ENTRIES
+)
+
+# Weight of the newest sample in the moving averages.
+_EWMA_ALPHA = 0.3
+_PROBE_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+_NODE_HOST_PATTERN = re.compile(r"^n\d+\.")
+
+
+def base_domain_of(url):
+    """Returns the 'site.tld' part of a URL's host."""
+    return ".".join(urlparse(url).netloc.lower().split('.')[-2:])
+
+
+def path_prefix_of(url):
+    """
+    The shard a file lives in: '/data/ab/cd/hash.ext' -> '/data/ab/cd'.
+    Files under the same prefix are served by the same node.
+    """
+    parts = urlparse(url).path.split('/')
+    return "/".join(parts[:4]) if len(parts) > 4 else "/".join(parts[:-1])
+
+
+def with_host(url, host):
+    return urlparse(url)._replace(netloc=host).geturl()
+
+
+class _NodeStats:
+    __slots__ = ('latency', 'error_rate', 'consecutive_failures', 'failed_at', 'last_url')
+
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.failed_at = 0.0
+        self.last_url = None
+
+    def is_healthy(self, now):
+        return (self.consecutive_failures < CDN_NODE_FAILURE_THRESHOLD or
+                now - self.failed_at > CDN_NODE_COOLDOWN_SECONDS)
+
+    def rank(self):
+        # Healthy nodes with a low error rate and latency first; unknown latency sorts last among equals.
+        return (round(self.error_rate, 1), self.latency if self.latency is not None else float('inf'))
+
+
+class CdnNodeTable:
+    """
+    Shared health table for the 'nN.' file nodes of the supported sites.
+
+    Every file response feeds the latency and error rate of the host that
+    served it, and the node that answered for a path prefix is remembered.
+    New requests under a known prefix go straight to its node, and once a
+    site's main host keeps failing, requests are routed to its fastest
+    healthy node instead. Probing for a working node happens once per
+    prefix: other workers hitting the same prefix wait for that probe and
+    reuse its answer. A background thread re-probes failing nodes so they
+    come back into rotation when they recover.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}  # host -> _NodeStats
+        self._prefix_nodes = {}  # (base_domain, prefix) -> host
+        self._probing = {}  # (base_domain, prefix) -> threading.Event
+        self._reprobe_thread = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def handles(url):
+        return base_domain_of(url) in CDN_NODE_DOMAINS
+
+    def _stats_locked(self, host):
+        stats = self._nodes.get(host)
+        if stats is None:
+            stats = self._nodes[host] = _NodeStats()
+        return stats
+
+    def record_result(self, url, ok, latency=None, served=None):
+        """
+        Records how a request to `url` went. `ok` feeds the host's health,
+        `latency` is the time to the response headers, and `served` (default:
+        `ok`) says whether the host actually returned the file.
+        """
+        if not self.handles(url):
+            return
+        host = urlparse(url).netloc.lower()
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats_locked(host)
+            stats.last_url = url
+            stats.error_rate = (1 - _EWMA_ALPHA) * stats.error_rate + _EWMA_ALPHA * (0.0 if ok else 1.0)
+            if ok:
+                stats.consecutive_failures = 0
+                if latency is not None:
+                    stats.latency = latency if stats.latency is None else (1 - _EWMA_ALPHA) * stats.latency + _EWMA_ALPHA * latency
+                if (ok if served is None else served) and _NODE_HOST_PATTERN.match(host):
+                    self._remember_prefix_locked(url, host)
+            else:
+                stats.consecutive_failures += 1
+                stats.failed_at = now
+        if not ok:
+            self._ensure_reprobe_thread()
+
+    def _remember_prefix_locked(self, url, host):
+        key = (base_domain_of(url), path_prefix_of(url))
+        self._prefix_nodes.pop(key, None)
+        self._prefix_nodes[key] = host
+        while len(self._prefix_nodes) > CDN_NODE_PREFIX_MAX_ENTRIES:
+            self._prefix_nodes.pop(next(iter(self._prefix_nodes)))
+
+    def _candidate_hosts_locked(self, base_domain, now, exclude=()):
+        hosts = [f"n{i}.{base_domain}" for i in range(1, CDN_NODE_COUNT + 1)]
+        candidates = [h for h in hosts if h not in exclude and self._stats_locked(h).is_healthy(now)]
+        return sorted(candidates, key=lambda h: self._stats_locked(h).rank())
+
+    def route(self, url):
+        """Returns `url` moved to the node that should serve it, or unchanged if there is no better choice."""
+        if not self.handles(url):
+            return url
+        base_domain = base_domain_of(url)
+        now = time.monotonic()
+        with self._lock:
+            node = self._prefix_nodes.get((base_domain, path_prefix_of(url)))
+            if node and self._stats_locked(node).is_healthy(now):
+                return with_host(url, node)
+            current_host = urlparse(url).netloc.lower()
+            if self._stats_locked(current_host).is_healthy(now):
+                return url
+            candidates = self._candidate_hosts_locked(base_domain, now, exclude=(current_host,))
+        return with_host(url, candidates[0]) if candidates else url
+
+    def find_working_url(self, url, logger=None):
+        """
+        Finds a node that serves `url` after its current host answered 403,
+        probing healthy nodes fastest first. Only one thread probes a given
+        prefix at a time; the others wait and use its result.
+        Returns `url` unchanged if no node answers.
+        """
+        if not self.handles(url):
+            return url
+        base_domain = base_domain_of(url)
+        key = (base_domain, path_prefix_of(url))
+        failed_host = urlparse(url).netloc.lower()
+        self.record_result(url, False)
+
+        with self._lock:
+            node = self._prefix_nodes.get(key)
+            if node and node != failed_host and self._stats_locked(node).is_healthy(time.monotonic()):
+                return with_host(url, node)
+            probe_done = self._probing.get(key)
+            is_prober = probe_done is None
+            if is_prober:
+                probe_done = self._probing[key] = threading.Event()
+
+        if not is_prober:
+            probe_done.wait(timeout=30)
+            with self._lock:
+                node = self._prefix_nodes.get(key)
+            return with_host(url, node) if node and node != failed_host else url
+
+        try:
+            if logger: logger("    probing for a valid subdomain...")
+            with self._lock:
+                candidates = self._candidate_hosts_locked(base_domain, time.monotonic(), exclude=(failed_host,))
+            for host in candidates:
+                candidate_url = with_host(url, host)
+                if self._probe(candidate_url):
+                    if logger: logger(f"   ✅ Valid subdomain found: {host}")
+                    return candidate_url
+            return url
+        finally:
+            with self._lock:
+                self._probing.pop(key, None)
+            probe_done.set()
+
+    def _probe(self, url):
+        started = time.monotonic()
+        try:
+            with get_session(url).head(url, headers=_PROBE_HEADERS, timeout=5, allow_redirects=True) as resp:
+                served = resp.status_code == 200
+                # A node that answers but does not hold this file is still healthy.
+                healthy = resp.status_code < 500
+        except requests.RequestException:
+            served = healthy = False
+        self.record_result(url, healthy, time.monotonic() - started, served=served)
+        return served
+
+    # --- Background re-probing ---
+
+    def _ensure_reprobe_thread(self):
+        with self._lock:
+            if self._reprobe_thread is not None and self._reprobe_thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._reprobe_thread = threading.Thread(target=self._reprobe_loop, name="CdnNodeReprobe", daemon=True)
+            self._reprobe_thread.start()
+
+    def _reprobe_loop(self):
+        while not self._stop_event.wait(CDN_NODE_REPROBE_INTERVAL_SECONDS):
+            with self._lock:
+                failing = [stats.last_url for stats in self._nodes.values()
+                           if stats.consecutive_failures and stats.last_url]
+            if not failing:
+                break
+            for url in failing:
+                if self._stop_event.is_set():
+                    break
+                self._probe(url)
+        with self._lock:
+            self._reprobe_thread = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def reset(self):
+        """Forgets everything learned, e.g. when a new download session starts."""
+        with self._lock:
+            self._nodes.clear()
+            self._prefix_nodes.clear()
+
+
+_cdn_nodes = CdnNodeTable()
+
+
+def get_cdn_nodes():
+    """Returns the process-wide CDN node table."""
+    return _cdn_nodes
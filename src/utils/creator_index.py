@@ -0,0 +1,167 @@
+# --- Standard Library Imports ---
+import json
+import os
+
+# --- Optional Third-Party Imports ---
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+# --- Module Constants ---
+
+# Only these fields of a creators.json entry are used by the creator picker.
+CREATOR_RECORD_FIELDS = ('id', 'name', 'service', 'favorited')
+CREATOR_INDEX_VERSION = 1
+_READ_CHUNK_SIZE = 1024 * 1024
+_PROGRESS_EVERY = 5000
+
+
+class CreatorIndexAborted(Exception):
+    """Raised when the progress callback asks to stop loading."""
+
+
+def _iter_array_items_stdlib(f):
+    """
+    Yields the items of the top-level JSON array in a text file one at a time,
+    using json.JSONDecoder.raw_decode over a sliding buffer. If the array's
+    first item is itself an array (the `[[{...}, ...]]` export format), the
+    items of that inner array are yielded instead.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace_and(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in chars):
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace_and("")
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise ValueError("creators.json does not contain a JSON array.")
+    pos += 1
+    skip_whitespace_and("")
+    if pos < len(buffer) and buffer[pos] == '[':
+        pos += 1
+
+    while True:
+        skip_whitespace_and(",")
+        if pos >= len(buffer):
+            return
+        if buffer[pos] == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+        pos = end
+        yield item
+
+
+def iter_creator_entries(creators_file_path):
+    """Streams raw creator dicts from creators.json without loading the whole document."""
+    if IJSON_AVAILABLE:
+        with open(creators_file_path, 'rb') as f:
+            first = f.read(_READ_CHUNK_SIZE).lstrip()
+            nested = first.startswith(b'[') and first[1:].lstrip().startswith(b'[')
+            f.seek(0)
+            for item in ijson.items(f, 'item.item' if nested else 'item', use_float=True):
+                yield item
+        return
+    with open(creators_file_path, 'r', encoding='utf-8') as f:
+        yield from _iter_array_items_stdlib(f)
+
+
+def _compact_record(entry):
+    return {field: entry.get(field) for field in CREATOR_RECORD_FIELDS if entry.get(field) is not None}
+
+
+def build_creator_records(creators_file_path, progress_callback=None):
+    """
+    Parses creators.json into compact, de-duplicated records sorted by
+    favorites (descending) then name.
+
+    Args:
+        creators_file_path (str): Path to creators.json.
+        progress_callback (callable, optional): Called with the number of entries
+            read so far every few thousand entries. Returning False aborts the load.
+
+    Returns:
+        tuple: (records, duplicates_skipped_count)
+    """
+    unique_creators_map = {}
+    duplicates_skipped_count = 0
+    for count, entry in enumerate(iter_creator_entries(creators_file_path), 1):
+        if progress_callback and count % _PROGRESS_EVERY == 0 and progress_callback(count) is False:
+            raise CreatorIndexAborted()
+        if not isinstance(entry, dict):
+            continue
+        service = entry.get('service')
+        creator_id = entry.get('id')
+        if not service or not creator_id:
+            print(f"Warning: Creator entry in creators.json missing service or ID: {entry.get('name', 'Unknown')}")
+            continue
+        key = (str(service).lower().strip(), str(creator_id).strip())
+        if key in unique_creators_map:
+            duplicates_skipped_count += 1
+            continue
+        unique_creators_map[key] = _compact_record(entry)
+
+    records = list(unique_creators_map.values())
+    records.sort(key=lambda c: (-(c.get('favorited') or 0), c.get('name', '').lower()))
+    return records, duplicates_skipped_count
+
+
+def load_creator_records(creators_file_path, index_cache_path=None, progress_callback=None):
+    """
+    Returns the compact creator records, using a cached index when it is
+    newer than creators.json and rebuilding (and re-caching) it otherwise.
+
+    Returns:
+        tuple: (records, duplicates_skipped_count); the count is 0 on a cache hit.
+    """
+    source_stat = os.stat(creators_file_path)
+    source_signature = [source_stat.st_size, int(source_stat.st_mtime)]
+
+    if index_cache_path and os.path.exists(index_cache_path):
+        try:
+            with open(index_cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == CREATOR_INDEX_VERSION and cached.get('source') == source_signature:
+                return cached['creators'], 0
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    records, duplicates_skipped_count = build_creator_records(creators_file_path, progress_callback)
+
+    if index_cache_path:
+        try:
+            os.makedirs(os.path.dirname(index_cache_path), exist_ok=True)
+            temp_path = index_cache_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CREATOR_INDEX_VERSION, 'source': source_signature, 'creators': records},
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, index_cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write creator index cache '{index_cache_path}': {e}")
+    return records, duplicates_skipped_count
@@ -0,0 +1,134 @@
+# --- Standard Library Imports ---
+import heapq
+import itertools
+import threading
+import time
+
+# --- Local Application Imports ---
+from ..config.constants import DOWNLOAD_MAX_CONNECTIONS_DEFAULT, DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT
+
+
+class DownloadScheduler:
+    """
+    One budget of file-download connections (and, optionally, bytes/second)
+    shared by every post worker, file thread and multipart chunk.
+
+    Whole files queue for a connection slot ordered by size, smallest first,
+    so a post full of images is not stuck behind a few large videos. A
+    multipart download starts on its file's slot and borrows extra slots
+    only while no file is waiting. It hands an extra slot back after the
+    range in progress once another file queues, and it picks up freed slots
+    again as other downloads finish.
+    """
+    def __init__(self, max_connections=DOWNLOAD_MAX_CONNECTIONS_DEFAULT,
+                 bytes_per_second=DOWNLOAD_BANDWIDTH_LIMIT_DEFAULT):
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._in_use = 0
+        self.max_connections = max(1, int(max_connections))
+        self._bandwidth_lock = threading.Lock()
+        self.bytes_per_second = max(0, int(bytes_per_second or 0))
+        self._allowance = float(self.bytes_per_second)
+        self._last_refill = time.monotonic()
+
+    def configure(self, max_connections=None, bytes_per_second=None):
+        """Changes the limits; slots already handed out are kept until released."""
+        with self._cond:
+            if max_connections is not None:
+                self.max_connections = max(1, int(max_connections))
+            self._cond.notify_all()
+        if bytes_per_second is not None:
+            with self._bandwidth_lock:
+                self.bytes_per_second = max(0, int(bytes_per_second or 0))
+                self._allowance = float(self.bytes_per_second)
+                self._last_refill = time.monotonic()
+
+    # --- Connection slots ---
+
+    def acquire(self, size_hint=None, cancellation_event=None):
+        """
+        Blocks until a connection slot is free and this file is first in line.
+
+        Args:
+            size_hint (int, optional): Expected file size in bytes; smaller files go first.
+            cancellation_event (threading.Event, optional): Stops the wait when set.
+
+        Returns:
+            bool: True once a slot is held, False if cancelled while waiting.
+        """
+        entry = [size_hint if size_hint is not None else float('inf'), next(self._sequence)]
+        with self._cond:
+            if not self._waiters and self._in_use < self.max_connections:
+                self._in_use += 1
+                return True
+            heapq.heappush(self._waiters, entry)
+            while True:
+                if cancellation_event and cancellation_event.is_set():
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                    return False
+                if self._waiters[0] is entry and self._in_use < self.max_connections:
+                    heapq.heappop(self._waiters)
+                    self._in_use += 1
+                    # The next waiter may be able to take a slot as well.
+                    self._cond.notify_all()
+                    return True
+                self._cond.wait(0.5)
+
+    def try_acquire_extra(self):
+        """Takes an additional slot for a multipart download if one is free and no file is waiting."""
+        with self._cond:
+            if not self._waiters and self._in_use < self.max_connections:
+                self._in_use += 1
+                return True
+            return False
+
+    def has_waiters(self):
+        with self._cond:
+            return bool(self._waiters)
+
+    def release(self):
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            self._cond.notify_all()
+
+    # --- Bandwidth ---
+
+    def throttle(self, byte_count, cancellation_event=None):
+        """
+        Accounts for `byte_count` received bytes and sleeps while the shared
+        rate is exceeded. Does nothing when no bandwidth limit is set.
+        """
+        if not self.bytes_per_second:
+            return
+        while True:
+            if cancellation_event and cancellation_event.is_set():
+                return
+            with self._bandwidth_lock:
+                rate = self.bytes_per_second
+                if not rate:
+                    return
+                now = time.monotonic()
+                self._allowance = min(float(rate), self._allowance + (now - self._last_refill) * rate)
+                self._last_refill = now
+                if self._allowance > 0:
+                    # Charge the whole block now; the debt is paid off before the next block passes.
+                    self._allowance -= byte_count
+                    return
+                wait = -self._allowance / rate
+            time.sleep(min(wait, 0.25))
+
+
+_scheduler = DownloadScheduler()
+
+
+def get_download_scheduler():
+    """Returns the process-wide download scheduler."""
+    return _scheduler
+
+
+def configure_download_scheduler(max_connections, bytes_per_second=0):
+    """Applies the connection and bandwidth limits chosen in the settings."""
+    _scheduler.configure(max_connections, bytes_per_second)
@@ -1,6 +1,9 @@
 # --- Standard Library Imports ---
+import functools
+import hashlib
 import os
 import re
+import threading
 
 # --- Module Constants ---
 
@@ -10,6 +13,20 @@ KNOWN_NAMES = []
 
 MAX_FILENAME_COMPONENT_LENGTH = 150
 
+# Block size for re-hashing files already on disk; a multiple of the page size.
+HASH_READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Distinct names each FilenameTransformer remembers the result for.
+FILENAME_TRANSFORM_CACHE_SIZE = 4096
+
+# Translate tables for the characters the name cleaners drop or replace.
+_INVALID_NAME_CHARS = '<>:"/\\|?*'
+_FOLDER_NAME_TABLE = str.maketrans('', '', _INVALID_NAME_CHARS)
+_FILENAME_TABLE = str.maketrans(_INVALID_NAME_CHARS, '_' * len(_INVALID_NAME_CHARS))
+_ROBUST_NAME_TABLE = str.maketrans('', '', ''.join(map(chr, range(0x20))) + _INVALID_NAME_CHARS + "'")
+_WHITESPACE_RUN_PATTERN = re.compile(r'\s+')
+_FILENAME_SEPARATORS_PATTERN = re.compile(r'[_.\s-]+')
+
 # Sets of file extensions for quick type checking
 IMAGE_EXTENSIONS = {
     '.jpg', '.jpeg', '.jpe', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp',
@@ -53,11 +70,11 @@ def clean_folder_name(name):
         name = str(name)
     
     # Remove characters that are invalid in folder names on most OS
-    cleaned = re.sub(r'[<>:"/\\|?*]', '', name)
+    cleaned = name.translate(_FOLDER_NAME_TABLE)
     cleaned = cleaned.strip()
     
     # Replace multiple spaces with a single space
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = _WHITESPACE_RUN_PATTERN.sub(' ', cleaned)
 
     # If after cleaning the name is empty, provide a default
     if not cleaned:
@@ -86,7 +103,7 @@ def clean_filename(name):
     if not isinstance(name, str):
         name = str(name)
         
-    cleaned = re.sub(r'[<>:"/\\|?*]', '_', name)
+    cleaned = name.translate(_FILENAME_TABLE)
     cleaned = cleaned.strip()
     
     if not cleaned:
@@ -105,6 +122,72 @@ def clean_filename(name):
     return base_name + ext
 
 
+def robust_clean_name(name):
+    """A more robust function to remove illegal characters for filenames and folders."""
+    if not name:
+        return ""
+    cleaned_name = name.translate(_ROBUST_NAME_TABLE)
+
+    cleaned_name = cleaned_name.strip(' .')
+
+    if not cleaned_name:
+        return "untitled_folder"
+    return cleaned_name
+
+
+class FilenameTransformer:
+    """
+    The filename steps of a download session, compiled once and shared by
+    every worker.
+
+    Each 'remove from filename' word is compiled once into a
+    case-insensitive pattern, applied in list order like before, and
+    clean() / strip_removed_words() remember their results, since the same
+    post title is cleaned once per attachment.
+    """
+    def __init__(self, remove_words=()):
+        self.remove_words = tuple(remove_words or ())
+        self._remove_patterns = tuple(re.compile(re.escape(word), re.IGNORECASE)
+                                      for word in self.remove_words if word)
+        self.clean = functools.lru_cache(maxsize=FILENAME_TRANSFORM_CACHE_SIZE)(robust_clean_name)
+        self.strip_removed_words = functools.lru_cache(maxsize=FILENAME_TRANSFORM_CACHE_SIZE)(self._strip_removed_words)
+
+    def _strip_removed_words(self, filename):
+        """
+        Removes the configured words from the name part of `filename` and
+        collapses the separators left behind into single spaces. The name is
+        returned unchanged if nothing meaningful would be left.
+        """
+        if not self.remove_words or not filename:
+            return filename
+        base_name, ext = os.path.splitext(filename)
+        modified_base_name = base_name
+        for pattern in self._remove_patterns:
+            # Removing one word can create a match for a later one, so each runs on the previous result.
+            modified_base_name = pattern.sub("", modified_base_name)
+        modified_base_name = _FILENAME_SEPARATORS_PATTERN.sub(' ', modified_base_name).strip()
+        if modified_base_name and modified_base_name != ext.lstrip('.'):
+            return modified_base_name + ext
+        return filename
+
+
+_filename_transformers = {}
+_filename_transformers_lock = threading.Lock()
+
+
+def get_filename_transformer(remove_words=()):
+    """Returns the shared FilenameTransformer for a list of words to remove."""
+    key = tuple(remove_words or ())
+    with _filename_transformers_lock:
+        transformer = _filename_transformers.get(key)
+        if transformer is None:
+            if len(_filename_transformers) >= 8:
+                # Settings changed between sessions; the old pipelines are not needed any more.
+                _filename_transformers.clear()
+            transformer = _filename_transformers[key] = FilenameTransformer(key)
+        return transformer
+
+
 # --- File Type Identification Functions ---
 
 def is_image(filename):
@@ -140,3 +223,70 @@ def is_audio(filename):
     if not filename: return False
     _, ext = os.path.splitext(filename)
     return ext.lower() in AUDIO_EXTENSIONS
+
+
+# --- File Content Utilities ---
+
+def update_hash_from_file(hasher, path, start=0, end=None, block_size=HASH_READ_BLOCK_SIZE):
+    """
+    Feeds bytes [start, end) of a file into a hashlib object using large reads
+    into one reusable buffer. Returns the number of bytes hashed.
+    """
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    hashed = 0
+    with open(path, 'rb', buffering=0) as f:
+        f.seek(start)
+        remaining = None if end is None else max(0, end - start)
+        while remaining is None or remaining > 0:
+            to_read = block_size if remaining is None else min(block_size, remaining)
+            read = f.readinto(view[:to_read])
+            if not read:
+                break
+            hasher.update(view[:read])
+            hashed += read
+            if remaining is not None:
+                remaining -= read
+    return hashed
+
+def hash_file(path, algorithm='md5'):
+    """Returns the hex digest of a whole file, read in large blocks."""
+    hasher = hashlib.new(algorithm)
+    update_hash_from_file(hasher, path)
+    return hasher.hexdigest()
+
+class ContentHasher:
+    """
+    Hashes downloaded bytes for duplicate detection and, when asked, for
+    verification. hexdigest() is the MD5 used as the duplicate key; with
+    `with_sha256` the same bytes also feed a SHA-256, which is what the
+    server puts in '/data/ab/cd/<sha256>.ext' paths. Works anywhere a
+    hashlib object is expected to be updated.
+    """
+    __slots__ = ('_md5', '_sha256')
+
+    def __init__(self, with_sha256=False):
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256() if with_sha256 else None
+
+    @property
+    def with_sha256(self):
+        return self._sha256 is not None
+
+    def update(self, data):
+        self._md5.update(data)
+        if self._sha256 is not None:
+            self._sha256.update(data)
+
+    def hexdigest(self):
+        return self._md5.hexdigest()
+
+    def sha256_hexdigest(self):
+        """SHA-256 of the bytes seen so far, or None if it was not requested."""
+        return self._sha256.hexdigest() if self._sha256 is not None else None
+
+def hash_file_content(path, with_sha256=False):
+    """Returns a ContentHasher fed with a whole file, read in large blocks."""
+    hasher = ContentHasher(with_sha256)
+    update_hash_from_file(hasher, path)
+    return hasher
@@ -0,0 +1,96 @@
+# --- Standard Library Imports ---
+import os
+import threading
+from collections import OrderedDict
+
+# --- Local Application Imports ---
+from ..config.constants import FOLDER_INDEX_MAX_FOLDERS
+
+
+class FolderIndex:
+    """
+    The names in one download folder, read once with os.scandir and then
+    kept up to date in memory as downloads reserve names.
+
+    Looking a name up or handing out a free '<name>_N<ext>' no longer costs
+    a stat per candidate, which matters for large folders on network
+    storage. Collision checks ignore case, so a name is never handed out
+    that a case-insensitive filesystem would consider taken. exists() uses
+    the filesystem's own case rules, as os.path.exists does.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._names = set()  # os.path.normcase(name) of every entry
+        self._taken_lower = set()  # name.lower() of every entry and reservation
+        self._next_suffix = {}  # (base, ext) lower-cased -> next counter worth trying
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    self._names.add(os.path.normcase(entry.name))
+                    self._taken_lower.add(entry.name.lower())
+        except OSError:
+            pass
+
+    def exists(self, name):
+        with self._lock:
+            return os.path.normcase(name) in self._names
+
+    def reserve_unique(self, name):
+        """
+        Reserves `name` in this folder, or the first free '<base>_N<ext>'
+        after it, and returns the reserved name. Safe to call from several
+        file threads at once; each caller gets a different name.
+        """
+        base_name, extension = os.path.splitext(name)
+        with self._lock:
+            if name.lower() not in self._taken_lower:
+                self._add_locked(name)
+                return name
+            suffix_key = (base_name.lower(), extension.lower())
+            counter = self._next_suffix.get(suffix_key, 1)
+            candidate = f"{base_name}_{counter}{extension}"
+            while candidate.lower() in self._taken_lower:
+                counter += 1
+                candidate = f"{base_name}_{counter}{extension}"
+            self._next_suffix[suffix_key] = counter + 1
+            self._add_locked(candidate)
+            return candidate
+
+    def _add_locked(self, name):
+        self._names.add(os.path.normcase(name))
+        self._taken_lower.add(name.lower())
+
+    def release(self, name):
+        """Forgets a reserved name whose file was never written or was removed again."""
+        with self._lock:
+            self._names.discard(os.path.normcase(name))
+            self._taken_lower.discard(name.lower())
+
+
+_folder_indexes = OrderedDict()
+_folder_indexes_lock = threading.Lock()
+
+
+def get_folder_index(path):
+    """Returns the shared index for a folder, scanning it on first use."""
+    key = os.path.normcase(os.path.abspath(path))
+    with _folder_indexes_lock:
+        index = _folder_indexes.get(key)
+        if index is not None:
+            _folder_indexes.move_to_end(key)
+            return index
+    # Scan outside the registry lock so threads saving into other folders are not held up.
+    new_index = FolderIndex(path)
+    with _folder_indexes_lock:
+        index = _folder_indexes.setdefault(key, new_index)
+        _folder_indexes.move_to_end(key)
+        while len(_folder_indexes) > FOLDER_INDEX_MAX_FOLDERS:
+            _folder_indexes.popitem(last=False)
+        return index
+
+
+def reset_folder_indexes():
+    """Drops every index, so the next session sees files changed in the meantime."""
+    with _folder_indexes_lock:
+        _folder_indexes.clear()
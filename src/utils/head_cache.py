@@ -0,0 +1,130 @@
+# --- Standard Library Imports ---
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# --- Local Application Imports ---
+from .http_session import get_session
+from ..config.constants import HEAD_CACHE_TTL_SECONDS, HEAD_CACHE_MAX_ENTRIES
+
+
+class HeadMetadata:
+    """What a HEAD (or the headers of a GET) told us about one file."""
+    __slots__ = ('content_length', 'etag', 'final_url', 'working_url', 'stored_at')
+
+    def __init__(self, content_length=None, etag=None, final_url=None, working_url=None):
+        self.content_length = content_length
+        self.etag = etag
+        self.final_url = final_url
+        self.working_url = working_url
+        self.stored_at = time.monotonic()
+
+
+def file_cache_key(url):
+    """
+    Hashes the URL path only, so the same file reached through any 'nN.'
+    mirror of the host shares one cache entry.
+    """
+    parsed = urlparse(url)
+    base_domain = ".".join(parsed.netloc.lower().split('.')[-2:])
+    return hashlib.sha1(f"{base_domain}{parsed.path}".encode('utf-8')).hexdigest()
+
+
+class HeadMetadataCache:
+    """
+    Bounded, expiring store of file metadata for the current download session.
+
+    Entries live for `ttl` seconds and the least recently used one is evicted
+    once `max_entries` is reached. Fields are merged, so the size learned from
+    a HEAD and the working subdomain learned from a 403 retry end up on the
+    same entry.
+    """
+    def __init__(self, ttl=HEAD_CACHE_TTL_SECONDS, max_entries=HEAD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        key = file_cache_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def update(self, url, **fields):
+        """Merges the given HeadMetadata fields into the entry for `url`; None values are ignored."""
+        key = file_cache_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.stored_at > self.ttl:
+                entry = HeadMetadata()
+                self._entries[key] = entry
+            for name, value in fields.items():
+                if value is not None:
+                    setattr(entry, name, value)
+            entry.stored_at = time.monotonic()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def record_response(self, url, response, total_size=None):
+        """
+        Stores the metadata carried by a HEAD or GET response for `url`.
+        `total_size` overrides Content-Length, e.g. for a 206 reply.
+        """
+        if total_size is None:
+            try:
+                total_size = int(response.headers.get('Content-Length', ''))
+            except ValueError:
+                total_size = None
+        return self.update(url, content_length=total_size, etag=response.headers.get('ETag'),
+                           final_url=getattr(response, 'url', None) or None)
+
+    def preferred_url(self, url):
+        """
+        Returns the URL to request `url` through: the mirror a 403 retry found,
+        or the redirect target when it serves the same path, so the redirect
+        hop is skipped. Falls back to `url` itself.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return url
+        if entry.working_url:
+            return entry.working_url
+        if entry.final_url and urlparse(entry.final_url).path == urlparse(url).path:
+            return entry.final_url
+        return url
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def head(self, url, headers=None, cookies=None, timeout=15):
+        """
+        Returns the HeadMetadata for `url`, sending a HEAD request only when
+        the cache has no Content-Length for it yet. Raises
+        requests.RequestException like a plain HEAD would.
+        """
+        entry = self.get(url)
+        if entry is not None and entry.content_length is not None:
+            return entry
+        with get_session(url, cookies=cookies).head(url, headers=headers, timeout=timeout, allow_redirects=True) as response:
+            response.raise_for_status()
+            return self.record_response(url, response)
+
+
+_head_cache = HeadMetadataCache()
+
+
+def get_head_cache():
+    """Returns the process-wide HEAD metadata cache."""
+    return _head_cache
@@ -0,0 +1,159 @@
+# --- Standard Library Imports ---
+import threading
+from urllib.parse import urlparse
+
+# --- Third-Party Library Imports ---
+import requests
+from requests.adapters import HTTPAdapter
+import cloudscraper
+
+# --- Local Application Imports ---
+from .rate_limiter import get_rate_limiter, parse_retry_after
+
+# --- Module Constants ---
+
+# Connection pools never shrink below this, so API calls made before a
+# download session is configured still get keep-alive connections.
+DEFAULT_POOL_MAXSIZE = 10
+MAX_POOL_MAXSIZE = 256
+
+DEFAULT_SESSION_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Accept': 'text/css'
+}
+
+_registry_lock = threading.Lock()
+_sessions = {}
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+
+
+def _make_adapter():
+    # Retries are handled by the callers' own retry loops, so the adapter never retries.
+    return HTTPAdapter(pool_connections=4, pool_maxsize=_pool_maxsize, max_retries=0, pool_block=False)
+
+
+def _replace_adapter(session, prefix):
+    # Close the adapter being replaced so its pooled connections are released.
+    old_adapter = session.adapters.get(prefix)
+    session.mount(prefix, _make_adapter())
+    if old_adapter is not None:
+        old_adapter.close()
+
+
+def _mount_adapters(session):
+    # cloudscraper ships its own cipher-suite adapter for https; replacing it
+    # would undo the TLS fingerprinting, so only its pool size is adjusted.
+    https_adapter = session.adapters.get('https://')
+    if isinstance(session, cloudscraper.CloudScraper) and https_adapter is not None:
+        https_adapter.poolmanager.clear()
+        https_adapter._pool_maxsize = _pool_maxsize
+        https_adapter.init_poolmanager(https_adapter._pool_connections, _pool_maxsize, block=https_adapter._pool_block)
+    else:
+        _replace_adapter(session, 'https://')
+    _replace_adapter(session, 'http://')
+
+
+def _host_key(url_or_host):
+    parsed = urlparse(url_or_host if '://' in url_or_host else f"https://{url_or_host}")
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+class RateLimitWaitCancelled(requests.exceptions.RequestException):
+    """Raised when a request is abandoned while waiting on its host's rate limiter."""
+
+
+def _install_rate_limiting(session):
+    """
+    Routes every request of the session through the per-host rate limiter.
+    API calls and file downloads are paced by separate buckets (see
+    get_rate_limiter), so file traffic is never held to the API's rate.
+
+    Callers may pass `cancellation_event=` to any request method; it is
+    consumed here and lets a long backoff be interrupted.
+    """
+    send_request = session.request
+
+    def limited_request(method, url, *args, **kwargs):
+        cancellation_event = kwargs.pop('cancellation_event', None)
+        limiter = get_rate_limiter(url)
+        if not limiter.acquire(cancellation_event):
+            raise RateLimitWaitCancelled(f"Cancelled while waiting to request {url}")
+        response = send_request(method, url, *args, **kwargs)
+        limiter.record_response(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    session.request = limited_request
+
+
+def configure_session_pools(num_post_workers=1, num_file_threads=1, num_parts=1):
+    """
+    Sizes the per-host keep-alive pools for the upcoming download session.
+
+    Every post worker may run `num_file_threads` file downloads at once, and
+    each of those may split into `num_parts` multipart chunks, so the pool is
+    sized to the product (bounded by MAX_POOL_MAXSIZE). Sessions that already
+    exist get fresh adapters with the new size.
+
+    Args:
+        num_post_workers (int): Number of concurrent post workers.
+        num_file_threads (int): File download threads per post worker.
+        num_parts (int): Maximum multipart chunks per file.
+    """
+    global _pool_maxsize
+    wanted = max(1, num_post_workers) * max(1, num_file_threads) * max(1, num_parts)
+    new_size = max(DEFAULT_POOL_MAXSIZE, min(wanted, MAX_POOL_MAXSIZE))
+    with _registry_lock:
+        if new_size == _pool_maxsize:
+            return
+        _pool_maxsize = new_size
+        for session in _sessions.values():
+            _mount_adapters(session)
+
+
+def get_session(url_or_host, cookies=None, use_cloudscraper=False):
+    """
+    Returns the shared session for a host, creating it on first use.
+
+    Sessions are keyed by host and by the cookie set they carry, so requests
+    made with and without cookies never leak into each other. The returned
+    session is shared by all threads; keep-alive connections are reused from
+    its pool instead of opening a new TCP+TLS connection per request, and
+    every request waits on the host's shared rate limiter.
+
+    Args:
+        url_or_host (str): A full URL or a bare hostname.
+        cookies (dict, optional): Cookies to attach to every request of this session.
+        use_cloudscraper (bool): If True, the session is a cloudscraper instance.
+
+    Returns:
+        requests.Session: The pooled session for this host.
+    """
+    cookie_key = frozenset(cookies.items()) if cookies else None
+    key = (_host_key(url_or_host), cookie_key, bool(use_cloudscraper))
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _registry_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = cloudscraper.create_scraper() if use_cloudscraper else requests.Session()
+            if not use_cloudscraper:
+                session.headers.update(DEFAULT_SESSION_HEADERS)
+            if cookies:
+                session.cookies.update(cookies)
+            _mount_adapters(session)
+            _install_rate_limiting(session)
+            _sessions[key] = session
+    return session
+
+
+def close_all_sessions():
+    """Closes every pooled session and releases its connections."""
+    with _registry_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        try:
+            session.close()
+        except Exception:
+            pass
@@ -0,0 +1,151 @@
+# --- Standard Library Imports ---
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# --- Local Application Imports ---
+from ..config.constants import (
+    RATE_LIMIT_DEFAULT_RPS, RATE_LIMIT_MIN_RPS, RATE_LIMIT_MAX_RPS, RATE_LIMIT_BURST,
+    RATE_LIMIT_BASE_BACKOFF_SECONDS, RATE_LIMIT_MAX_BACKOFF_SECONDS,
+    RATE_LIMIT_RAMP_UP_AFTER, RATE_LIMIT_RAMP_UP_STEP,
+    RATE_LIMIT_FILE_DEFAULT_RPS, RATE_LIMIT_FILE_MAX_RPS, RATE_LIMIT_FILE_BURST
+)
+
+# Status codes the site's API uses to tell a client to slow down.
+THROTTLE_STATUS_CODES = (429, 403)
+# On the file hosts a 403 means "this node does not have the file", which
+# is answered by trying another node, not by slowing down.
+FILE_THROTTLE_STATUS_CODES = (429,)
+
+
+def is_api_url(url):
+    """True for requests to a site API ('/api/...'); everything else counts as file traffic."""
+    return urlparse(url).path.startswith('/api/')
+
+
+def parse_retry_after(value):
+    """
+    Converts a Retry-After header (delta-seconds or an HTTP date) into seconds.
+
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class HostRateLimiter:
+    """
+    A token bucket shared by every thread talking to one host.
+
+    Each request takes a token; tokens refill at the current rate. When any
+    thread reports a throttling response, the whole host pauses (for the
+    Retry-After period if the server sent one) and the rate is halved.
+    After a run of successful responses the rate is raised again in small
+    steps, up to the configured ceiling. `throttle_status_codes` are the
+    responses that count as throttling.
+    """
+    def __init__(self, host, rate=RATE_LIMIT_DEFAULT_RPS, max_rate=RATE_LIMIT_MAX_RPS, burst=RATE_LIMIT_BURST,
+                 throttle_status_codes=THROTTLE_STATUS_CODES):
+        self.host = host
+        self.throttle_status_codes = throttle_status_codes
+        self.max_rate = max(RATE_LIMIT_MIN_RPS, max_rate)
+        self.rate = min(max(RATE_LIMIT_MIN_RPS, rate), self.max_rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._backoff_until = 0.0
+        self._next_backoff = RATE_LIMIT_BASE_BACKOFF_SECONDS
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, cancellation_event=None):
+        """
+        Blocks until a request may be sent to this host.
+
+        Returns:
+            bool: False if the cancellation event was set while waiting, True otherwise.
+        """
+        while True:
+            if cancellation_event and cancellation_event.is_set():
+                return False
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._backoff_until:
+                    wait = self._backoff_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+            # Sleep in short slices so a cancellation is noticed during long backoffs.
+            time.sleep(min(wait, 0.25))
+
+    def record_response(self, status_code, retry_after=None):
+        """Feeds the outcome of a request back into the limiter."""
+        with self._lock:
+            now = time.monotonic()
+            if status_code in self.throttle_status_codes:
+                self._successes = 0
+                delay = retry_after if retry_after is not None else self._next_backoff
+                if now >= self._backoff_until:
+                    # Only the first thread to hit the wall slows the host down;
+                    # the others arriving during the same pause just wait it out.
+                    self.rate = max(RATE_LIMIT_MIN_RPS, self.rate / 2.0)
+                    self._next_backoff = min(RATE_LIMIT_MAX_BACKOFF_SECONDS, self._next_backoff * 2.0)
+                self._backoff_until = max(self._backoff_until, now + min(delay, RATE_LIMIT_MAX_BACKOFF_SECONDS))
+                self._tokens = 0.0
+            elif status_code < 400:
+                self._next_backoff = RATE_LIMIT_BASE_BACKOFF_SECONDS
+                self._successes += 1
+                if self._successes >= RATE_LIMIT_RAMP_UP_AFTER and self.rate < self.max_rate:
+                    self.rate = min(self.max_rate, self.rate + RATE_LIMIT_RAMP_UP_STEP)
+                    self._successes = 0
+
+    def is_backing_off(self):
+        with self._lock:
+            return time.monotonic() < self._backoff_until
+
+
+_limiters_lock = threading.Lock()
+_limiters = {}
+
+
+def get_rate_limiter(url_or_host):
+    """
+    Returns the shared limiter for the host of a URL, creating it on first use.
+
+    API requests and file downloads to the same host use separate buckets:
+    file traffic gets a much higher rate and is not slowed down by 403s.
+    """
+    url = url_or_host if '://' in url_or_host else f"https://{url_or_host}"
+    host = urlparse(url).netloc.lower()
+    key = (host, is_api_url(url))
+    limiter = _limiters.get(key)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if key[1]:
+                limiter = HostRateLimiter(host)
+            else:
+                limiter = HostRateLimiter(host, RATE_LIMIT_FILE_DEFAULT_RPS, RATE_LIMIT_FILE_MAX_RPS,
+                                          RATE_LIMIT_FILE_BURST, FILE_THROTTLE_STATUS_CODES)
+            _limiters[key] = limiter
+    return limiter
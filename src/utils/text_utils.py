@@ -1,6 +1,9 @@
 # --- Standard Library Imports ---
 import re
 import html
+import functools
+import threading
+from collections import deque
 
 # --- Local Application Imports ---
 # Import from file_utils within the same package
@@ -25,6 +28,11 @@ KNOWN_TXT_MATCH_CLEANUP_PATTERNS = [
     r'\bComm\b',
     r'\bPreview\b',
 ]
+_KNOWN_TXT_CLEANUP_PATTERN = re.compile("|".join(f"(?:{pat})" for pat in KNOWN_TXT_MATCH_CLEANUP_PATTERNS), re.IGNORECASE)
+_WHITESPACE_RUN_PATTERN = re.compile(r'\s+')
+
+# Distinct titles/filenames a compiled matcher remembers the result for.
+TEXT_MATCH_CACHE_SIZE = 8192
 
 # --- Text Matching and Manipulation Utilities ---
 
@@ -116,6 +124,244 @@ def extract_folder_name_from_title(title, unwanted_keywords):
     return cleaned_full_title if cleaned_full_title else 'Uncategorized'
 
 
+def _is_word_char(char):
+    # Same set of characters as \w in a str regex.
+    return char.isalnum() or char == '_'
+
+
+def has_word_boundaries(text, start, end):
+    """True if text[start:end] would be matched by r'\b...\b' at that position."""
+    if start >= end:
+        return False
+    before_is_word = start > 0 and _is_word_char(text[start - 1])
+    after_is_word = end < len(text) and _is_word_char(text[end])
+    return (before_is_word != _is_word_char(text[start]) and
+            after_is_word != _is_word_char(text[end - 1]))
+
+
+class AhoCorasick:
+    """
+    Finds every occurrence of many fixed strings in one left-to-right pass
+    over a text (Aho-Corasick automaton).
+
+    Built from (pattern, payload) pairs; patterns are matched exactly, so
+    callers lower-case both sides for case-insensitive matching.
+    """
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]  # per state: (pattern length, payload) of every pattern ending there
+        self._terminals = [[]]  # per state: payloads of the pattern spelled by that state only
+        for pattern, payload in patterns:
+            if pattern:
+                self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern, payload):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._terminals.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), payload))
+        self._terminals[state].append(payload)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """Yields (start, end, payload) for every occurrence, overlapping ones included."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for length, payload in outputs[state]:
+                    yield end - length, end, payload
+
+    def iter_prefix_matches(self, text):
+        """Yields the payload of every pattern that `text` starts with."""
+        state = 0
+        for char in text:
+            state = self._goto[state].get(char)
+            if state is None:
+                return
+            yield from self._terminals[state]
+
+
+class KnownNamesMatcher:
+    """
+    Known.txt entries compiled into one Aho-Corasick automaton over all
+    lower-cased aliases, so a title is matched in a single pass however
+    many entries there are. Matches are accepted only on word boundaries,
+    as the per-alias r'\b<alias>\b' search did, and results are cached
+    per title.
+    """
+    def __init__(self, names_to_match):
+        self.entry_count = len(names_to_match)
+        self._primary_names = []
+        patterns = []
+        for name_obj in names_to_match:
+            primary_folder_name = name_obj.get("name")
+            aliases = name_obj.get("aliases", [])
+            if not primary_folder_name or not aliases:
+                continue
+            entry_index = len(self._primary_names)
+            self._primary_names.append(clean_folder_name(primary_folder_name))
+            for alias in aliases:
+                alias_lower = alias.lower()
+                if alias_lower:
+                    patterns.append((alias_lower, entry_index))
+        self._automaton = AhoCorasick(patterns)
+        self._title_entries = functools.lru_cache(maxsize=TEXT_MATCH_CACHE_SIZE)(self._match_title_entries)
+        self._prefix_entries = functools.lru_cache(maxsize=TEXT_MATCH_CACHE_SIZE)(self._match_prefix_entries)
+
+    def _match_title_entries(self, title):
+        # Clean the title by removing common tags like [OC], [HD], etc.
+        cleaned_title = _KNOWN_TXT_CLEANUP_PATTERN.sub(' ', title)
+        title_lower = _WHITESPACE_RUN_PATTERN.sub(' ', cleaned_title).strip().lower()
+        return frozenset(entry_index for start, end, entry_index in self._automaton.iter_matches(title_lower)
+                         if has_word_boundaries(title_lower, start, end))
+
+    def _match_prefix_entries(self, filename):
+        return frozenset(self._automaton.iter_prefix_matches(filename.lower()))
+
+    def _names_for(self, entry_indices, unwanted_keywords):
+        names = {self._primary_names[i] for i in entry_indices}
+        return sorted(name for name in names if name and name.lower() not in unwanted_keywords)
+
+    def match_title(self, title, unwanted_keywords):
+        """Sorted cleaned primary names whose aliases appear in `title` as whole words."""
+        return self._names_for(self._title_entries(title), unwanted_keywords)
+
+    def match_filename_prefix(self, filename, unwanted_keywords):
+        """Sorted cleaned primary names with an alias that `filename` starts with."""
+        return self._names_for(self._prefix_entries(filename), unwanted_keywords)
+
+
+_known_names_matchers = []  # (names list, matcher) for the lists of the current sessions
+_known_names_matchers_lock = threading.Lock()
+_MAX_CACHED_KNOWN_NAMES_MATCHERS = 4
+
+
+def get_known_names_matcher(names_to_match):
+    """
+    Returns the compiled matcher for a Known.txt list. Every worker of a
+    session is handed the same list object, so the automaton is built once
+    per session and again only when a new copy of Known.txt is passed in.
+    """
+    with _known_names_matchers_lock:
+        for names_list, matcher in _known_names_matchers:
+            if names_list is names_to_match and matcher.entry_count == len(names_to_match):
+                return matcher
+        matcher = KnownNamesMatcher(names_to_match)
+        _known_names_matchers.insert(0, (names_to_match, matcher))
+        del _known_names_matchers[_MAX_CACHED_KNOWN_NAMES_MATCHERS:]
+        return matcher
+
+
+class CharacterFilterMatcher:
+    """
+    The character filters of a session compiled into one automaton over
+    every filter term (the aliases, plus the group name for groups).
+
+    match_title() finds the first filter, in list order, with a term that
+    occurs as a whole word, as is_title_match_for_character() does for one
+    term; match_filename() does the same with plain substring matching, as
+    is_filename_match_for_character() does. Both are case-insensitive,
+    answer in one pass over the text, and cache their result per string.
+    """
+    def __init__(self, filter_objects):
+        self.filters = [dict(filter_obj) for filter_obj in filter_objects]
+        patterns = []
+        for filter_index, filter_obj in enumerate(self.filters):
+            terms = list(filter_obj["aliases"])
+            if filter_obj["is_group"] and filter_obj["name"] not in terms:
+                terms.append(filter_obj["name"])
+            for term in terms:
+                term_lower = str(term).strip().lower()
+                if term_lower:
+                    patterns.append((term_lower, (filter_index, term)))
+        self._automaton = AhoCorasick(patterns)
+        self._title_match = functools.lru_cache(maxsize=TEXT_MATCH_CACHE_SIZE)(self.match_text)
+        self._filename_match = functools.lru_cache(maxsize=TEXT_MATCH_CACHE_SIZE)(self._match_filename)
+
+    def _first_filter(self, text_lower, whole_words):
+        best = None
+        for start, end, (filter_index, term) in self._automaton.iter_matches(text_lower):
+            if whole_words and not has_word_boundaries(text_lower, start, end):
+                continue
+            if best is None or filter_index < best[0]:
+                best = (filter_index, term)
+                if filter_index == 0:
+                    break
+        if best is None:
+            return None
+        return self.filters[best[0]], best[1]
+
+    def match_text(self, text):
+        """
+        Returns (filter object, matched term) for the first filter with a
+        term in `text` as a whole word, or None. Not cached; meant for
+        one-off texts such as comments.
+        """
+        if not text:
+            return None
+        return self._first_filter(text.lower(), whole_words=True)
+
+    def _match_filename(self, filename):
+        if not filename:
+            return None
+        return self._first_filter(filename.lower(), whole_words=False)
+
+    def match_title(self, title):
+        """Cached match_text() for post titles."""
+        return self._title_match(title)
+
+    def match_filename(self, filename):
+        """Returns (filter object, matched term) for the first filter with a term inside `filename`, or None."""
+        return self._filename_match(filename)
+
+
+_character_filter_matchers = {}
+_character_filter_matchers_lock = threading.Lock()
+
+
+def get_character_filter_matcher(filter_objects):
+    """
+    Returns the compiled matcher for a list of parsed character filters.
+    Workers receive fresh copies of the filters, so matchers are shared by
+    the filters' content; a changed filter list gets a new matcher.
+    """
+    signature = tuple((f["name"], bool(f["is_group"]), tuple(f["aliases"])) for f in filter_objects)
+    with _character_filter_matchers_lock:
+        matcher = _character_filter_matchers.get(signature)
+        if matcher is None:
+            if len(_character_filter_matchers) >= 8:
+                _character_filter_matchers.clear()
+            matcher = _character_filter_matchers[signature] = CharacterFilterMatcher(filter_objects)
+        return matcher
+
+
 def match_folders_from_title(title, names_to_match, unwanted_keywords):
     """
     Matches folder names from a title based on a list of known name objects.
@@ -131,43 +377,12 @@ def match_folders_from_title(title, names_to_match, unwanted_keywords):
     """
     if not title or not names_to_match:
         return []
-
-    # Clean the title by removing common tags like [OC], [HD], etc.
-    cleaned_title = title
-    for pat_str in KNOWN_TXT_MATCH_CLEANUP_PATTERNS:
-        cleaned_title = re.sub(pat_str, ' ', cleaned_title, flags=re.IGNORECASE)
-    cleaned_title = re.sub(r'\s+', ' ', cleaned_title).strip()
-    title_lower = cleaned_title.lower()
-
-    matched_cleaned_names = set()
-    
-    # Sort by name length descending to match longer names first (e.g., "Cloud Strife" before "Cloud")
-    sorted_name_objects = sorted(names_to_match, key=lambda x: len(x.get("name", "")), reverse=True)
-
-    for name_obj in sorted_name_objects:
-        primary_folder_name = name_obj.get("name")
-        aliases = name_obj.get("aliases", [])
-        if not primary_folder_name or not aliases:
-            continue
-            
-        for alias in aliases:
-            alias_lower = alias.lower()
-            if not alias_lower: continue
-            
-            # Use word boundaries for accurate matching
-            pattern = r'\b' + re.escape(alias_lower) + r'\b'
-            if re.search(pattern, title_lower):
-                cleaned_primary_name = clean_folder_name(primary_folder_name)
-                if cleaned_primary_name.lower() not in unwanted_keywords:
-                    matched_cleaned_names.add(cleaned_primary_name)
-                    break # Move to the next name object once a match is found for this one
-                    
-    return sorted(list(matched_cleaned_names))
+    return get_known_names_matcher(names_to_match).match_title(title, unwanted_keywords)
 
 
 def match_folders_from_filename_enhanced(filename, names_to_match, unwanted_keywords):
     """
-    Matches folder names from a filename, prioritizing longer and more specific aliases.
+    Matches folder names from a filename that starts with one of their aliases.
 
     Args:
         filename (str): The filename to check.
@@ -179,29 +394,4 @@ def match_folders_from_filename_enhanced(filename, names_to_match, unwanted_keyw
     """
     if not filename or not names_to_match:
         return []
-
-    filename_lower = filename.lower()
-    matched_primary_names = set()
-
-    # Create a flat list of (alias, primary_name) tuples to sort by alias length
-    alias_map_to_primary = []
-    for name_obj in names_to_match:
-        primary_name = name_obj.get("name")
-        if not primary_name: continue
-        
-        cleaned_primary_name = clean_folder_name(primary_name)
-        if not cleaned_primary_name or cleaned_primary_name.lower() in unwanted_keywords:
-            continue
-
-        for alias in name_obj.get("aliases", []):
-            if alias.lower():
-                alias_map_to_primary.append((alias.lower(), cleaned_primary_name))
-    
-    # Sort by alias length, descending, to match longer aliases first
-    alias_map_to_primary.sort(key=lambda x: len(x[0]), reverse=True)
-
-    for alias_lower, primary_name_for_alias in alias_map_to_primary:
-        if filename_lower.startswith(alias_lower):
-            matched_primary_names.add(primary_name_for_alias)
-
-    return sorted(list(matched_primary_names))
+    return get_known_names_matcher(names_to_match).match_filename_prefix(filename, unwanted_keywords)
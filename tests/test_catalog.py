@@ -0,0 +1,23 @@
+import unittest
+
+from src.core.catalog import path_hash_from_url
+
+SHA256 = "abcd" + "0123456789abcdef" * 3 + "0123456789ab"
+
+
+class PathHashFromUrlTests(unittest.TestCase):
+    def test_data_url_yields_hash(self):
+        url = f"https://n1.kemono.cr/data/ab/cd/{SHA256}.png?f=image.png"
+        self.assertEqual(path_hash_from_url(url), SHA256)
+
+    def test_thumbnail_url_has_no_hash(self):
+        url = f"https://img.kemono.cr/thumbnail/data/ab/cd/{SHA256}.jpg"
+        self.assertIsNone(path_hash_from_url(url))
+
+    def test_mismatched_shard_directories_have_no_hash(self):
+        url = f"https://n1.kemono.cr/data/ff/cd/{SHA256}.png"
+        self.assertIsNone(path_hash_from_url(url))
+
+
+if __name__ == '__main__':
+    unittest.main()